@@ -0,0 +1,12 @@
+"""
+Benchmarks for the field, group and pairing arithmetic
+
+	python -m benchmarks run --out results.json
+	python -m benchmarks compare baseline.json results.json
+
+Every benchmark is run on each curve in `pyeip1962.curves`, results are
+reported in operations per second along with their spread across repeats.
+"""
+
+from .cases import CURVES, curve_cases
+from .runner import Measurement, measure, run, compare
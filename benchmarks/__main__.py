@@ -0,0 +1,94 @@
+import argparse
+import fnmatch
+import json
+import sys
+from typing import Sequence
+
+from .cases import CURVES, MSM_SIZES, curve_cases
+from .runner import Measurement, run, compare, load, save
+from . import calibrate
+
+
+def _print_measurement(m: Measurement):
+	print(f'{m.name:<40} {m.mean:>14,.1f} ops/s  ±{m.rsd * 100:5.1f}%  ({m.number} x {len(m.samples)})',
+		  flush=True)
+
+
+def cmd_run(opts) -> int:
+	cases = list()
+	for name in opts.curve or sorted(CURVES):
+		cases += curve_cases(name, opts.msm_sizes)
+	if opts.filter:
+		cases = [_ for _ in cases if any(fnmatch.fnmatch(_[0], pattern) for pattern in opts.filter)]
+	results = run(cases, opts.min_time, opts.repeat, progress=_print_measurement)
+	if opts.out:
+		save(results, opts.out)
+	return 0
+
+
+def cmd_compare(opts) -> int:
+	rows = compare(load(opts.baseline), load(opts.current), opts.threshold)
+	for row in rows:
+		change = '' if row['change'] is None else f'{row["change"] * 100:+7.1f}%'
+		print(f'{row["name"]:<40} {change:>8}  {row["status"]}')
+	regressions = [_ for _ in rows if _['status'] == 'regression']
+	if regressions:
+		print(f'{len(regressions)} regression(s) beyond {opts.threshold * 100:.0f}%', file=sys.stderr)
+		return 1
+	return 0
+
+
+def _print_sample(s: calibrate.Sample):
+	label = s.curve or f'L={s.field_length} k={s.extension_degree}'
+	print(f'{s.operation:<12} {label:<14} n={s.n:<4} {s.seconds * 1000:>12.3f} ms  {s.field_ops:>10} field ops',
+		  flush=True)
+
+
+def cmd_calibrate(opts) -> int:
+	samples = calibrate.sweep(opts.field_lengths, opts.extension_degrees, opts.multiexp_sizes,
+							  opts.pair_counts, opts.pairing_curve, opts.repeat, progress=_print_sample)
+	models = calibrate.fit_models(samples)
+	print(json.dumps(models, indent=2))
+	if opts.out:
+		save(dict(samples=[dict(s._asdict(), field_ops=s.field_ops) for s in samples], models=models), opts.out)
+	return 0
+
+
+def main(args: Sequence[str] = None) -> int:
+	parser = argparse.ArgumentParser(prog='python -m benchmarks', description='pyeip1962 benchmarks')
+	commands = parser.add_subparsers(dest='command', required=True)
+
+	p = commands.add_parser('run', help='Run benchmarks')
+	p.add_argument('--curve', action='append', choices=sorted(CURVES), help='Curve to benchmark, default all')
+	p.add_argument('--filter', action='append', metavar='GLOB', help='Only run matching benchmarks, e.g. "*/G1.*"')
+	p.add_argument('--msm-sizes', type=int, nargs='*', default=list(MSM_SIZES))
+	p.add_argument('--min-time', type=float, default=0.2, help='Minimum seconds per repeat')
+	p.add_argument('--repeat', type=int, default=5)
+	p.add_argument('--out', metavar='PATH', help='Write results as JSON')
+	p.set_defaults(fn=cmd_run)
+
+	p = commands.add_parser('compare', help='Compare results against a baseline')
+	p.add_argument('baseline')
+	p.add_argument('current')
+	p.add_argument('--threshold', type=float, default=0.1, help='Slowdown to flag, as a fraction')
+	p.set_defaults(fn=cmd_compare)
+
+	p = commands.add_parser('calibrate', help='Measure how operation costs scale, and fit gas models')
+	p.add_argument('--field-lengths', type=int, nargs='+', default=list(calibrate.FIELD_LENGTHS))
+	p.add_argument('--extension-degrees', type=int, nargs='*', default=list(calibrate.EXTENSION_DEGREES))
+	p.add_argument('--multiexp-sizes', type=int, nargs='*', default=list(calibrate.MULTIEXP_SIZES))
+	p.add_argument('--pair-counts', type=int, nargs='*', default=list(calibrate.PAIR_COUNTS))
+	p.add_argument('--pairing-curve', action='append', choices=sorted(calibrate.PAIRING_CURVES),
+				   help='Built-in curve to measure pairings on, default all')
+	p.add_argument('--repeat', type=int, default=3)
+	p.add_argument('--out', metavar='PATH', help='Write samples and fitted models as JSON')
+	p.set_defaults(fn=cmd_calibrate)
+
+	opts = parser.parse_args(args)
+	if opts.command == 'calibrate' and opts.pairing_curve is None:
+		opts.pairing_curve = sorted(calibrate.PAIRING_CURVES)
+	return opts.fn(opts)
+
+
+if __name__ == "__main__":
+	sys.exit(main())
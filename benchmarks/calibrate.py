@@ -0,0 +1,303 @@
+"""
+Gas model calibration sweep
+
+Random curves are generated for each modulus length and extension degree,
+with random points on them, and every operation is executed as EIP-1962
+calldata through `execute`, so the measurements include parsing, context
+construction and validation as a real call would. Pairings are measured on
+the built-in curves for increasing numbers of pairs, as generating pairing
+friendly curves of arbitrary size is out of reach here.
+
+Cost models are then fitted to the measurements by least squares:
+
+	add, mul, multiexp:  t = c * L^a * k^b [* n^g]  (fitted in log space)
+	pairing:             t = base + per_pair * n   (per curve)
+
+where L is the field length in bytes, k the extension degree and n the
+number of multiexp terms or pairs. The same fit is made of the time per
+counted field operation, whose exponent in L shows how the underlying
+arithmetic scales compared to schoolbook multiplication at L^2.
+"""
+
+import math
+import random
+import statistics
+import time
+from typing import Callable, Dict, List, NamedTuple, Sequence, Tuple
+
+from pyeip1962.context import CONTEXT_CACHE, g1_context, g2_context
+from pyeip1962.counters import count_ops
+from pyeip1962.encoder import encode_op
+from pyeip1962.executor import execute
+from pyeip1962.field import make_Fqk
+from pyeip1962.parser import is_non_nth_root
+from pyeip1962.structs import G1Prefix, G2Prefix, G1Point, G2Point, PairingOp, CurveFamily, TwistType
+from pyeip1962.structs import G1AddOp, G1MulOp, G1MultiExpOp, G2AddOp, G2MulOp, G2MultiExpOp
+
+from .cases import load_curve
+
+
+FIELD_LENGTHS = (16, 32, 48, 64, 96, 128)
+EXTENSION_DEGREES = (2, 3)
+MULTIEXP_SIZES = (2, 4, 8, 16)
+PAIR_COUNTS = (1, 2, 4)
+ORDER_LENGTH = 32
+
+# Built-in curves as EIP-1962 pairing parameters:
+# (family, B, Fp2 non-residue as offset from p, Fp6 non-residue, twist, x)
+PAIRING_CURVES = {
+	'ALTBN_254': (CurveFamily.BN, 3, -1, [9, 1], TwistType.D, 4965661367192848881),
+	'BLS12_377': (CurveFamily.BLS12, 1, -5, [0, 1], TwistType.D, 0x8508c00000000001),
+	'BLS12_381': (CurveFamily.BLS12, 4, -1, [1, 1], TwistType.M, 0xd201000000010000),
+}
+
+
+class Sample(NamedTuple):
+	operation: str				# Operation name, e.g. G1_MUL
+	curve: str					# Built-in curve name, or empty for random curves
+	field_length: int			# L
+	extension_degree: int		# k
+	n: int						# Multiexp terms or pairs, otherwise 1
+	seconds: float				# Median wall time of one call
+	counts: Dict[str, int]		# Field and group operations of one call
+
+	@property
+	def field_ops(self) -> int:
+		return sum(v for name, v in self.counts.items() if name.startswith('Fq'))
+
+
+def is_probable_prime(n: int, rng: random.Random, rounds: int = 32) -> bool:
+	"""Miller-Rabin"""
+	if n < 2:
+		return False
+	for p in (2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37):
+		if n % p == 0:
+			return n == p
+	d, s = n - 1, 0
+	while d % 2 == 0:
+		d, s = d // 2, s + 1
+	for _ in range(rounds):
+		x = pow(rng.randrange(2, n - 1), d, n)
+		if x in (1, n - 1):
+			continue
+		for _ in range(s - 1):
+			x = pow(x, 2, n)
+			if x == n - 1:
+				break
+		else:
+			return False
+	return True
+
+
+def random_prime(n_bytes: int, rng: random.Random) -> int:
+	"""Prime of exactly `n_bytes` bytes, congruent to 1 mod 6 so Fp2 and Fp3 exist"""
+	while True:
+		p = rng.getrandbits(n_bytes * 8) | (1 << (n_bytes * 8 - 1))
+		p += 1 - (p % 6)
+		if p.bit_length() == n_bytes * 8 and is_probable_prime(p, rng):
+			return p
+
+
+def random_order(n_bytes: int, rng: random.Random) -> int:
+	# Only the length of the order matters for these operations, it sets the scalar size
+	return rng.getrandbits(n_bytes * 8) | (1 << (n_bytes * 8 - 1)) | 1
+
+
+def random_g1_curve(field_length: int, rng: random.Random, order_length: int = ORDER_LENGTH) -> Tuple[G1Prefix, List[int]]:
+	"""
+	Random curve with a known point on it, B is solved for from a random A
+	and a random point, avoiding square roots
+	"""
+	p = random_prime(field_length, rng)
+	while True:
+		A, x, y = (rng.randrange(1, p) for _ in range(3))
+		B = (y * y - x ** 3 - A * x) % p
+		if (4 * A ** 3 + 27 * B ** 2) % p != 0:
+			break
+	return G1Prefix(field_length, p, A, B, order_length, random_order(order_length, rng)), [x, y]
+
+
+def random_g2_curve(field_length: int, extension_degree: int, rng: random.Random,
+					order_length: int = ORDER_LENGTH) -> Tuple[G2Prefix, List[List[int]]]:
+	p = random_prime(field_length, rng)
+	k = extension_degree
+	non_residue = next(n for n in range(2, p) if is_non_nth_root(n, p, k))
+	Fqk = make_Fqk(p, [(-non_residue) % p] + [0] * (k - 1))
+	while True:
+		A, x, y = (Fqk([rng.randrange(p) for _ in range(k)]) for _ in range(3))
+		B = y * y - x ** 3 - A * x
+		if 4 * A ** 3 + 27 * B ** 2 != Fqk.zero():
+			break
+	prefix = G2Prefix(field_length, p, k, non_residue, [int(_) for _ in A.coeffs], [int(_) for _ in B.coeffs],
+					  order_length, random_order(order_length, rng))
+	return prefix, [[int(_) for _ in x.coeffs], [int(_) for _ in y.coeffs]]
+
+
+def _points(P, n: int) -> list:
+	# Distinct points, derived by doubling which is cheaper than scalar multiplication
+	points = [P]
+	for _ in range(n - 1):
+		points.append(points[-1].double())
+	return points
+
+
+def _g1(P) -> G1Point:
+	return G1Point(int(P.x), int(P.y))
+
+
+def _g2(P) -> G2Point:
+	return G2Point([int(_) for _ in P.x.coeffs], [int(_) for _ in P.y.coeffs])
+
+
+def g1_calls(field_length: int, rng: random.Random, multiexp_sizes: Sequence[int]) -> List[Tuple[str, int, bytes]]:
+	prefix, (x, y) = random_g1_curve(field_length, rng)
+	points = [_g1(_) for _ in _points(g1_context(prefix).G1(x, y), max(multiexp_sizes + (2,)))]
+	scalar = lambda: rng.randrange(1 << (prefix.order_length * 8))
+	calls = [('G1_ADD', 1, G1AddOp(prefix, points[0], points[1])),
+			 ('G1_MUL', 1, G1MulOp(prefix, points[0], scalar()))]
+	for n in multiexp_sizes:
+		calls.append(('G1_MULTIEXP', n, G1MultiExpOp(prefix, n, [(P, scalar()) for P in points[:n]])))
+	return [(name, n, encode_op(op)) for name, n, op in calls]
+
+
+def g2_calls(field_length: int, extension_degree: int, rng: random.Random,
+			 multiexp_sizes: Sequence[int]) -> List[Tuple[str, int, bytes]]:
+	prefix, (x, y) = random_g2_curve(field_length, extension_degree, rng)
+	points = [_g2(_) for _ in _points(g2_context(prefix).G2(x, y), max(multiexp_sizes + (2,)))]
+	scalar = lambda: rng.randrange(1 << (prefix.order_length * 8))
+	calls = [('G2_ADD', 1, G2AddOp(prefix, points[0], points[1])),
+			 ('G2_MUL', 1, G2MulOp(prefix, points[0], scalar()))]
+	for n in multiexp_sizes:
+		calls.append(('G2_MULTIEXP', n, G2MultiExpOp(prefix, n, [(P, scalar()) for P in points[:n]])))
+	return [(name, n, encode_op(op)) for name, n, op in calls]
+
+
+def pairing_call(curve: str, num_pairs: int, rng: random.Random) -> Tuple[int, bytes]:
+	family, B, fp2_offset, fp6_non_residue, twist, x = PAIRING_CURVES[curve]
+	module, group = load_curve(curve)
+	p, order = module.modulus, group.order()
+	field_length = (p.bit_length() + 7) // 8
+	order_length = (order.bit_length() + 7) // 8
+	g, h = group.G1().generator(), group.G2().generator()
+	pairs = [(_g1(g * rng.randrange(1, order)), _g2(h)) for _ in range(num_pairs)]
+	op = PairingOp(family, field_length, p, 0, B, order_length, order, p + fp2_offset, fp6_non_residue,
+				   twist, (x.bit_length() + 7) // 8, x, 0, num_pairs, pairs)
+	return field_length, encode_op(op)
+
+
+def measure_call(calldata: bytes, repeat: int) -> Tuple[float, Dict[str, int]]:
+	"""Median time of executing the call, then its operation counts from one counted run"""
+	execute(calldata)		# Warm the context cache, as repeated calls on a curve would
+	times = list()
+	for _ in range(repeat):
+		start = time.perf_counter()
+		execute(calldata)
+		times.append(time.perf_counter() - start)
+	with count_ops() as counter:
+		execute(calldata)
+	return statistics.median(times), counter.totals
+
+
+def sweep(field_lengths: Sequence[int] = FIELD_LENGTHS, extension_degrees: Sequence[int] = EXTENSION_DEGREES,
+		  multiexp_sizes: Sequence[int] = MULTIEXP_SIZES, pair_counts: Sequence[int] = PAIR_COUNTS,
+		  pairing_curves: Sequence[str] = tuple(PAIRING_CURVES), repeat: int = 3, seed: int = 1962,
+		  progress: Callable[[Sample], None] = None) -> List[Sample]:
+	rng = random.Random(seed)
+	multiexp_sizes = tuple(multiexp_sizes)
+	samples = list()
+
+	def run(operation, curve, field_length, k, n, calldata):
+		seconds, counts = measure_call(calldata, repeat)
+		sample = Sample(operation, curve, field_length, k, n, seconds, counts)
+		samples.append(sample)
+		if progress is not None:
+			progress(sample)
+
+	for L in field_lengths:
+		for operation, n, calldata in g1_calls(L, rng, multiexp_sizes):
+			run(operation, '', L, 1, n, calldata)
+		for k in extension_degrees:
+			for operation, n, calldata in g2_calls(L, k, rng, multiexp_sizes):
+				run(operation, '', L, k, n, calldata)
+		# Random curves are only used once, keep them from evicting anything else
+		CONTEXT_CACHE.clear()
+	for curve in pairing_curves:
+		for n in pair_counts:
+			field_length, calldata = pairing_call(curve, n, rng)
+			run('PAIRING', curve, field_length, 2, n, calldata)
+	return samples
+
+
+def least_squares(rows: Sequence[Sequence[float]], ys: Sequence[float]) -> List[float]:
+	"""Solves the normal equations by Gaussian elimination with partial pivoting"""
+	m = len(rows[0])
+	a = [[sum(r[i] * r[j] for r in rows) for j in range(m)] + [sum(r[i] * y for r, y in zip(rows, ys))]
+		 for i in range(m)]
+	for col in range(m):
+		pivot = max(range(col, m), key=lambda i: abs(a[i][col]))
+		a[col], a[pivot] = a[pivot], a[col]
+		if a[col][col] == 0:
+			raise ValueError("Model is underdetermined by the samples")
+		for i in range(m):
+			if i != col:
+				factor = a[i][col] / a[col][col]
+				a[i] = [x - factor * y for x, y in zip(a[i], a[col])]
+	return [a[i][m] / a[i][i] for i in range(m)]
+
+
+def r_squared(rows: Sequence[Sequence[float]], ys: Sequence[float], coeffs: Sequence[float]) -> float:
+	mean = statistics.mean(ys)
+	total = sum((y - mean) ** 2 for y in ys)
+	residual = sum((y - sum(c * x for c, x in zip(coeffs, r))) ** 2 for r, y in zip(rows, ys))
+	return 1 - residual / total if total else 1.0
+
+
+def fit_power_law(samples: Sequence[Sample], variables: Sequence[str], per_op: bool = False) -> dict:
+	"""
+	Fits t = c * prod(v^e_v) in log space, where each variable is an
+	attribute of `Sample`. Variables which do not vary are left out.
+	With `per_op` the time per counted field operation is fitted instead.
+	"""
+	variables = [v for v in variables if len({getattr(s, v) for s in samples}) > 1]
+	if per_op:
+		samples = [s for s in samples if s.field_ops]
+		ys = [math.log(s.seconds / s.field_ops) for s in samples]
+	else:
+		ys = [math.log(s.seconds) for s in samples]
+	rows = [[1.0] + [math.log(getattr(s, v)) for v in variables] for s in samples]
+	if len(rows) <= len(variables):
+		raise ValueError("Not enough samples for the model")
+	coeffs = least_squares(rows, ys)
+	return dict(coefficient=math.exp(coeffs[0]), exponents=dict(zip(variables, coeffs[1:])),
+				r_squared=r_squared(rows, ys, coeffs), samples=len(samples))
+
+
+def fit_linear(samples: Sequence[Sample]) -> dict:
+	"""Fits t = base + per_item * n"""
+	rows = [[1.0, float(s.n)] for s in samples]
+	ys = [s.seconds for s in samples]
+	base, per_item = least_squares(rows, ys)
+	return dict(base=base, per_item=per_item, r_squared=r_squared(rows, ys, [base, per_item]),
+				samples=len(samples))
+
+
+def fit_models(samples: Sequence[Sample]) -> dict:
+	models = dict()
+	by_operation = dict()
+	for s in samples:
+		by_operation.setdefault(s.operation, list()).append(s)
+	for operation, group in sorted(by_operation.items()):
+		if operation == 'PAIRING':
+			by_curve = dict()
+			for s in group:
+				by_curve.setdefault(s.curve, list()).append(s)
+			models[operation] = {curve: fit_linear(_) for curve, _ in sorted(by_curve.items())
+								 if len({s.n for s in _}) > 1}
+			continue
+		variables = ['field_length', 'extension_degree'] + (['n'] if operation.endswith('MULTIEXP') else [])
+		try:
+			models[operation] = dict(time=fit_power_law(group, variables),
+									 per_field_op=fit_power_law(group, ['field_length', 'extension_degree'], per_op=True))
+		except ValueError as ex:
+			models[operation] = dict(error=str(ex))
+	return models
@@ -0,0 +1,108 @@
+import importlib
+import random
+from typing import Callable, Iterable, List, Tuple
+
+from pyeip1962.group import AbstractGroup
+
+
+# Name -> (module, group class name)
+CURVES = {
+	'ALTBN_254': ('pyeip1962.curves.altbn_254', 'ALTBN_254'),
+	'BLS12_377': ('pyeip1962.curves.bls12_377', 'BLS12_377'),
+	'BLS12_381': ('pyeip1962.curves.bls12_381', 'BLS12_381'),
+	'SW6': ('pyeip1962.curves.sw6', 'SW6'),
+}
+
+# Field classes benchmarked when the curve module defines them
+FIELDS = ('Fq', 'Fq2', 'Fq3', 'Fq6', 'Fq12')
+
+MSM_SIZES = (4, 16, 64)
+
+Case = Tuple[str, Callable[[], object]]
+
+
+def load_curve(name: str):
+	"""Returns the curve module and its group class"""
+	module, attr = CURVES[name]
+	module = importlib.import_module(module)
+	return module, getattr(module, attr)
+
+
+def has_pairing(group: AbstractGroup) -> bool:
+	return group.miller_loop.__func__ is not AbstractGroup.miller_loop.__func__
+
+
+def _random_element(field_class, rng: random.Random):
+	q = field_class.field_modulus
+	degree = getattr(field_class, 'degree', 1)
+	if degree == 1:
+		return field_class(rng.randrange(1, q))
+	return field_class([rng.randrange(1, q) for _ in range(degree)])
+
+
+def field_cases(name: str, field_class, rng: random.Random) -> List[Case]:
+	a = _random_element(field_class, rng)
+	b = _random_element(field_class, rng)
+	one = field_class.one()
+	return [
+		(f'{name}.mul', lambda: a * b),
+		(f'{name}.sqr', lambda: a * a),
+		(f'{name}.inv', lambda: one / a),
+	]
+
+
+def point_cases(name: str, point_class, rng: random.Random, msm_sizes: Iterable[int] = ()) -> List[Case]:
+	order = point_class.order()
+	g = point_class.generator()
+	p = g * rng.randrange(1, order)
+	q = g * rng.randrange(1, order)
+	scalar = rng.randrange(1, order)
+	cases = [
+		(f'{name}.add', lambda: p.add(q)),
+		(f'{name}.double', lambda: p.double()),
+		(f'{name}.mul', lambda: p.mul(scalar)),
+		(f'{name}.mul2', lambda: p.mul2(scalar, q, order - scalar, subgroup=True)),
+		(f'{name}.mul_base', lambda: point_class.mul_base(scalar)),
+	]
+	for n in msm_sizes:
+		# Distinct bases are derived by doubling, which is much cheaper than scalar multiplication
+		bases = [p]
+		for _ in range(n - 1):
+			bases.append(bases[-1].double())
+		pairs = [(base, rng.randrange(1, order)) for base in bases]
+		cases.append((f'{name}.msm[{n}]', lambda pairs=pairs: point_class.msm(pairs)))
+	return cases
+
+
+def pairing_cases(group: AbstractGroup, rng: random.Random) -> List[Case]:
+	a = group.G1().generator() * rng.randrange(1, group.order())
+	b = group.G2().generator() * rng.randrange(1, group.order())
+	f = group.miller_loop(a, b)
+	gt = group.cyclotomic()(group.final_exponentiation(f))
+	scalar = rng.randrange(1, group.order())
+	return [
+		('GT.sqr', lambda: gt.square()),
+		('GT.exp', lambda: gt ** scalar),
+		('miller_loop', lambda: group.miller_loop(a, b)),
+		('final_exponentiation', lambda: group.final_exponentiation(f)),
+		('pairing', lambda: group.pairing(a, b)),
+	]
+
+
+def curve_cases(name: str, msm_sizes: Iterable[int] = MSM_SIZES, seed: int = 1962) -> List[Case]:
+	"""
+	Benchmarks for one curve, as (name, function) pairs. Inputs are derived
+	from a fixed seed so runs are comparable. Pairing benchmarks are only
+	included for curves which implement the Miller loop.
+	"""
+	module, group = load_curve(name)
+	rng = random.Random(seed)
+	cases = list()
+	for field_name in FIELDS:
+		if hasattr(module, field_name):
+			cases += field_cases(field_name, getattr(module, field_name), rng)
+	cases += point_cases('G1', group.G1(), rng, msm_sizes)
+	cases += point_cases('G2', group.G2(), rng)
+	if has_pairing(group):
+		cases += pairing_cases(group, rng)
+	return [(f'{name}/{case}', fn) for case, fn in cases]
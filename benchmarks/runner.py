@@ -0,0 +1,108 @@
+import json
+import platform
+import statistics
+import sys
+import time
+from typing import Callable, Dict, List, NamedTuple, Sequence, Tuple
+
+
+class Measurement(NamedTuple):
+	name: str
+	number: int					# Calls per repeat
+	samples: List[float]		# Operations per second, one per repeat
+
+	@property
+	def mean(self) -> float:
+		return statistics.mean(self.samples)
+
+	@property
+	def stdev(self) -> float:
+		return statistics.stdev(self.samples) if len(self.samples) > 1 else 0.0
+
+	@property
+	def rsd(self) -> float:
+		"""Relative standard deviation, as a fraction of the mean"""
+		return self.stdev / self.mean if self.mean else 0.0
+
+	def as_dict(self) -> dict:
+		return dict(number=self.number, mean=self.mean, stdev=self.stdev, rsd=self.rsd,
+					min=min(self.samples), max=max(self.samples), samples=self.samples)
+
+
+def _time(fn: Callable, number: int) -> float:
+	start = time.perf_counter()
+	for _ in range(number):
+		fn()
+	return time.perf_counter() - start
+
+
+def measure(name: str, fn: Callable, min_time: float = 0.2, repeat: int = 5) -> Measurement:
+	"""
+	Calibrates the number of calls so one repeat takes at least `min_time`
+	seconds, as `timeit` does, then times `repeat` repeats of that many calls.
+	"""
+	number = 1
+	while True:
+		elapsed = _time(fn, number)
+		if elapsed >= min_time:
+			break
+		number *= 10 if elapsed < min_time / 10 else 2
+	samples = [number / elapsed]
+	for _ in range(repeat - 1):
+		samples.append(number / _time(fn, number))
+	return Measurement(name, number, samples)
+
+
+def environment() -> dict:
+	return dict(python=sys.version.split()[0], implementation=platform.python_implementation(),
+				machine=platform.machine(), platform=platform.platform(),
+				timestamp=time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()))
+
+
+def run(cases: Sequence[Tuple[str, Callable]], min_time: float = 0.2, repeat: int = 5,
+		progress: Callable[[Measurement], None] = None) -> dict:
+	results = dict()
+	for name, fn in cases:
+		m = measure(name, fn, min_time, repeat)
+		results[name] = m.as_dict()
+		if progress is not None:
+			progress(m)
+	return dict(environment=environment(), min_time=min_time, repeat=repeat, results=results)
+
+
+def compare(baseline: dict, current: dict, threshold: float = 0.1) -> List[dict]:
+	"""
+	Compares two sets of results by mean ops/s. A benchmark regressed when
+	it is slower by more than `threshold`, as a fraction of the baseline,
+	and by more than twice the combined standard deviation, so noisy
+	benchmarks are not flagged on noise alone.
+	"""
+	rows = list()
+	for name, new in sorted(current['results'].items()):
+		old = baseline['results'].get(name)
+		if old is None:
+			rows.append(dict(name=name, status='new', change=None))
+			continue
+		change = (new['mean'] - old['mean']) / old['mean']
+		noise = 2 * (old['stdev'] ** 2 + new['stdev'] ** 2) ** 0.5
+		significant = abs(new['mean'] - old['mean']) > noise
+		if change < -threshold and significant:
+			status = 'regression'
+		elif change > threshold and significant:
+			status = 'improvement'
+		else:
+			status = 'unchanged'
+		rows.append(dict(name=name, status=status, change=change, baseline=old['mean'], current=new['mean']))
+	for name in sorted(set(baseline['results']) - set(current['results'])):
+		rows.append(dict(name=name, status='missing', change=None))
+	return rows
+
+
+def load(path: str) -> dict:
+	with open(path) as handle:
+		return json.load(handle)
+
+
+def save(results: dict, path: str):
+	with open(path, 'w') as handle:
+		json.dump(results, handle, indent=2, sort_keys=True)
@@ -0,0 +1,158 @@
+"""
+Content-addressed cache of precompile results, keyed by the SHA-256 of the raw calldata
+
+Results are kept in a bounded in-memory LRU, optionally backed by a sqlite
+file which survives restarts. On a miss in memory the file is checked, and
+a result found there is promoted into memory. The file is not bounded, it
+only holds deterministic results and can be deleted at any time.
+
+Only successful results are cached. Invalid calls mostly fail while being
+parsed, which is cheaper than hashing them.
+"""
+
+import hashlib
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+from .parser import Input, read_input
+
+
+Result = Union[bytes, Exception]
+
+
+def calldata_key(calldata) -> bytes:
+	return hashlib.sha256(calldata).digest()
+
+
+class SqliteStore(object):
+	"""Persistent key to result mapping in a single sqlite table"""
+
+	def __init__(self, path: str):
+		self.path = path
+		self._db = sqlite3.connect(path, check_same_thread=False)
+		self._db.execute('PRAGMA journal_mode=WAL')
+		self._db.execute('PRAGMA synchronous=NORMAL')
+		self._db.execute('CREATE TABLE IF NOT EXISTS results (key BLOB PRIMARY KEY, output BLOB NOT NULL)')
+		self._db.commit()
+
+	def __len__(self):
+		return self._db.execute('SELECT COUNT(*) FROM results').fetchone()[0]
+
+	def get(self, key: bytes) -> Optional[bytes]:
+		row = self._db.execute('SELECT output FROM results WHERE key = ?', (key,)).fetchone()
+		return None if row is None else bytes(row[0])
+
+	def put_many(self, items: Sequence[Tuple[bytes, bytes]]):
+		self._db.executemany('INSERT OR REPLACE INTO results (key, output) VALUES (?, ?)', items)
+		self._db.commit()
+
+	def clear(self):
+		self._db.execute('DELETE FROM results')
+		self._db.commit()
+
+	def close(self):
+		self._db.close()
+
+
+class ResultCache(object):
+	"""Bounded, thread-safe LRU cache of call results with an optional `SqliteStore`"""
+
+	def __init__(self, maxsize: int = 4096, path: str = None):
+		if maxsize < 1:
+			raise ValueError("Cache size must be positive")
+		self.maxsize = maxsize
+		self.store = SqliteStore(path) if path else None
+		self.hits = 0
+		self.store_hits = 0
+		self.misses = 0
+		self.evictions = 0
+		self._entries = OrderedDict()
+		self._lock = threading.Lock()
+
+	def __len__(self):
+		return len(self._entries)
+
+	def _insert(self, key: bytes, output: bytes):
+		self._entries[key] = output
+		self._entries.move_to_end(key)
+		while len(self._entries) > self.maxsize:
+			self._entries.popitem(last=False)
+			self.evictions += 1
+
+	def get(self, key: bytes) -> Optional[bytes]:
+		with self._lock:
+			output = self._entries.get(key)
+			if output is not None:
+				self._entries.move_to_end(key)
+				self.hits += 1
+				return output
+			if self.store is not None:
+				output = self.store.get(key)
+				if output is not None:
+					self._insert(key, output)
+					self.store_hits += 1
+					return output
+			self.misses += 1
+			return None
+
+	def put_many(self, items: Sequence[Tuple[bytes, bytes]]):
+		with self._lock:
+			for key, output in items:
+				self._insert(key, output)
+			if self.store is not None and items:
+				self.store.put_many(items)
+
+	def put(self, key: bytes, output: bytes):
+		self.put_many([(key, output)])
+
+	def execute_many(self, calldatas: Iterable[Input],
+					 execute_batch: Callable[[List[bytes]], List[Result]]) -> List[Result]:
+		"""
+		Runs a batch through the cache. Hits are answered directly, the
+		misses are passed to `execute_batch`, with calls repeated within the
+		batch executed once, and their successful results are stored.
+		"""
+		calldatas = [read_input(_) for _ in calldatas]
+		results = [None] * len(calldatas)
+		pending = OrderedDict()		# key -> indices of the calls waiting for it
+		for i, calldata in enumerate(calldatas):
+			key = calldata_key(calldata)
+			if key in pending:
+				pending[key].append(i)
+				with self._lock:
+					self.hits += 1
+				continue
+			output = self.get(key)
+			if output is not None:
+				results[i] = output
+			else:
+				pending[key] = [i]
+		if pending:
+			outputs = execute_batch([calldatas[indices[0]] for indices in pending.values()])
+			fresh = list()
+			for (key, indices), output in zip(pending.items(), outputs):
+				for i in indices:
+					results[i] = output
+				if not isinstance(output, Exception):
+					fresh.append((key, output))
+			self.put_many(fresh)
+		return results
+
+	def clear(self):
+		with self._lock:
+			self._entries.clear()
+			if self.store is not None:
+				self.store.clear()
+
+	def close(self):
+		with self._lock:
+			if self.store is not None:
+				self.store.close()
+				self.store = None
+
+	def stats(self) -> Dict[str, int]:
+		with self._lock:
+			return dict(size=len(self._entries), maxsize=self.maxsize, hits=self.hits,
+						store_hits=self.store_hits, misses=self.misses, evictions=self.evictions)
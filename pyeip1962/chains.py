@@ -0,0 +1,125 @@
+"""
+Addition chains for fixed exponents
+
+Exponents such as the final exponent of a pairing whose GT field has no
+cyclotomic structure to exploit are fixed per curve and used many times.
+Rather than square-and-multiply, which costs one multiplication for every
+set bit, the exponent is compiled once into a sliding-window chain:
+
+ - a table of the odd powers x, x^3, x^5 ... x^(2^w - 1)
+ - a program of (squarings, odd digit) steps, read most significant first
+
+Windows of every width up to `MAX_WINDOW` are tried and the shortest chain
+kept, as the best width depends on the length and bit pattern of the
+exponent. Chains are cached by exponent, so each curve compiles its own
+exponents once, and can run on any type with multiplication and `one()`.
+Exponents which vary between calls, such as those of extension field
+powers, use `sliding_window_chain`, which picks the width from the length
+of the exponent instead.
+Prime field powers should use the builtin `pow`, which is faster in Python.
+"""
+
+from functools import lru_cache
+from typing import List, NamedTuple, Tuple
+
+
+MAX_WINDOW = 8
+
+
+class AdditionChain(NamedTuple):
+	exponent: int
+	max_digit: int						# largest odd power in the table
+	program: Tuple[Tuple[int, int], ...]	# (squarings, odd digit or 0)
+
+	@property
+	def squarings(self) -> int:
+		return sum(_ for _, d in self.program) + (1 if self.max_digit > 1 else 0)
+
+	@property
+	def multiplications(self) -> int:
+		# Table entries after x, then one per digit except the first
+		digits = sum(1 for _, d in self.program if d)
+		return (self.max_digit // 2) + max(0, digits - 1)
+
+	def __len__(self) -> int:
+		return self.squarings + self.multiplications
+
+	def execute(self, x):
+		"""Returns x ** exponent"""
+		if not self.program:
+			return type(x).one()
+		square = getattr(type(x), 'square', None) or (lambda v: v * v)
+		table = [x]
+		if self.max_digit > 1:
+			x2 = square(x)
+			for _ in range(self.max_digit // 2):
+				table.append(table[-1] * x2)
+		result = None
+		for squarings, d in self.program:
+			for _ in range(squarings):
+				result = square(result)
+			if d:
+				result = table[d // 2] if result is None else result * table[d // 2]
+		return result
+
+
+def _sliding_window(e: int, width: int) -> Tuple[int, List[Tuple[int, int]]]:
+	program = list()
+	squarings = max_digit = 0
+	i = e.bit_length() - 1
+	while i >= 0:
+		if not (e >> i) & 1:
+			squarings += 1
+			i -= 1
+			continue
+		# Longest window of at most `width` bits which ends in a set bit
+		low = max(i - width + 1, 0)
+		while not (e >> low) & 1:
+			low += 1
+		d = (e >> low) & ((1 << (i - low + 1)) - 1)
+		squarings += i - low + 1
+		# The first digit initialises the result, nothing to square yet
+		program.append((squarings if program else 0, d))
+		squarings = 0
+		max_digit = max(max_digit, d)
+		i = low - 1
+	if squarings:
+		program.append((squarings, 0))
+	return max_digit, program
+
+
+def window_width(bits: int) -> int:
+	"""Width minimising the expected cost of a random exponent, 2^(w-1) table entries plus bits/(w+1) digits"""
+	return min(range(1, MAX_WINDOW + 1), key=lambda w: (1 << (w - 1)) + bits / (w + 1))
+
+
+def sliding_window_chain(e: int, width: int = None) -> AdditionChain:
+	"""Chain for a single use, with the width picked from the length of the exponent"""
+	if e <= 0:
+		return addition_chain(e)
+	max_digit, program = _sliding_window(e, width or window_width(e.bit_length()))
+	return AdditionChain(e, max_digit, tuple(program))
+
+
+@lru_cache(maxsize=256)
+def addition_chain(e: int) -> AdditionChain:
+	"""Shortest sliding-window chain for a non-negative exponent"""
+	e = int(e)
+	if e < 0:
+		raise ValueError("Exponent must not be negative")
+	if e == 0:
+		return AdditionChain(0, 1, ())
+	best = None
+	for width in range(1, MAX_WINDOW + 1):
+		max_digit, program = _sliding_window(e, width)
+		chain = AdditionChain(e, max_digit, tuple(program))
+		if best is None or len(chain) < len(best):
+			best = chain
+		if (1 << width) > e:
+			break
+	return best
+
+
+def chain_pow(x, e: int):
+	"""x ** e with a cached addition chain for e"""
+	return addition_chain(e).execute(x)
@@ -0,0 +1,219 @@
+"""
+Generated arithmetic, specialised to the constants of a field or curve
+
+The generic classes loop over coefficient lists and the field modulus on
+every operation. Instead, Python source is emitted with the loops fully
+unrolled and the constants inlined, then compiled once into a module:
+
+ - Fq^k multiplication and squaring on tuples of integers. The product is
+   formed by Karatsuba's method on unreduced integers, folded by the
+   modulus of the extension using its non-zero coefficients only, so one
+   multiplication by the non-residue per coefficient for binomial moduli,
+   and reduced modulo q once per output coefficient.
+ - affine addition and doubling on E(Fq), with a4 inlined, or omitted when
+   it is zero, and inversions done by the builtin `pow`.
+
+Modules are cached by their source, so classes built from the same curve
+parameters, e.g. by repeated EIP-1962 calls, share one compiled module.
+The source of a module is in its `__source__` attribute, and registered
+with `linecache` so tracebacks show the generated line, for as long as the
+module is in use.
+"""
+
+import hashlib
+import linecache
+import threading
+import types
+import weakref
+from typing import Dict, List, Sequence, Tuple
+
+from .counters import register_points
+
+
+# Products of at least this many coefficients are split by Karatsuba's method,
+# below it the interpreter overhead of the extra additions outweighs the
+# multiplications saved
+KARATSUBA_THRESHOLD = 4
+
+# Modules in use, they are dropped with the last class using their functions,
+# e.g. when the curve contexts built on them are evicted from `ContextCache`
+_modules: Dict[bytes, types.ModuleType] = weakref.WeakValueDictionary()
+_lock = threading.Lock()
+
+
+def compile_module(name: str, source: str) -> types.ModuleType:
+	"""Compiles generated source into a module, or returns the module already compiled from it"""
+	digest = hashlib.sha256(source.encode()).digest()
+	with _lock:
+		module = _modules.get(digest)
+		if module is not None:
+			return module
+	filename = f'<pyeip1962.generated.{name}_{digest.hex()[:12]}>'
+	module = types.ModuleType(filename[1:-1])
+	module.__source__ = source
+	exec(compile(source, filename, 'exec'), module.__dict__)
+	for value in list(vars(module).values()):
+		if isinstance(value, types.FunctionType):
+			# Functions only reference the module's namespace, this keeps the module alive with them
+			value.__generated_module__ = module
+	with _lock:
+		existing = _modules.get(digest)
+		if existing is not None:
+			return existing
+		_modules[digest] = module
+		linecache.cache[filename] = (len(source), None, source.splitlines(True), filename)
+		weakref.finalize(module, linecache.cache.pop, filename, None)
+	return module
+
+
+def _signed(c: int, q: int) -> int:
+	# Representative of smallest magnitude, so small negative constants stay small
+	c %= q
+	return c - q if c > q // 2 else c
+
+
+def _scaled(c: int, expr: str) -> Tuple[str, str]:
+	# Operator and operand adding c * expr
+	op = '-' if c < 0 else '+'
+	return op, (expr if abs(c) == 1 else f'{abs(c)} * {expr}')
+
+
+def _fold(lines: List[str], q: int, modulus_coeffs: Sequence[int], top: int):
+	# Rewrites c_i for i >= k with w^k = -sum(m_j * w^j), highest first as folds may land above k
+	k = len(modulus_coeffs)
+	rules = [(j, _signed(-int(m), q)) for j, m in enumerate(modulus_coeffs) if int(m) % q]
+	for i in range(top, k - 1, -1):
+		for j, r in rules:
+			op, operand = _scaled(r, f'c{i}')
+			lines.append(f'\tc{i - k + j} {op}= {operand}')
+
+
+def _schoolbook(a: List[str], b: List[str]) -> List[str]:
+	n = len(a)
+	if b is None:
+		# Squaring, each cross product appears twice
+		result = list()
+		for i in range(2 * n - 1):
+			cross = [f'{a[j]} * {a[i - j]}' for j in range(max(0, i - n + 1), (i + 1) // 2)]
+			terms = list()
+			if cross:
+				terms.append(f'2 * ({" + ".join(cross)})' if len(cross) > 1 else f'2 * {cross[0]}')
+			if i % 2 == 0:
+				terms.append(f'{a[i // 2]} * {a[i // 2]}')
+			result.append(' + '.join(terms))
+		return result
+	return [' + '.join(f'{a[j]} * {b[i - j]}' for j in range(max(0, i - n + 1), min(i, n - 1) + 1))
+			for i in range(2 * n - 1)]
+
+
+def _karatsuba(a: List[str], b: List[str], lines: List[str], temps: List[int]) -> List[str]:
+	"""
+	Expressions for the coefficients of a*b, or of a^2 when b is None. Halves
+	of at least `KARATSUBA_THRESHOLD` coefficients are split again, with
+	intermediate products assigned to temporaries.
+	"""
+	n = len(a)
+	if n < KARATSUBA_THRESHOLD:
+		return _schoolbook(a, b)
+
+	def assign(expr: str) -> str:
+		temps[0] += 1
+		name = f't{temps[0]}'
+		lines.append(f'\t{name} = {expr}')
+		return name
+
+	def halves_sum(x: List[str]) -> List[str]:
+		return [assign(f'{x[i]} + {x[m + i]}') if i < m else x[m + i] for i in range(n - m)]
+
+	m = n // 2
+	low = [assign(_) for _ in _karatsuba(a[:m], b and b[:m], lines, temps)]
+	high = [assign(_) for _ in _karatsuba(a[m:], b and b[m:], lines, temps)]
+	# (a_lo + a_hi)(b_lo + b_hi) - lo - hi is the middle term
+	middle = _karatsuba(halves_sum(a), b and halves_sum(b), lines, temps)
+	result = [list() for _ in range(2 * n - 1)]
+	for i, expr in enumerate(low):
+		result[i].append(expr)
+	for i, expr in enumerate(high):
+		result[i + 2 * m].append(expr)
+	for i, expr in enumerate(middle):
+		parts = [f'({expr})']
+		if i < len(low):
+			parts.append(f'- {low[i]}')
+		if i < len(high):
+			parts.append(f'- {high[i]}')
+		result[i + m].append(' '.join(parts))
+	return [' + '.join(_) for _ in result]
+
+
+def fqk_source(q: int, modulus_coeffs: Sequence[int]) -> str:
+	"""Source of `mul(a, b)` and `square(a)` for Fq[w] / (w^k + sum(m_j * w^j))"""
+	k = len(modulus_coeffs)
+	a = [f'a{i}' for i in range(k)]
+	b = [f'b{i}' for i in range(k)]
+	result = ', '.join(f'c{i} % {q}' for i in range(k))
+	lines = [f'# Fq^{k}, q = {q}', f'# modulus w^{k} + {list(int(_) for _ in modulus_coeffs)}', '']
+	for name, args, rhs in (('mul', 'a, b', b), ('square', 'a', None)):
+		lines += [f'def {name}({args}):', f'\t{", ".join(a)}, = a']
+		if rhs is not None:
+			lines.append(f'\t{", ".join(b)}, = b')
+		for i, expr in enumerate(_karatsuba(a, rhs, lines, [0])):
+			lines.append(f'\tc{i} = {expr}')
+		_fold(lines, q, modulus_coeffs, 2 * k - 2)
+		lines += [f'\treturn ({result},)', '', '']
+	return '\n'.join(lines[:-1])
+
+
+def fqk_functions(q: int, modulus_coeffs: Sequence[int]) -> Tuple[types.FunctionType, types.FunctionType]:
+	module = compile_module(f'fq{len(modulus_coeffs)}', fqk_source(q, modulus_coeffs))
+	return module.mul, module.square
+
+
+def point_source(q: int, a4: int) -> str:
+	"""Source of affine `add(x1, y1, x2, y2)` and `double(x, y)` on y^2 = x^3 + a4*x + a6 over Fq"""
+	a4 = _signed(a4, q)
+	tangent = '3 * x * x' if a4 == 0 else '3 * x * x %s %s' % _scaled(a4, '1')
+	return '\n'.join([
+		f'# E(Fq), a4 = {a4}, q = {q}',
+		'',
+		'def double(x, y):',
+		'\tif not y:',
+		'\t\treturn None',
+		f'\tlam = ({tangent}) * pow(2 * y, -1, {q}) % {q}',
+		f'\tx3 = (lam * lam - 2 * x) % {q}',
+		f'\treturn x3, (lam * (x - x3) - y) % {q}',
+		'',
+		'',
+		'def add(x1, y1, x2, y2):',
+		'\tif x1 == x2:',
+		'\t\treturn double(x1, y1) if y1 == y2 else None',
+		f'\tlam = (y2 - y1) * pow(x2 - x1, -1, {q}) % {q}',
+		f'\tx3 = (lam * lam - x1 - x2) % {q}',
+		f'\treturn x3, (lam * (x1 - x3) - y1) % {q}',
+		''])
+
+
+def specialise_point(cls):
+	"""
+	Replaces `add` and `double` of a short Weierstrass point class over a
+	prime field with generated versions, other classes are returned as is
+	"""
+	field = cls.field()
+	if getattr(field, 'degree', 1) != 1 or cls.PARAM_A is None:
+		return cls
+	module = compile_module('point', point_source(field.field_modulus, int(cls.PARAM_A)))
+	_add, _double = module.add, module.double
+
+	def add(self, other):
+		if not other:
+			return self
+		result = _add(self.x.n, self.y.n, other.x.n, other.y.n)
+		return self.zero() if result is None else type(self)(*result)
+
+	def double(self):
+		result = _double(self.x.n, self.y.n)
+		return self.zero() if result is None else type(self)(*result)
+
+	cls.add = add
+	cls.double = double
+	# Counted as point operations like the generic methods they replace
+	return register_points(cls)
@@ -0,0 +1,278 @@
+"""
+Conformance runner for corpora of EIP-1962 test vectors
+
+	python -m pyeip1962.conformance vectors.jsonl vectors.bin --workers 8 --report report.json
+
+Corpus files are memory-mapped and read one record at a time. Records are
+executed in chunks, with a bounded number of chunks in flight on the worker
+pool, so memory use does not grow with the size of the corpus. Two formats
+are read:
+
+ - JSON lines: one object per line, with the calldata as hex in `input`
+   and the expected output in `expected`, or null if the call must fail.
+   The `Input`, `Expected` and `Name` keys of go-ethereum's precompile
+   tests are accepted too.
+ - binary framing: records of
+   length (4) | calldata | status (1) | length (4) | expected output,
+   big-endian. Status 0 expects success and 1 expects the call to fail.
+
+The report counts the vectors that pass, lists mismatches up to a limit,
+and keeps a latency histogram per operation.
+"""
+
+import argparse
+import json
+import mmap
+import struct
+import sys
+import time
+from collections import deque
+from contextlib import contextmanager
+from itertools import chain, islice
+from typing import Iterable, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+from .executor import execute_op
+from .parser import StreamParser
+from .profiling import Histogram
+from .structs import Operation
+
+
+STATUS_OK = 0
+STATUS_ERROR = 1
+
+_LENGTH = struct.Struct('>I')
+_STATUS = struct.Struct('>BI')
+
+
+class Vector(NamedTuple):
+	source: str
+	index: int
+	name: Optional[str]
+	calldata: bytes
+	expected: Optional[bytes]		# None when the call must fail
+
+
+# Operation name, output, error and seconds taken by one call
+CallResult = Tuple[str, Optional[bytes], Optional[str], float]
+
+
+@contextmanager
+def _mapped(path: str):
+	with open(path, 'rb') as handle:
+		try:
+			data = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+		except ValueError:
+			# Empty files cannot be mapped
+			yield b''
+			return
+		try:
+			yield data
+		finally:
+			data.close()
+
+
+def _from_hex(value: str) -> bytes:
+	return bytes.fromhex(value[2:] if value.startswith('0x') else value)
+
+
+def read_jsonl(path: str) -> Iterator[Vector]:
+	with _mapped(path) as data:
+		offset = index = 0
+		while offset < len(data):
+			end = data.find(b'\n', offset)
+			if end == -1:
+				end = len(data)
+			line = data[offset:end].strip()
+			offset = end + 1
+			if not line:
+				continue
+			record = json.loads(line)
+			calldata = record.get('input', record.get('Input'))
+			if calldata is None:
+				raise ValueError(f"Record {index} of {path} has no input")
+			expected = record.get('expected', record.get('Expected'))
+			yield Vector(path, index, record.get('name', record.get('Name')), _from_hex(calldata),
+						 None if expected is None else _from_hex(expected))
+			index += 1
+
+
+def read_binary(path: str) -> Iterator[Vector]:
+	with _mapped(path) as data:
+		offset = index = 0
+		while offset < len(data):
+			if offset + _LENGTH.size > len(data):
+				raise ValueError(f"Record {index} of {path} is truncated")
+			length, = _LENGTH.unpack_from(data, offset)
+			offset += _LENGTH.size
+			calldata = data[offset:offset+length]
+			offset += length
+			if offset + _STATUS.size > len(data):
+				raise ValueError(f"Record {index} of {path} is truncated")
+			status, length = _STATUS.unpack_from(data, offset)
+			offset += _STATUS.size
+			expected = data[offset:offset+length]
+			offset += length
+			if len(expected) != length:
+				raise ValueError(f"Record {index} of {path} is truncated")
+			if status not in (STATUS_OK, STATUS_ERROR):
+				raise ValueError(f"Record {index} of {path} has unknown status {status}")
+			yield Vector(path, index, None, calldata, expected if status == STATUS_OK else None)
+			index += 1
+
+
+def encode_binary(calldata: bytes, expected: Optional[bytes]) -> bytes:
+	"""One record in the binary framing, `expected` is None for calls which must fail"""
+	status = STATUS_OK if expected is not None else STATUS_ERROR
+	expected = expected or b''
+	return _LENGTH.pack(len(calldata)) + calldata + _STATUS.pack(status, len(expected)) + expected
+
+
+def read_corpus(path: str, fmt: str = None) -> Iterator[Vector]:
+	"""Reads JSON lines from `.jsonl` and `.json` files, other files as binary framing"""
+	if fmt is None:
+		fmt = 'jsonl' if path.endswith(('.jsonl', '.json')) else 'binary'
+	if fmt == 'jsonl':
+		return read_jsonl(path)
+	elif fmt == 'binary':
+		return read_binary(path)
+	raise ValueError(f"Unknown corpus format {fmt}")
+
+
+def _op_name(calldata: bytes) -> str:
+	try:
+		return Operation(calldata[0]).name
+	except (IndexError, ValueError):
+		return 'INVALID'
+
+
+def run_calls(calldatas: Sequence[bytes]) -> List[CallResult]:
+	"""Executes each call on its own, so it can be timed"""
+	results = list()
+	for calldata in calldatas:
+		name = _op_name(calldata)
+		output = error = None
+		start = time.perf_counter()
+		try:
+			output = execute_op(StreamParser(calldata).parse())
+		except Exception as ex:
+			# Crashes are reported as mismatches rather than ending the run
+			error = f'{type(ex).__name__}: {ex}'
+		results.append((name, output, error, time.perf_counter() - start))
+	return results
+
+
+class ConformanceReport(object):
+	def __init__(self, max_mismatches: int = 100):
+		self.max_mismatches = max_mismatches
+		self.total = 0
+		self.passed = 0
+		self.mismatch_count = 0
+		self.mismatches = list()
+		self.timings = dict()
+
+	@property
+	def ok(self) -> bool:
+		return self.mismatch_count == 0
+
+	def record(self, vector: Vector, name: str, output: Optional[bytes], error: Optional[str], seconds: float):
+		self.total += 1
+		histogram = self.timings.get(name)
+		if histogram is None:
+			histogram = self.timings[name] = Histogram()
+		histogram.record(seconds)
+		if vector.expected is None:
+			passed = error is not None
+		else:
+			passed = error is None and output == vector.expected
+		if passed:
+			self.passed += 1
+			return
+		self.mismatch_count += 1
+		if len(self.mismatches) < self.max_mismatches:
+			self.mismatches.append(dict(
+				source=vector.source, index=vector.index, name=vector.name, operation=name,
+				expected=None if vector.expected is None else vector.expected.hex(),
+				output=None if output is None else output.hex(), error=error))
+
+	def as_dict(self) -> dict:
+		return dict(
+			total=self.total,
+			passed=self.passed,
+			mismatch_count=self.mismatch_count,
+			mismatches=self.mismatches,
+			timings={name: h.as_dict() for name, h in sorted(self.timings.items())})
+
+	def to_json(self, **kwa) -> str:
+		return json.dumps(self.as_dict(), **kwa)
+
+
+def _chunks(vectors: Iterable[Vector], size: int) -> Iterator[List[Vector]]:
+	vectors = iter(vectors)
+	while True:
+		chunk = list(islice(vectors, size))
+		if not chunk:
+			return
+		yield chunk
+
+
+def _execute_chunks(chunks: Iterable[List[Vector]], pool=None,
+					max_pending: int = 1) -> Iterator[Tuple[List[Vector], List[CallResult]]]:
+	if pool is None:
+		for chunk in chunks:
+			yield chunk, run_calls([_.calldata for _ in chunk])
+		return
+	pending = deque()
+	for chunk in chunks:
+		pending.append((chunk, pool.submit(run_calls, [_.calldata for _ in chunk])))
+		if len(pending) >= max_pending:
+			chunk, future = pending.popleft()
+			yield chunk, future.result()
+	while pending:
+		chunk, future = pending.popleft()
+		yield chunk, future.result()
+
+
+def run_corpus(paths: Sequence[str], workers: int = 0, chunk_size: int = 64, max_mismatches: int = 100,
+			   fmt: str = None) -> ConformanceReport:
+	"""
+	Runs every vector of the corpus files, in process when `workers` is zero,
+	otherwise on a `pool.ParallelExecutor` with at most two chunks in flight
+	per worker.
+	"""
+	report = ConformanceReport(max_mismatches)
+	vectors = chain.from_iterable(read_corpus(path, fmt) for path in paths)
+	pool = None
+	if workers:
+		from .pool import ParallelExecutor
+		pool = ParallelExecutor(max_workers=workers)
+	try:
+		for chunk, results in _execute_chunks(_chunks(vectors, chunk_size), pool, workers * 2):
+			for vector, result in zip(chunk, results):
+				report.record(vector, *result)
+	finally:
+		if pool is not None:
+			pool.shutdown()
+	return report
+
+
+def main(args: Sequence[str] = None) -> int:
+	parser = argparse.ArgumentParser(description='Run EIP-1962 test vector corpora')
+	parser.add_argument('corpus', nargs='+', help='JSON lines (.jsonl) or binary framed corpus files')
+	parser.add_argument('--format', choices=('jsonl', 'binary'), help='Format of all corpus files')
+	parser.add_argument('--workers', type=int, default=0, help='Worker processes, zero runs in process')
+	parser.add_argument('--chunk-size', type=int, default=64)
+	parser.add_argument('--max-mismatches', type=int, default=100, help='Mismatches listed in the report')
+	parser.add_argument('--report', metavar='PATH', help='Write the report to a file instead of stdout')
+	opts = parser.parse_args(args)
+	report = run_corpus(opts.corpus, opts.workers, opts.chunk_size, opts.max_mismatches, opts.format)
+	if opts.report:
+		with open(opts.report, 'w') as handle:
+			handle.write(report.to_json(indent=1))
+	else:
+		print(report.to_json(indent=1))
+	print(f'{report.passed}/{report.total} passed, {report.mismatch_count} mismatches', file=sys.stderr)
+	return 0 if report.ok else 1
+
+
+if __name__ == "__main__":
+	sys.exit(main())
@@ -0,0 +1,241 @@
+"""
+Versioned on-disk cache of derived curve constants and precomputed tables
+
+Each curve keeps its constants, such as twist factors and fixed-base
+generator tables, in one binary file which is memory-mapped and verified
+against its checksum on first use, then decoded entry by entry as they are
+needed. Missing, stale or corrupt files are regenerated. The file name
+includes a digest of the curve parameters, so changing a curve definition
+never reads constants derived from the old one.
+
+Layout, integers big-endian:
+
+	magic (8) | version (4) | sha256 of the body (32) | body
+	body:  entry count (4) | entries
+	entry: name length (2) | name | int width (2) | count (4) | count * width bytes
+
+The directory is `$PYEIP1962_CACHE_DIR`, or `pyeip1962` in the user's
+cache directory. If it cannot be written the constants are kept in memory.
+"""
+
+import hashlib
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import weakref
+from typing import Any, Callable, Dict, List, Sequence
+
+
+MAGIC = b'PYEIP\x00CC'
+FORMAT_VERSION = 1
+
+_HEADER = struct.Struct('>8sI32s')
+_COUNT = struct.Struct('>I')
+
+# Every CurveConstants, so they can be loaded before worker processes start
+_instances = weakref.WeakSet()
+
+
+class ConstantCacheError(ValueError):
+	pass
+
+
+def default_cache_dir() -> str:
+	path = os.environ.get('PYEIP1962_CACHE_DIR')
+	if path:
+		return path
+	base = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+	return os.path.join(base, 'pyeip1962')
+
+
+def encode_constants(entries: Dict[str, Sequence[int]]) -> bytes:
+	body = [_COUNT.pack(len(entries))]
+	for name, values in sorted(entries.items()):
+		values = [int(_) for _ in values]
+		if any(_ < 0 for _ in values):
+			raise ValueError(f"Constants must be non-negative, in {name}")
+		width = max([1] + [(_.bit_length() + 7) // 8 for _ in values])
+		encoded_name = name.encode()
+		body.append(struct.pack('>H', len(encoded_name)) + encoded_name)
+		body.append(struct.pack('>HI', width, len(values)))
+		body.append(b''.join(_.to_bytes(width, 'big') for _ in values))
+	body = b''.join(body)
+	return _HEADER.pack(MAGIC, FORMAT_VERSION, hashlib.sha256(body).digest()) + body
+
+
+class ConstantStore(object):
+	"""
+	Read-only view of encoded constants in any buffer, such as a memory
+	mapped file, the checksum is verified once when it is opened
+	"""
+
+	def __init__(self, buffer):
+		self.buffer = memoryview(buffer).cast('B')
+		if len(self.buffer) < _HEADER.size + _COUNT.size:
+			raise ConstantCacheError("Constant file is truncated")
+		magic, version, checksum = _HEADER.unpack_from(self.buffer)
+		if magic != MAGIC:
+			raise ConstantCacheError("Not a constant file")
+		if version != FORMAT_VERSION:
+			raise ConstantCacheError(f"Constant file version {version}, expected {FORMAT_VERSION}")
+		if hashlib.sha256(self.buffer[_HEADER.size:]).digest() != checksum:
+			raise ConstantCacheError("Constant file checksum mismatch")
+		self.index = self._read_index()
+
+	def _read_index(self) -> Dict[str, tuple]:
+		index = dict()
+		offset = _HEADER.size
+		count, = _COUNT.unpack_from(self.buffer, offset)
+		offset += _COUNT.size
+		for _ in range(count):
+			name_length, = struct.unpack_from('>H', self.buffer, offset)
+			offset += 2
+			name = bytes(self.buffer[offset:offset+name_length]).decode()
+			offset += name_length
+			width, n = struct.unpack_from('>HI', self.buffer, offset)
+			offset += 6
+			if offset + (width * n) > len(self.buffer):
+				raise ConstantCacheError(f"Constant {name} is truncated")
+			index[name] = (offset, width, n)
+			offset += width * n
+		return index
+
+	@classmethod
+	def open(cls, path: str) -> 'ConstantStore':
+		with open(path, 'rb') as handle:
+			return cls(mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ))
+
+	def __contains__(self, name: str) -> bool:
+		return name in self.index
+
+	def names(self) -> List[str]:
+		return sorted(self.index)
+
+	def get(self, name: str) -> List[int]:
+		offset, width, n = self.index[name]
+		data = self.buffer
+		return [int.from_bytes(data[i:i+width], 'big') for i in range(offset, offset + (width * n), width)]
+
+
+def _write_atomic(path: str, data: bytes):
+	directory = os.path.dirname(path)
+	os.makedirs(directory, exist_ok=True)
+	fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.tmp-')
+	try:
+		with os.fdopen(fd, 'wb') as handle:
+			handle.write(data)
+		os.replace(tmp_path, path)
+	except BaseException:
+		os.unlink(tmp_path)
+		raise
+
+
+def params_digest(params: Sequence[Any], length: int = 16) -> str:
+	"""Hex digest of the parameters, 64 bits suit file names, keys an attacker may choose need all 256"""
+	return hashlib.sha256(repr(list(params)).encode()).hexdigest()[:length]
+
+
+class CurveConstants(object):
+	"""
+	Lazily loaded constants of one curve
+
+	`compute` returns the constants as a dict of integer lists, it is only
+	called when no valid file exists. Decoded values are memoized by name.
+	"""
+
+	def __init__(self, name: str, params: Sequence[Any], compute: Callable[[], Dict[str, Sequence[int]]],
+				 cache_dir: str = None):
+		self.name = name
+		self.params = params
+		self.compute = compute
+		self.cache_dir = cache_dir
+		self._store = None
+		self._decoded = dict()
+		self._lock = threading.RLock()
+		_instances.add(self)
+
+	@property
+	def path(self) -> str:
+		filename = f'{self.name}-{params_digest(self.params)}.v{FORMAT_VERSION}.bin'
+		return os.path.join(self.cache_dir or default_cache_dir(), filename)
+
+	def store(self, write: bool = True) -> ConstantStore:
+		with self._lock:
+			if self._store is None:
+				self._store = self._load(write)
+			return self._store
+
+	def _load(self, write: bool = True) -> ConstantStore:
+		try:
+			return ConstantStore.open(self.path)
+		except (OSError, ValueError):
+			return self._rebuild(write)
+
+	def _rebuild(self, write: bool = True) -> ConstantStore:
+		data = encode_constants(self.compute())
+		if write:
+			try:
+				_write_atomic(self.path, data)
+			except OSError:
+				# Read-only or unavailable cache directory, keep them in memory
+				pass
+		return ConstantStore(data)
+
+	def regenerate(self):
+		"""Discards the loaded constants and any file, so they are computed again"""
+		with self._lock:
+			try:
+				os.unlink(self.path)
+			except OSError:
+				pass
+			self._store = None
+			self._decoded.clear()
+
+	def get(self, name: str, decode: Callable[[List[int]], Any] = None) -> Any:
+		value = self._decoded.get(name)
+		if value is None:
+			with self._lock:
+				value = self._decoded.get(name)
+				if value is None:
+					store = self.store()
+					if name not in store:
+						# Written by a version of the curve module with fewer constants
+						store = self._store = self._rebuild()
+					value = store.get(name)
+					if decode is not None:
+						value = decode(value)
+					self._decoded[name] = value
+		return value
+
+
+def load_all():
+	"""
+	Loads the constants of every curve module imported so far, mapping
+	existing files and computing the others in memory without writing them.
+	Run before forking worker processes, so they inherit the constants
+	rather than each computing them.
+	"""
+	for constants in list(_instances):
+		constants.store(write=False)
+
+
+def point_to_ints(point) -> List[int]:
+	return [int(c) for coord in point for c in (coord.coeffs if hasattr(coord, 'coeffs') else [coord])]
+
+
+def points_to_ints(points: Sequence) -> List[int]:
+	return [_ for point in points for _ in point_to_ints(point)]
+
+
+def ints_to_points(point_class, values: Sequence[int]) -> list:
+	degree = getattr(point_class.field(), 'degree', 1)
+	points = list()
+	for i in range(0, len(values), 2 * degree):
+		if degree == 1:
+			x, y = values[i], values[i+1]
+		else:
+			x, y = list(values[i:i+degree]), list(values[i+degree:i+2*degree])
+		points.append(point_class(x, y))
+	return points
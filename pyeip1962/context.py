@@ -0,0 +1,349 @@
+"""
+Constructed field and curve classes for the curves described inline by EIP-1962 calls
+
+Every call carries its own curve definition, but real traffic only uses a
+handful of curves. Building the field classes (`make_Fq`, `make_Fqk`),
+checking non-residues and validating curve parameters is done once per
+curve and the result kept in a bounded LRU cache.
+"""
+
+import threading
+from collections import OrderedDict
+from typing import NamedTuple, Optional, Callable, Any, Sequence, Dict
+
+from .codegen import specialise_point
+from .field import make_Fq, make_Fqk
+from .group import AbstractGroup, AbstractPointG1, AbstractPointG2
+from .sw import ShortWeierstrassPoint
+from .pairing import ate_miller_loop, final_exponentiation
+from .mnt import MNTPairing
+from .parser import is_non_nth_root
+from .structs import G1Prefix, G2Prefix, MNTPairingOp, AnyPairingOp, PAIRING_OPS, CurveFamily, TwistType
+from .profiling import profiled
+
+
+class CurveContext(NamedTuple):
+	key: tuple
+	Fq: type
+	Fqk: Optional[type]
+	G1: Optional[type]
+	G2: Optional[type]
+	GT: Optional[type]
+	group: type
+	tables: Dict[str, Any]
+
+
+def make_group(order: int, G1: Callable = None, G2: Callable = None, GT: Callable = None,
+			   miller_loop: Callable = None, final_exp: Callable = None):
+	class Group(AbstractGroup):
+		@classmethod
+		def order(cls):
+			return order
+
+		@classmethod
+		def G1(cls):
+			return G1()
+
+		@classmethod
+		def G2(cls):
+			return G2()
+
+		@classmethod
+		def GT(cls):
+			return GT()
+
+		@classmethod
+		def miller_loop(cls, a, b):
+			return miller_loop(a, b)
+
+		@classmethod
+		def final_exponentiation(cls, f):
+			if final_exp is not None:
+				return final_exp(f)
+			return final_exponentiation(f, cls)
+
+	return Group
+
+
+def make_sw_point(field_class: type, A, B, group: Callable, base: type = None):
+	bases = (base, ShortWeierstrassPoint) if base else (ShortWeierstrassPoint,)
+
+	class Point(*bases):
+		PARAM_A = field_class(A)
+		PARAM_B = field_class(B)
+
+		@classmethod
+		def field(cls):
+			return field_class
+
+		@classmethod
+		def group(cls):
+			return group()
+
+	return specialise_point(Point)
+
+
+def _check_curve(field_modulus: int, order: int):
+	if field_modulus < 3 or field_modulus % 2 == 0:
+		raise ValueError("Field modulus must be an odd prime")
+	if order == 0:
+		raise ValueError("Group order is zero")
+
+
+def _check_coeffs(field_modulus: int, coeffs: Sequence[int]):
+	if any(_ >= field_modulus for _ in coeffs):
+		raise ValueError("Curve coefficient is not reduced modulo field modulus")
+
+
+def _binomial_modulus(field_modulus: int, degree: int, non_residue: int):
+	# x^degree - non_residue, without the leading coefficient
+	return [(-non_residue) % field_modulus] + [0] * (degree - 1)
+
+
+def g1_key(prefix: G1Prefix) -> tuple:
+	return ('G1', prefix.field_modulus, prefix.A, prefix.B, prefix.order)
+
+
+def g2_key(prefix: G2Prefix) -> tuple:
+	return ('G2', prefix.field_modulus, tuple(prefix.A), tuple(prefix.B), prefix.order,
+			prefix.extension_degree, prefix.fp_non_residue)
+
+
+def pairing_key(op: AnyPairingOp) -> tuple:
+	if isinstance(op, MNTPairingOp):
+		return ('PAIRING', op.curve_type, op.field_modulus, op.A, op.B, op.order, op.extension_degree,
+				op.non_residue, op.x, op.sign, op.exp_w0, op.exp_w1, op.exp_w0_sign)
+	return ('PAIRING', op.curve_type, op.field_modulus, op.A, op.B, op.order, 2,
+			(op.fp2_non_residue, tuple(op.fp6_non_residue)), op.twist_type, op.x, op.sign)
+
+
+def op_key(op) -> tuple:
+	"""Cache key of the context for a parsed operation, without building it"""
+	if isinstance(op, PAIRING_OPS):
+		return pairing_key(op)
+	elif isinstance(op.prefix, G1Prefix):
+		return g1_key(op.prefix)
+	return g2_key(op.prefix)
+
+
+@profiled('context.build_g1')
+def build_g1_context(prefix: G1Prefix) -> CurveContext:
+	p = prefix.field_modulus
+	_check_curve(p, prefix.order)
+	_check_coeffs(p, [prefix.A, prefix.B])
+	if (4 * pow(prefix.A, 3, p) + 27 * pow(prefix.B, 2, p)) % p == 0:
+		raise ValueError("Curve is singular")
+	Fq = make_Fq(p)
+	group = make_group(prefix.order, G1=lambda: G1)
+	G1 = make_sw_point(Fq, prefix.A, prefix.B, lambda: group, AbstractPointG1)
+	return CurveContext(g1_key(prefix), Fq, None, G1, None, None, group, {})
+
+
+@profiled('context.build_g2')
+def build_g2_context(prefix: G2Prefix) -> CurveContext:
+	p = prefix.field_modulus
+	k = prefix.extension_degree
+	_check_curve(p, prefix.order)
+	if k not in (2, 3):
+		raise ValueError(f"Extension degree {k} is not supported for G2 operations")
+	if len(prefix.A) != k or len(prefix.B) != k:
+		raise ValueError("Curve coefficients must be extension field elements")
+	_check_coeffs(p, list(prefix.A) + list(prefix.B) + [prefix.fp_non_residue])
+	if not is_non_nth_root(prefix.fp_non_residue, p, k):
+		raise ValueError(f"Non-residue for Fp{k} is actually a residue")
+	Fq = make_Fq(p)
+	Fqk = make_Fqk(p, _binomial_modulus(p, k, prefix.fp_non_residue))
+	A, B = Fqk(prefix.A), Fqk(prefix.B)
+	if 4 * A**3 + 27 * B**2 == Fqk.zero():
+		raise ValueError("Curve is singular")
+	group = make_group(prefix.order, G2=lambda: G2)
+	G2 = make_sw_point(Fqk, A, B, lambda: group, AbstractPointG2)
+	return CurveContext(g2_key(prefix), Fq, Fqk, None, G2, None, group, {})
+
+
+@profiled('context.build_pairing')
+def build_pairing_context(op: AnyPairingOp) -> CurveContext:
+	"""
+	BLS12 and BN curves, with the sextic twist E'(Fq2) mapped into E(Fq12)
+
+	Fq12 is represented directly over Fq as Fq[w]/(w^12 - 2a*w^6 + a^2 - b^2*beta)
+	where u^2 = beta is the Fq2 non-residue and w^6 = a + b*u the Fq6 non-residue.
+	"""
+	if isinstance(op, MNTPairingOp):
+		return build_mnt_context(op)
+	if op.curve_type not in (CurveFamily.BLS12, CurveFamily.BN):
+		raise ValueError(f"Pairing for {op.curve_type.name} curves is not supported")
+	p = op.field_modulus
+	_check_curve(p, op.order)
+	_check_coeffs(p, [op.A, op.B, op.fp2_non_residue] + list(op.fp6_non_residue))
+	beta = op.fp2_non_residue
+	a, b = op.fp6_non_residue
+	if b == 0:
+		raise ValueError("Fp6 non-residue must not lie in the base field")
+	# The final exponentiation splits q^12 - 1 = (q^6 - 1)(q^6 + 1), the order must divide the second factor
+	if (p ** 6 + 1) % op.order != 0:
+		raise ValueError("Group order does not divide p^6 + 1")
+
+	Fq = make_Fq(p)
+	Fq2 = make_Fqk(p, _binomial_modulus(p, 2, beta))
+	xi = Fq2([a, b])
+	# w^6 - xi is irreducible over Fq2 only if xi is neither a square nor a cube
+	if xi.is_nth_power(2):
+		raise ValueError("Non-residue for Fp12 is actually a residue")
+	if xi.is_nth_power(3):
+		raise ValueError("Non-residue for Fp6 is actually a residue")
+	fq12_modulus = [0] * 12
+	fq12_modulus[0] = (a*a - b*b*beta) % p
+	fq12_modulus[6] = (-2*a) % p
+	Fq12 = make_Fqk(p, fq12_modulus)
+
+	# Embedding of u into Fq12, u = (w^6 - a) / b
+	b_inv = pow(b, p - 2, p)
+	w = Fq12([0, 1] + [0] * 10)
+	if op.twist_type == TwistType.M:
+		B_twist = Fq2([op.B, 0]) * xi
+		twist_x, twist_y = w**2, w**3
+		twist_x, twist_y = twist_x.inv(), twist_y.inv()
+	else:
+		B_twist = Fq2([op.B, 0]) / xi
+		twist_x, twist_y = w**2, w**3
+
+	if op.curve_type == CurveFamily.BLS12:
+		# Ate pairing with T = t - 1 = x
+		ate_loop_count = op.x
+	else:
+		# Ate pairing with T = t - 1 = 6u^2
+		ate_loop_count = 6 * op.x * op.x
+	if ate_loop_count < 2:
+		raise ValueError("Loop parameter is too small")
+
+	def fq2_to_fq12(e):
+		c0, c1 = [int(_) for _ in e.coeffs]
+		coeffs = [0] * 12
+		coeffs[0] = (c0 - c1 * a * b_inv) % p
+		coeffs[6] = (c1 * b_inv) % p
+		return Fq12(coeffs)
+
+	def miller_loop(P, Q):
+		P12 = GT(Fq12([P.x] + [0] * 11), Fq12([P.y] + [0] * 11))
+		Q12 = GT(fq2_to_fq12(Q.x) * twist_x, fq2_to_fq12(Q.y) * twist_y)
+		return ate_miller_loop(Q12, P12, ate_loop_count, Fq12)
+
+	final_exponent = (p**12 - 1) // op.order
+	group = make_group(op.order, G1=lambda: G1, G2=lambda: G2, GT=lambda: GT,
+					   miller_loop=miller_loop)
+	G1 = make_sw_point(Fq, op.A, op.B, lambda: group, AbstractPointG1)
+	G2 = make_sw_point(Fq2, Fq2.zero(), B_twist, lambda: group, AbstractPointG2)
+	GT = make_sw_point(Fq12, Fq12.zero(), Fq12([op.B] + [0] * 11), lambda: group)
+	tables = dict(
+		ate_loop_count=ate_loop_count,
+		final_exponent=final_exponent,
+		twist_x=twist_x,
+		twist_y=twist_y,
+		fq2_to_fq12=fq2_to_fq12)
+	return CurveContext(pairing_key(op), Fq, Fq2, G1, G2, GT, group, tables)
+
+
+def build_mnt_context(op: MNTPairingOp) -> CurveContext:
+	"""
+	MNT4 and MNT6 curves, with the quadratic twist E'(Fq^(k/2)) mapped into
+	E(Fq^k), for k = 4 and 6 respectively. Both fields are binomial over Fq,
+	Fq[u]/(u^(k/2) - n) and Fq[w]/(w^k - n) with u = w^2, see `mnt`.
+	"""
+	if op.curve_type not in (CurveFamily.MNT4, CurveFamily.MNT6):
+		raise ValueError(f"{op.curve_type.name} is not an MNT curve")
+	p = op.field_modulus
+	h = op.extension_degree
+	k = 2 * h
+	_check_curve(p, op.order)
+	_check_coeffs(p, [op.A, op.B, op.non_residue])
+	if (4 * pow(op.A, 3, p) + 27 * pow(op.B, 2, p)) % p == 0:
+		raise ValueError("Curve is singular")
+	n = op.non_residue
+	if not is_non_nth_root(n, p, 2) or not is_non_nth_root(n, p, h):
+		raise ValueError(f"Non-residue for Fp{k} is actually a residue")
+
+	Fq = make_Fq(p)
+	Fqh = make_Fqk(p, _binomial_modulus(p, h, n))
+	Fqk = make_Fqk(p, _binomial_modulus(p, k, n))
+	u = Fqh([0, 1] + [0] * (h - 2))
+	w0 = -op.exp_w0 if op.exp_w0_sign else op.exp_w0
+	engine = MNTPairing(Fqh, Fqk, n, op.order, op.x, bool(op.sign), w0, op.exp_w1)
+
+	w = Fqk([0, 1] + [0] * (k - 2))
+	twist_x, twist_y = (w**2).inv(), (w**3).inv()
+
+	group = make_group(op.order, G1=lambda: G1, G2=lambda: G2, GT=lambda: GT,
+					   miller_loop=engine.miller_loop,
+					   final_exp=lambda f: engine.final_exponentiation(f).value)
+	G1 = make_sw_point(Fq, op.A, op.B, lambda: group, AbstractPointG1)
+	G2 = make_sw_point(Fqh, u**2 * op.A, u**3 * op.B, lambda: group, AbstractPointG2)
+	GT = make_sw_point(Fqk, Fqk([op.A] + [0] * (k - 1)), Fqk([op.B] + [0] * (k - 1)), lambda: group)
+	tables = dict(
+		ate_loop_count=op.x,
+		pairing=engine,
+		twist_x=twist_x,
+		twist_y=twist_y)
+	return CurveContext(pairing_key(op), Fq, Fqh, G1, G2, GT, group, tables)
+
+
+class ContextCache(object):
+	"""Bounded, thread-safe LRU cache of `CurveContext` instances"""
+
+	def __init__(self, maxsize: int = 64):
+		if maxsize < 1:
+			raise ValueError("Cache size must be positive")
+		self.maxsize = maxsize
+		self.hits = 0
+		self.misses = 0
+		self.evictions = 0
+		self._entries = OrderedDict()
+		self._lock = threading.Lock()
+
+	def __len__(self):
+		return len(self._entries)
+
+	def get(self, key: tuple, builder: Callable[[], CurveContext]) -> CurveContext:
+		with self._lock:
+			ctx = self._entries.get(key)
+			if ctx is not None:
+				self._entries.move_to_end(key)
+				self.hits += 1
+				return ctx
+			self.misses += 1
+		# Build outside of the lock, a concurrent build of the same curve is
+		# wasted work but harmless, the first one inserted wins.
+		ctx = builder()
+		with self._lock:
+			existing = self._entries.get(key)
+			if existing is not None:
+				return existing
+			self._entries[key] = ctx
+			while len(self._entries) > self.maxsize:
+				self._entries.popitem(last=False)
+				self.evictions += 1
+		return ctx
+
+	def clear(self):
+		with self._lock:
+			self._entries.clear()
+
+	def stats(self) -> Dict[str, int]:
+		with self._lock:
+			return dict(size=len(self._entries), maxsize=self.maxsize, hits=self.hits,
+						misses=self.misses, evictions=self.evictions)
+
+
+CONTEXT_CACHE = ContextCache()
+
+
+def g1_context(prefix: G1Prefix, cache: ContextCache = CONTEXT_CACHE) -> CurveContext:
+	return cache.get(g1_key(prefix), lambda: build_g1_context(prefix))
+
+
+def g2_context(prefix: G2Prefix, cache: ContextCache = CONTEXT_CACHE) -> CurveContext:
+	return cache.get(g2_key(prefix), lambda: build_g2_context(prefix))
+
+
+def pairing_context(op: AnyPairingOp, cache: ContextCache = CONTEXT_CACHE) -> CurveContext:
+	return cache.get(pairing_key(op), lambda: build_pairing_context(op))
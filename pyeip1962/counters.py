@@ -0,0 +1,229 @@
+"""
+Field and group operation counters, for cost accounting
+
+    with count_ops() as c:
+        BLS12_381.pairing(a, b)
+    c.totals    # {'Fq12.mul': ..., 'Fq12.sqr': ..., 'E(Fq).double': ...}
+
+Classes built by `make_Fq`, `make_Fqk` and `ShortWeierstrassPoint` register
+themselves here. Their methods are only wrapped with counting versions
+while at least one `count_ops()` block is active, so there is no cost when
+counting is disabled. Counts go to the counter of the current context
+(thread or asyncio task), and can be broken down with `label_ops`, which
+the executor uses to label each call with its operation and curve.
+
+Extension field operations are counted as a whole, e.g. one `Fq12.mul`,
+rather than as the base field operations they are built from.
+"""
+
+import contextvars
+import json
+import threading
+import weakref
+from collections import defaultdict
+from contextlib import contextmanager, nullcontext
+from typing import Dict, Tuple
+
+
+_current = contextvars.ContextVar('pyeip1962_op_counter', default=None)
+_label = contextvars.ContextVar('pyeip1962_op_label', default=('', ''))
+
+_lock = threading.Lock()
+_active = 0
+_fields = weakref.WeakSet()
+_points = weakref.WeakSet()
+# (class, attribute name) -> original attribute in the class __dict__, or None
+_patched = dict()
+
+FIELD_METHODS = ('__add__', '__radd__', '__sub__', '__rsub__', '__neg__',
+                 '__mul__', '__rmul__', '__truediv__', '__rtruediv__', '__pow__', 'inv')
+POINT_METHODS = ('add', 'double', 'mul')
+
+
+class OpCounter(object):
+    def __init__(self):
+        self.counts = defaultdict(lambda: defaultdict(int))
+        self._in_pow = False
+
+    def add(self, name: str, n: int = 1):
+        self.counts[_label.get()][name] += n
+
+    @property
+    def totals(self) -> Dict[str, int]:
+        result = defaultdict(int)
+        for counts in self.counts.values():
+            for name, n in counts.items():
+                result[name] += n
+        return dict(sorted(result.items()))
+
+    def by_label(self) -> Dict[Tuple[str, str], Dict[str, int]]:
+        return {label: dict(sorted(counts.items())) for label, counts in self.counts.items()}
+
+    def as_dict(self) -> dict:
+        return dict(
+            totals=self.totals,
+            by_label=[dict(operation=operation, curve=curve, counts=counts)
+                      for (operation, curve), counts in sorted(self.by_label().items())])
+
+    def to_json(self, **kwa) -> str:
+        return json.dumps(self.as_dict(), **kwa)
+
+
+def _field_name(cls) -> str:
+    degree = getattr(cls, 'degree', 1)
+    return 'Fq' if degree == 1 else f'Fq{degree}'
+
+
+def _field_wrapper(cls, attr: str, impl):
+    name = _field_name(cls)
+    is_prime_field = name == 'Fq'
+
+    if attr in ('__mul__', '__rmul__'):
+        def wrapper(self, other):
+            counter = _current.get()
+            if counter is not None:
+                if other is self:
+                    counter.add(name + '.sqr')
+                elif isinstance(other, type(self)):
+                    counter.add(name + '.mul')
+                else:
+                    counter.add(name + '.mul_scalar')
+            return impl(self, other)
+    elif attr == '__pow__':
+        def wrapper(self, other):
+            counter = _current.get()
+            if counter is None or counter._in_pow:
+                return impl(self, other)
+            counter.add(name + ('.sqr' if other == 2 else '.pow'))
+            # Operations within the exponentiation are still counted
+            counter._in_pow = True
+            try:
+                return impl(self, other)
+            finally:
+                counter._in_pow = False
+    elif attr in ('__truediv__', '__rtruediv__'):
+        if not is_prime_field:
+            # Division of extension elements is counted as its inversion and multiplication
+            return None
+        def wrapper(self, other):
+            counter = _current.get()
+            if counter is not None:
+                counter.add(name + '.inv')
+                counter.add(name + '.mul')
+            return impl(self, other)
+    else:
+        op_name = name + '.' + {
+            '__add__': 'add', '__radd__': 'add',
+            '__sub__': 'sub', '__rsub__': 'sub',
+            '__neg__': 'neg', 'inv': 'inv'}[attr]
+        if attr == '__neg__':
+            def wrapper(self):
+                counter = _current.get()
+                if counter is not None:
+                    counter.add(op_name)
+                return impl(self)
+        elif attr == 'inv':
+            def wrapper(self):
+                counter = _current.get()
+                if counter is not None:
+                    counter.add(op_name)
+                return impl(self)
+        else:
+            def wrapper(self, other):
+                counter = _current.get()
+                if counter is not None:
+                    counter.add(op_name)
+                return impl(self, other)
+    return wrapper
+
+
+def _point_wrapper(cls, attr: str, impl):
+    def wrapper(self, *args):
+        counter = _current.get()
+        if counter is not None:
+            counter.add(f'E({_field_name(self.field())}).{attr}')
+        return impl(self, *args)
+    return wrapper
+
+
+def _patch(cls, attrs, make_wrapper):
+    for attr in attrs:
+        impl = getattr(cls, attr, None)
+        if impl is None or (cls, attr) in _patched:
+            continue
+        wrapper = make_wrapper(cls, attr, impl)
+        if wrapper is None:
+            continue
+        _patched[(cls, attr)] = cls.__dict__.get(attr)
+        setattr(cls, attr, wrapper)
+
+
+def _patch_all():
+    for cls in list(_fields):
+        _patch(cls, FIELD_METHODS, _field_wrapper)
+    for cls in list(_points):
+        _patch(cls, POINT_METHODS, _point_wrapper)
+
+
+def _unpatch_all():
+    for (cls, attr), original in _patched.items():
+        if original is None:
+            delattr(cls, attr)
+        else:
+            setattr(cls, attr, original)
+    _patched.clear()
+
+
+def register_field(cls):
+    with _lock:
+        _fields.add(cls)
+        if _active:
+            _patch(cls, FIELD_METHODS, _field_wrapper)
+    return cls
+
+
+def register_points(cls):
+    with _lock:
+        _points.add(cls)
+        if _active:
+            _patch(cls, POINT_METHODS, _point_wrapper)
+    return cls
+
+
+def counting_enabled() -> bool:
+    return _active > 0
+
+
+@contextmanager
+def count_ops():
+    global _active
+    counter = OpCounter()
+    token = _current.set(counter)
+    with _lock:
+        if _active == 0:
+            _patch_all()
+        _active += 1
+    try:
+        yield counter
+    finally:
+        with _lock:
+            _active -= 1
+            if _active == 0:
+                _unpatch_all()
+        _current.reset(token)
+
+
+@contextmanager
+def _labelled(operation: str, curve: str):
+    token = _label.set((operation, curve))
+    try:
+        yield
+    finally:
+        _label.reset(token)
+
+
+def label_ops(operation: str, curve: str = ''):
+    """Attributes counts within the block to an operation and curve"""
+    if not _active:
+        return nullcontext()
+    return _labelled(operation, curve)
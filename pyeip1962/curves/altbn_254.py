@@ -1,8 +1,10 @@
 from math import log2, floor
 
-from ..group import AbstractGroup, AbstractPoint, AbstractPointG2, AbstractPointG1
+from ..group import AbstractGroup, AbstractPoint, AbstractPointG2, AbstractPointG1, doubling_table
 from ..field import make_Fq, make_Fqk
 from ..sw import ShortWeierstrassPoint
+from ..codegen import specialise_point
+from ..constants import CurveConstants, point_to_ints, points_to_ints, ints_to_points
 
 """
 A Family of Implementation-Friendly BN Elliptic Curves
@@ -18,6 +20,7 @@ Fq2 = make_Fqk(modulus, [1, 0])
 Fq12 = make_Fqk(modulus, [82, 0, 0, 0, 0, 0, -18, 0, 0, 0, 0, 0])
 
 
+@specialise_point
 class ALTBN_254_G1(AbstractPointG1, ShortWeierstrassPoint):
     PARAM_A = Fq.zero()
     PARAM_B = Fq(3)
@@ -30,6 +33,15 @@ class ALTBN_254_G1(AbstractPointG1, ShortWeierstrassPoint):
     def group(cls):
         return ALTBN_254
 
+    @classmethod
+    def generator_table(cls):
+        return CONSTANTS.get('g1_table', lambda values: ints_to_points(cls, values))
+
+    @classmethod
+    def glv_endomorphism(cls):
+        # beta is a cube root of unity in Fq, lambda the matching one modulo the order
+        return Fq(2203960485148121921418603742825762020974279258880205651966), 4407920970296243842393367215006156084916469457145843978461
+
     @classmethod
     def generator(cls):
         return cls(1, 2)
@@ -47,6 +59,10 @@ class ALTBN_254_G2(AbstractPointG2, ShortWeierstrassPoint):
     def group(cls):
         return ALTBN_254
 
+    @classmethod
+    def generator_table(cls):
+        return CONSTANTS.get('g2_table', lambda values: ints_to_points(cls, values))
+
     @classmethod
     def generator(cls):
         x = Fq2([
@@ -85,3 +101,15 @@ class ALTBN_254(AbstractGroup):
     @classmethod
     def G2(cls):
         return ALTBN_254_G2
+
+
+def _compute_constants():
+    bits = ALTBN_254.order().bit_length()
+    return dict(
+        g1_table=points_to_ints(doubling_table(ALTBN_254_G1.generator(), bits)),
+        g2_table=points_to_ints(doubling_table(ALTBN_254_G2.generator(), bits)))
+
+
+CONSTANTS = CurveConstants('altbn_254', [
+    modulus, ALTBN_254.order(), Fq12.modulus_coeffs,
+    point_to_ints(ALTBN_254_G1.generator()), point_to_ints(ALTBN_254_G2.generator())], _compute_constants)
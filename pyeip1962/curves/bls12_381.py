@@ -1,18 +1,23 @@
 from math import log2, floor
 
-from ..group import AbstractGroup, AbstractPointG2, AbstractPointG1
+from ..group import AbstractGroup, AbstractPointG2, AbstractPointG1, doubling_table
 from ..field import make_Fq, make_Fqk
 from ..sw import ShortWeierstrassPoint
-from ..pairing import ate_pairing
+from ..codegen import specialise_point
+from ..constants import CurveConstants, point_to_ints, points_to_ints, ints_to_points
+from ..pairing import ate_miller_loop, final_exponentiation
+from ..profiling import profiled
 
 
 modulus = 4002409555221667393417789825735904156556882819939007885332058136124031650490837864442687629129015664037894272559787
+ATE_LOOP_COUNT = 15132376222941642752
 
 Fq = make_Fq(modulus)
 Fq2 = make_Fqk(modulus, [1, 0])
 Fq12 = make_Fqk(modulus, [2, 0, 0, 0, 0, 0, -2, 0, 0, 0, 0, 0])
 
 
+@specialise_point
 class BLS12_381_G1(AbstractPointG1, ShortWeierstrassPoint):
     PARAM_A = Fq.zero()
     PARAM_B = Fq(4)
@@ -25,6 +30,15 @@ class BLS12_381_G1(AbstractPointG1, ShortWeierstrassPoint):
     def group(self):
         return BLS12_381
 
+    @classmethod
+    def generator_table(cls):
+        return CONSTANTS.get('g1_table', lambda values: ints_to_points(cls, values))
+
+    @classmethod
+    def glv_endomorphism(cls):
+        # beta is a cube root of unity in Fq, lambda the matching one modulo the order
+        return Fq(4002409555221667392624310435006688643935503118305586438271171395842971157480381377015405980053539358417135540939436), 228988810152649578064853576960394133503
+
     @classmethod
     def generator(cls):
         x = Fq(3685416753713387016781088315183077757961620795782546409894578378688607592378376318836054947676345821548104185464507)
@@ -47,6 +61,10 @@ class BLS12_381_G2(AbstractPointG2, ShortWeierstrassPoint):
     def group(self):
         return BLS12_381
 
+    @classmethod
+    def generator_table(cls):
+        return CONSTANTS.get('g2_table', lambda values: ints_to_points(cls, values))
+
     @classmethod
     def generator(cls):
         x = Fq2([
@@ -59,10 +77,9 @@ class BLS12_381_G2(AbstractPointG2, ShortWeierstrassPoint):
         ])
         return cls(x, y)
 
+    @profiled('curve.twist')
     def twist_to_GT(self):
         # "Twist" a point in E(FQ2) into a point in E(FQ12)
-        w = Fq12([0, 1] + [0] * 10)
-
         # Field isomorphism from Z[p] / x**2 to Z[p] / x**2 - 2*x + 2
         x0, x1 = [self.x[0] - self.x[1], self.x[1]]
         y0, y1 = [self.y[0] - self.y[1], self.y[1]]
@@ -71,7 +88,7 @@ class BLS12_381_G2(AbstractPointG2, ShortWeierstrassPoint):
         nx = Fq12([x0] + [0] * 5 + [x1] + [0] * 5)
         ny = Fq12([y0] + [0] * 5 + [y1] + [0] * 5)
         # Divide x coord by w**2 and y coord by w**3
-        return BLS12_381_GT(nx / w**2, ny / w**3)
+        return BLS12_381_GT(nx * CONSTANTS.get('twist_x', Fq12), ny * CONSTANTS.get('twist_y', Fq12))
 
 
 class BLS12_381_GT(ShortWeierstrassPoint):
@@ -108,8 +125,27 @@ class BLS12_381(AbstractGroup):
         return BLS12_381_GT
 
     @classmethod
-    def pairing(cls, a: BLS12_381_G1, b: BLS12_381_G2):
+    def miller_loop(cls, a: BLS12_381_G1, b: BLS12_381_G2):
         Q = b.twist_to_GT()
         P = a.cast_point_to_fq12()
-        ate_loop_count = 15132376222941642752
-        return ate_pairing(Q, P, cls, ate_loop_count)
+        return ate_miller_loop(Q, P, ATE_LOOP_COUNT, Fq12)
+
+    @classmethod
+    def final_exponentiation(cls, f):
+        return final_exponentiation(f, cls)
+
+
+def _compute_constants():
+    w = Fq12([0, 1] + [0] * 10)
+    twist_x, twist_y = (w**2).inv(), (w**3).inv()
+    bits = BLS12_381.order().bit_length()
+    return dict(
+        twist_x=[int(_) for _ in twist_x.coeffs],
+        twist_y=[int(_) for _ in twist_y.coeffs],
+        g1_table=points_to_ints(doubling_table(BLS12_381_G1.generator(), bits)),
+        g2_table=points_to_ints(doubling_table(BLS12_381_G2.generator(), bits)))
+
+
+CONSTANTS = CurveConstants('bls12_381', [
+    modulus, BLS12_381.order(), Fq12.modulus_coeffs,
+    point_to_ints(BLS12_381_G1.generator()), point_to_ints(BLS12_381_G2.generator())], _compute_constants)
@@ -0,0 +1,160 @@
+"""
+SW6, the outer curve of Zexe, with a pairing of embedding degree 6
+
+The order of its prime subgroup is the base field modulus of BLS12-377,
+so SW6 pairings can verify proofs over BLS12-377. Curve parameters are
+from `sage/zexe_sw6.sage`, generators were derived deterministically.
+
+G2 is the quadratic twist y^2 = x^3 + a4*u^2*x + a6*u^3 over
+Fq3 = Fq[u]/(u^3 - 13), and GT is in Fq6 = Fq[v]/(v^6 - 13) with u = v^2,
+the same construction as MNT6 curves, so the pairing is `mnt.MNTPairing`.
+"""
+
+from ..group import AbstractGroup, AbstractPointG2, AbstractPointG1, doubling_table
+from ..field import make_Fq, make_Fqk
+from ..sw import ShortWeierstrassPoint
+from ..codegen import specialise_point
+from ..mnt import MNTPairing
+from ..constants import CurveConstants, point_to_ints, points_to_ints, ints_to_points
+from ..profiling import profiled
+
+
+modulus = 22369874298875696930346742206501054934775599465297184582183496627646774052458024540232479018147881220178054575403841904557897715222633333372134756426301062487682326574958588001132586331462553235407484089304633076250782629492557320825577
+order = 258664426012969094010652733694893533536393512754914660539884262666720468348340822774968888139573360124440321458177
+ATE_LOOP_COUNT = 506464946133393486072777102926336625944849939610982267859828541006717966526573193706126370441346337661774335955699621
+NON_RESIDUE = 13
+
+Fq = make_Fq(modulus)
+Fq3 = make_Fqk(modulus, [-NON_RESIDUE, 0, 0])
+Fq6 = make_Fqk(modulus, [-NON_RESIDUE, 0, 0, 0, 0, 0])
+
+PAIRING = MNTPairing(Fq3, Fq6, NON_RESIDUE, order, ATE_LOOP_COUNT)
+
+A4 = 5
+A6 = 17764315118651679038286329069295091506801468118146712649886336045535808055361274148466772191243305528312843236347777260247138934336850548243151534538734724191505953341403463040067571652261229308333392040104884438208594329793895206056414
+
+
+@specialise_point
+class SW6_G1(AbstractPointG1, ShortWeierstrassPoint):
+    PARAM_A = Fq(A4)
+    PARAM_B = Fq(A6)
+
+    @classmethod
+    def field(cls):
+        return Fq
+
+    @classmethod
+    def group(self):
+        return SW6
+
+    @classmethod
+    def generator_table(cls):
+        return CONSTANTS.get('g1_table', lambda values: ints_to_points(cls, values))
+
+    @classmethod
+    def generator(cls):
+        # Deterministically derived
+        x = Fq(3004860002263263676052555200229998562704292267837019931559562761089137339293883742360154246210671338250506773513541757762827168241337335940079849636134080615690827021060846182352417441425844377535064862189448535158540741271300662831760)
+        y = Fq(14184846761236005840836412076519610824992574816656978839926312840312726481017450521943579101504829174814789689126291042793056159128262854296577226241419234251898969442089487512784969523255104976331076927339546069782478448456638658506097)
+        return cls(x, y)
+
+    def cast_point_to_fq6(self):
+        return SW6_GT(Fq6([self.x] + [0] * 5), Fq6([self.y] + [0] * 5))
+
+
+class SW6_G2(AbstractPointG2, ShortWeierstrassPoint):
+    PARAM_A = Fq3([0, 0, A4])
+    PARAM_B = Fq3([A6 * NON_RESIDUE, 0, 0])
+
+    @classmethod
+    def field(cls):
+        return Fq3
+
+    @classmethod
+    def group(self):
+        return SW6
+
+    @classmethod
+    def generator_table(cls):
+        return CONSTANTS.get('g2_table', lambda values: ints_to_points(cls, values))
+
+    @classmethod
+    def generator(cls):
+        # Deterministically derived
+        x = Fq3([
+            1649735403598356164894877332992514048728064179327172688281749792022415905412903307242368614132710190032862492516686931697409115041525646790648348844619493479070158890167743982355266633889541006196854392594553873249869518367892176993055,
+            10351171500493827381024934341910130482090199204940871052083802161774090482994612258653843746058679086149691476915163323958538231571983977414819630870165813976582318977129488587488343709338052820357086204797557748461639111225590046382944,
+            3108039406192810988212553652111760240718800728181731838152868191956440371281758093280539340054200385337485466743069344332043224198585297759012558631584540463947888293945724233477949294380227904339730361519926387518559157933764034836364,
+        ])
+        y = Fq3([
+            19038839543709810761765847437720279208544394361324062958702344959042662794608532228331051608677451332157963141664533593073942283150166710277336820038605219045472689155987532894018445007236220785386046224107767587590662716341961647163208,
+            1591946803306290061364925077720097173880751369986792283798214540910713640893094121450572744837907323038808051047176369658617696117278581777246053020380368465713168923132674751282352102980057451894021960516493875842898680403247587449873,
+            2220345884218696083880086894595690999278383363145610119324181454313161592871775646827397033395528388210841591306980673120654973986116050058456898505591622199803632570453019774779907985966669736293551471965473603916967069512864273878753,
+        ])
+        return cls(x, y)
+
+    @profiled('curve.twist')
+    def twist_to_GT(self):
+        # Fq3 embeds in Fq6 with u = v^2, then divide x by v^2 and y by v^3
+        nx = Fq6([self.x[0], 0, self.x[1], 0, self.x[2], 0])
+        ny = Fq6([self.y[0], 0, self.y[1], 0, self.y[2], 0])
+        return SW6_GT(nx * CONSTANTS.get('twist_x', Fq6), ny * CONSTANTS.get('twist_y', Fq6))
+
+
+class SW6_GT(ShortWeierstrassPoint):
+    PARAM_A = Fq6([A4] + [0] * 5)
+    PARAM_B = Fq6([A6] + [0] * 5)
+
+    @classmethod
+    def field(cls):
+        return Fq6
+
+    @classmethod
+    def generator(cls):
+        return SW6_G2.generator().twist_to_GT()
+
+    @classmethod
+    def group(cls):
+        return SW6
+
+
+class SW6(AbstractGroup):
+    @classmethod
+    def order(cls):
+        return order
+
+    @classmethod
+    def G1(cls):
+        return SW6_G1
+
+    @classmethod
+    def G2(cls):
+        return SW6_G2
+
+    @classmethod
+    def GT(cls):
+        return SW6_GT
+
+    @classmethod
+    def miller_loop(cls, a: SW6_G1, b: SW6_G2):
+        return PAIRING.miller_loop(a, b)
+
+    @classmethod
+    def final_exponentiation(cls, f):
+        return PAIRING.final_exponentiation(f).value
+
+
+def _compute_constants():
+    v = Fq6([0, 1, 0, 0, 0, 0])
+    twist_x, twist_y = (v**2).inv(), (v**3).inv()
+    bits = order.bit_length()
+    return dict(
+        twist_x=[int(_) for _ in twist_x.coeffs],
+        twist_y=[int(_) for _ in twist_y.coeffs],
+        g1_table=points_to_ints(doubling_table(SW6_G1.generator(), bits)),
+        g2_table=points_to_ints(doubling_table(SW6_G2.generator(), bits)))
+
+
+CONSTANTS = CurveConstants('sw6', [
+    modulus, order, Fq6.modulus_coeffs,
+    point_to_ints(SW6_G1.generator()), point_to_ints(SW6_G2.generator())], _compute_constants)
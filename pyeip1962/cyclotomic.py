@@ -0,0 +1,255 @@
+"""
+Elements of the cyclotomic subgroup of Fq^k, where pairing results live
+
+The flat fields used for the target group, such as Fq[w]/(w^12 - 2a*w^6 + c),
+have moduli with only even powers of w. Such a field is a quadratic
+extension of its subfield in s = w^2, for example Fq[s]/(s^6 - 2a*s^3 + c),
+and every element splits into even and odd parts as f = A + w*B with A
+and B in the subfield. Conjugation, f -> A - w*B, is the Frobenius map
+f -> f^(q^(k/2)).
+
+Pairing results have norm A^2 - s*B^2 = 1 over the subfield, which gives:
+
+ - inversion by conjugation
+ - squaring as (2*A^2 - 1) + w*(2*A*B), one subfield squaring and one
+   multiplication instead of a full multiplication
+ - T2 torus compression to c = (1 + A)/B, half the coefficients, with
+   f = (c + w)/(c - w) on decompression
+
+Multiplication uses Karatsuba over the subfield, three subfield
+multiplications rather than one multiplication of twice the degree.
+"""
+
+from functools import lru_cache
+from typing import List, Sequence, Tuple
+
+from .field import make_Fqk
+
+
+def has_conjugation(field_class) -> bool:
+	"""Whether the field modulus is even in w, so the field splits over its subfield in w^2"""
+	coeffs = getattr(field_class, 'modulus_coeffs', None)
+	if not coeffs or len(coeffs) % 2 != 0:
+		return False
+	return all(int(_) % field_class.field_modulus == 0 for _ in coeffs[1::2])
+
+
+def wnaf(e: int, width: int) -> List[int]:
+	"""Width-w non-adjacent form of a non-negative integer, least significant digit first"""
+	digits = list()
+	half = 1 << (width - 1)
+	while e:
+		if e & 1:
+			d = e & ((1 << width) - 1)
+			if d >= half:
+				d -= 1 << width
+			e -= d
+		else:
+			d = 0
+		digits.append(d)
+		e >>= 1
+	return digits
+
+
+class AbstractCyclotomic(object):
+	"""
+	Element of norm one over the subfield, stored as its even and odd parts.
+	Values which do not have norm one, such as Miller loop outputs, must not
+	be wrapped, as squaring and inversion rely on it.
+	"""
+	__slots__ = ('a', 'b')
+
+	Fqk = None			# The full field
+	Fsub = None			# Subfield in s = w^2
+	order = None		# Order of the subgroup, when known
+
+	def __init__(self, value):
+		coeffs = [int(_) for _ in self.Fqk(value).coeffs]
+		self.a = self.Fsub(coeffs[0::2])
+		self.b = self.Fsub(coeffs[1::2])
+
+	@classmethod
+	def _from_parts(cls, a, b):
+		self = cls.__new__(cls)
+		self.a = a
+		self.b = b
+		return self
+
+	@classmethod
+	def one(cls):
+		return cls._from_parts(cls.Fsub.one(), cls.Fsub.zero())
+
+	@classmethod
+	def _mul_by_s(cls, x):
+		# Multiplication by the generator of the subfield, a shift and one reduction step
+		coeffs = x.coeffs
+		top = coeffs[-1]
+		return cls.Fsub([(coeffs[i - 1] if i else 0) - top * m for i, m in enumerate(cls.Fsub.modulus_coeffs)])
+
+	@property
+	def value(self):
+		coeffs = list()
+		for a, b in zip(self.a.coeffs, self.b.coeffs):
+			coeffs += [a, b]
+		return self.Fqk(coeffs)
+
+	def __eq__(self, other):
+		if isinstance(other, AbstractCyclotomic):
+			return self.a == other.a and self.b == other.b
+		return self.value == other
+
+	def __hash__(self):
+		return hash(tuple(int(_) for _ in self.a.coeffs + self.b.coeffs))
+
+	def __repr__(self):
+		return f'{type(self).__name__}({[int(_) for _ in self.value.coeffs]})'
+
+	def is_one(self) -> bool:
+		return self.a == self.Fsub.one() and self.b == self.Fsub.zero()
+
+	def is_unitary(self) -> bool:
+		"""Norm one over the subfield, A^2 - s*B^2 == 1"""
+		return self.a * self.a - self._mul_by_s(self.b * self.b) == self.Fsub.one()
+
+	def is_in_subgroup(self) -> bool:
+		return self.is_unitary() and (self ** self.order).is_one()
+
+	def __mul__(self, other: 'AbstractCyclotomic') -> 'AbstractCyclotomic':
+		aa = self.a * other.a
+		bb = self.b * other.b
+		b = (self.a + self.b) * (other.a + other.b) - aa - bb
+		return self._from_parts(aa + self._mul_by_s(bb), b)
+
+	def __truediv__(self, other: 'AbstractCyclotomic') -> 'AbstractCyclotomic':
+		return self * other.conjugate()
+
+	def __neg__(self):
+		raise TypeError("Cyclotomic elements form a multiplicative group")
+
+	def conjugate(self) -> 'AbstractCyclotomic':
+		return self._from_parts(self.a, -self.b)
+
+	def inv(self) -> 'AbstractCyclotomic':
+		return self.conjugate()
+
+	def square(self) -> 'AbstractCyclotomic':
+		a2 = self.a * self.a
+		return self._from_parts(a2 + a2 - self.Fsub.one(), (self.a * self.b) * 2)
+
+	def __pow__(self, e: int) -> 'AbstractCyclotomic':
+		e = int(e)
+		if e < 0:
+			return self.conjugate() ** -e
+		if e == 0:
+			return self.one()
+		return self.multi_pow([(self, e)])
+
+	def _odd_powers(self, width: int) -> List['AbstractCyclotomic']:
+		# f, f^3, ... f^(2^(width-1) - 1)
+		f2 = self.square()
+		table = [self]
+		for _ in range((1 << (width - 2)) - 1):
+			table.append(table[-1] * f2)
+		return table
+
+	@classmethod
+	def multi_pow(cls, terms: Sequence[Tuple['AbstractCyclotomic', int]]) -> 'AbstractCyclotomic':
+		"""
+		Product of x_i^e_i using Straus' method, the wNAF digits of all the
+		exponents are interleaved so they share one chain of squarings.
+		Negative digits use the conjugates of the precomputed odd powers.
+		"""
+		expansions = list()
+		for x, e in terms:
+			e = int(e)
+			if e < 0:
+				x, e = x.conjugate(), -e
+			if e:
+				width = 4 if e.bit_length() <= 256 else 5
+				expansions.append((x._odd_powers(width), wnaf(e, width)))
+		if not expansions:
+			return cls.one()
+		result = None
+		for i in reversed(range(max(len(digits) for _, digits in expansions))):
+			if result is not None:
+				result = result.square()
+			for table, digits in expansions:
+				d = digits[i] if i < len(digits) else 0
+				if d:
+					x = table[abs(d) // 2] if d > 0 else table[abs(d) // 2].conjugate()
+					result = x if result is None else result * x
+		return result
+
+	def compress(self) -> List[int]:
+		"""
+		T2 torus compression, (1 + A)/B, to half of the coefficients. The
+		identity, where B is zero, is encoded as zero, which as c = 0 would
+		otherwise decompress to -1, an element of order two.
+		"""
+		if self.b == self.Fsub.zero():
+			if self.a != self.Fsub.one():
+				raise ValueError("Only the identity has a zero odd part")
+			return [0] * self.Fsub.degree
+		c = (self.Fsub.one() + self.a) / self.b
+		return [int(_) for _ in c.coeffs]
+
+	@classmethod
+	def decompress(cls, coeffs: Sequence[int]) -> 'AbstractCyclotomic':
+		if len(coeffs) != cls.Fsub.degree:
+			raise ValueError(f"Expected {cls.Fsub.degree} coefficients")
+		if not any(coeffs):
+			return cls.one()
+		c = cls.Fsub(coeffs)
+		c2 = c * c
+		s = cls._mul_by_s(cls.Fsub.one())
+		denominator = (c2 - s).inv()
+		return cls._from_parts((c2 + s) * denominator, (c + c) * denominator)
+
+	def to_bytes(self, field_length: int) -> bytes:
+		return b''.join(_.to_bytes(field_length, 'big') for _ in self.compress())
+
+	@classmethod
+	def from_bytes(cls, data: bytes) -> 'AbstractCyclotomic':
+		n = cls.Fsub.degree
+		if len(data) % n != 0:
+			raise ValueError(f"Length must be a multiple of {n}")
+		field_length = len(data) // n
+		coeffs = [int.from_bytes(data[i:i+field_length], 'big') for i in range(0, len(data), field_length)]
+		if any(_ >= cls.Fqk.field_modulus for _ in coeffs):
+			raise ValueError("Coefficient is not reduced modulo field modulus")
+		return cls.decompress(coeffs)
+
+	@classmethod
+	def final_exponentiation(cls, f) -> 'AbstractCyclotomic':
+		"""
+		f^((q^k - 1)/r) for any non-zero f, with q^k - 1 = (q^(k/2) - 1)(q^(k/2) + 1).
+		The first factor costs a conjugation and one inversion, f^(q^(k/2)) / f,
+		and its result has norm one, so the second is a cyclotomic exponentiation.
+		"""
+		k = cls.Fqk.degree
+		q = cls.Fqk.field_modulus
+		coeffs = [int(_) for _ in f.coeffs]
+		conj = cls.Fqk([c if i % 2 == 0 else -c for i, c in enumerate(coeffs)])
+		exponent, remainder = divmod(q ** (k // 2) + 1, cls.order)
+		if remainder:
+			raise ValueError("Group order does not divide q^(k/2) + 1")
+		g = cls(conj * f.inv())
+		return g ** exponent
+
+
+@lru_cache(maxsize=64)
+def make_cyclotomic(field_class, order: int = None):
+	"""Cyclotomic element type for a field with an even modulus, e.g. the Fq12 of a pairing"""
+	if not has_conjugation(field_class):
+		raise ValueError("Field modulus must have only even powers")
+	q = field_class.field_modulus
+	Fsub = make_Fqk(q, [int(_) % q for _ in field_class.modulus_coeffs[0::2]])
+
+	class Cyclotomic(AbstractCyclotomic):
+		__slots__ = ()
+
+	Cyclotomic.Fqk = field_class
+	Cyclotomic.Fsub = Fsub
+	Cyclotomic.order = order
+	Cyclotomic.__name__ = Cyclotomic.__qualname__ = f'Cyclotomic{field_class.degree}'
+	return Cyclotomic
@@ -0,0 +1,113 @@
+"""
+Encodes operations into EIP-1962 calldata, the inverse of `StreamParser`
+"""
+
+from typing import Sequence
+
+from .structs import AnyOp, OP_CODES, G1Prefix, G2Prefix, G1Point, G2Point, PairingOp, MNTPairingOp
+from .structs import G1AddOp, G1MulOp, G1MultiExpOp, G2AddOp, G2MulOp, G2MultiExpOp
+from .parser import CURVE_TYPE_LENGTH, OPERATION_ENCODING_LENGTH, TWIST_TYPE_LENGTH
+from .parser import EXTENSION_DEGREE_ENCODING_LENGTH, BYTES_FOR_LENGTH_ENCODING
+
+
+def _make_bytes(x: int, n_bytes: int) -> bytes:
+	return int(x).to_bytes(n_bytes, 'big')
+
+
+def _many_bytes(xs: Sequence[int], n_bytes: int) -> bytes:
+	return b''.join(_make_bytes(_, n_bytes) for _ in xs)
+
+
+def encode_g1_prefix(prefix: G1Prefix) -> bytes:
+	return b''.join([
+		_make_bytes(prefix.field_length, BYTES_FOR_LENGTH_ENCODING),
+		_many_bytes([prefix.field_modulus, prefix.A, prefix.B], prefix.field_length),
+		_make_bytes(prefix.order_length, BYTES_FOR_LENGTH_ENCODING),
+		_make_bytes(prefix.order, prefix.order_length)])
+
+
+def encode_g1_point(point: G1Point, field_length: int) -> bytes:
+	return _many_bytes([point.x, point.y], field_length)
+
+
+def encode_g2_prefix(prefix: G2Prefix) -> bytes:
+	return b''.join([
+		_make_bytes(prefix.field_length, BYTES_FOR_LENGTH_ENCODING),
+		_make_bytes(prefix.field_modulus, prefix.field_length),
+		_make_bytes(prefix.extension_degree, EXTENSION_DEGREE_ENCODING_LENGTH),
+		_make_bytes(prefix.fp_non_residue, prefix.field_length),
+		_many_bytes(prefix.A, prefix.field_length),
+		_many_bytes(prefix.B, prefix.field_length),
+		_make_bytes(prefix.order_length, BYTES_FOR_LENGTH_ENCODING),
+		_make_bytes(prefix.order, prefix.order_length)])
+
+
+def encode_g2_point(point: G2Point, field_length: int) -> bytes:
+	return _many_bytes(point.x, field_length) + _many_bytes(point.y, field_length)
+
+
+def encode_pairing_op(op: PairingOp) -> bytes:
+	field_length = op.field_length
+	pairs = b''.join(encode_g1_point(g1, field_length) + encode_g2_point(g2, field_length)
+					 for g1, g2 in op.pairs)
+	return b''.join([
+		_make_bytes(op.curve_type, CURVE_TYPE_LENGTH),
+		_make_bytes(field_length, BYTES_FOR_LENGTH_ENCODING),
+		_many_bytes([op.field_modulus, op.A, op.B], field_length),
+		_make_bytes(op.order_length, BYTES_FOR_LENGTH_ENCODING),
+		_make_bytes(op.order, op.order_length),
+		_make_bytes(op.fp2_non_residue, field_length),
+		_many_bytes(op.fp6_non_residue, field_length),
+		_make_bytes(op.twist_type, TWIST_TYPE_LENGTH),
+		_make_bytes(op.x_length, BYTES_FOR_LENGTH_ENCODING),
+		_make_bytes(op.x, op.x_length),
+		_many_bytes([op.sign, len(op.pairs)], 1),
+		pairs])
+
+
+def encode_mnt_pairing_op(op: MNTPairingOp) -> bytes:
+	field_length = op.field_length
+	pairs = b''.join(encode_g1_point(g1, field_length) + encode_g2_point(g2, field_length)
+					 for g1, g2 in op.pairs)
+	return b''.join([
+		_make_bytes(op.curve_type, CURVE_TYPE_LENGTH),
+		_make_bytes(field_length, BYTES_FOR_LENGTH_ENCODING),
+		_many_bytes([op.field_modulus, op.A, op.B], field_length),
+		_make_bytes(op.order_length, BYTES_FOR_LENGTH_ENCODING),
+		_make_bytes(op.order, op.order_length),
+		_make_bytes(op.non_residue, field_length),
+		_make_bytes(op.x_length, BYTES_FOR_LENGTH_ENCODING),
+		_make_bytes(op.x, op.x_length),
+		_make_bytes(op.sign, 1),
+		_make_bytes(op.exp_w0_length, BYTES_FOR_LENGTH_ENCODING),
+		_make_bytes(op.exp_w0, op.exp_w0_length),
+		_make_bytes(op.exp_w1_length, BYTES_FOR_LENGTH_ENCODING),
+		_make_bytes(op.exp_w1, op.exp_w1_length),
+		_many_bytes([op.exp_w0_sign, len(op.pairs)], 1),
+		pairs])
+
+
+def encode_op(op: AnyOp) -> bytes:
+	op_code = _make_bytes(OP_CODES[type(op)], OPERATION_ENCODING_LENGTH)
+	if isinstance(op, PairingOp):
+		return op_code + encode_pairing_op(op)
+	elif isinstance(op, MNTPairingOp):
+		return op_code + encode_mnt_pairing_op(op)
+
+	prefix = op.prefix
+	if isinstance(op, (G1AddOp, G1MulOp, G1MultiExpOp)):
+		encoded = [op_code, encode_g1_prefix(prefix)]
+		encode_point = encode_g1_point
+	else:
+		encoded = [op_code, encode_g2_prefix(prefix)]
+		encode_point = encode_g2_point
+
+	if isinstance(op, (G1AddOp, G2AddOp)):
+		encoded += [encode_point(op.lhs, prefix.field_length), encode_point(op.rhs, prefix.field_length)]
+	elif isinstance(op, (G1MulOp, G2MulOp)):
+		encoded += [encode_point(op.lhs, prefix.field_length), _make_bytes(op.scalar, prefix.order_length)]
+	else:
+		encoded.append(_make_bytes(len(op.pairs), 1))
+		for point, scalar in op.pairs:
+			encoded += [encode_point(point, prefix.field_length), _make_bytes(scalar, prefix.order_length)]
+	return b''.join(encoded)
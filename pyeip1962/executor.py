@@ -0,0 +1,270 @@
+"""
+Executes EIP-1962 operations and encodes their results
+
+`execute` runs a single call, `execute_many` runs a batch of calls grouped by
+curve and operation so work can be shared between calls in the same group:
+one curve context lookup per group, one batched inversion for all additions
+in a group, subgroup checks that are done once per distinct point, and
+pairing checks combined by `batch_pairing_check` into one multi-pairing.
+Calls which fail a combined check are found by bisection and checked
+exactly, a false call passes with probability about 2^-64.
+"""
+
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, List, Tuple, Union
+
+from .cache import ResultCache
+from .context import CurveContext, g1_context, g2_context, pairing_context
+from .counters import label_ops
+from .profiling import profiled, span
+from .group import AbstractPoint
+from .parser import StreamParser, Input
+from .structs import AnyOp, Operation, OP_CODES, PAIRING_OPS, AnyPairingOp, G1Point, G2Point
+from .structs import G1AddOp, G1MulOp, G1MultiExpOp
+
+
+Result = Union[bytes, Exception]
+
+# Errors which mean the call itself is invalid, rather than a bug
+CALL_ERRORS = (ValueError, RuntimeError)
+
+
+def op_context(op: AnyOp) -> CurveContext:
+	if isinstance(op, PAIRING_OPS):
+		return pairing_context(op)
+	elif isinstance(op, (G1AddOp, G1MulOp, G1MultiExpOp)):
+		return g1_context(op.prefix)
+	return g2_context(op.prefix)
+
+
+@profiled('validate.g1')
+def decode_g1(ctx: CurveContext, point: G1Point) -> AbstractPoint:
+	field_modulus = ctx.Fq.field_modulus
+	if point.x >= field_modulus or point.y >= field_modulus:
+		raise ValueError("G1 coordinate is not reduced modulo field modulus")
+	if point.x == 0 and point.y == 0:
+		return ctx.G1.zero()
+	result = ctx.G1(point.x, point.y)
+	if not result.is_on_curve():
+		raise ValueError("G1 point is not on curve")
+	return result
+
+
+@profiled('validate.g2')
+def decode_g2(ctx: CurveContext, point: G2Point) -> AbstractPoint:
+	field_modulus = ctx.Fq.field_modulus
+	if any(_ >= field_modulus for _ in point.x) or any(_ >= field_modulus for _ in point.y):
+		raise ValueError("G2 coordinate is not reduced modulo field modulus")
+	if not any(point.x) and not any(point.y):
+		return ctx.G2.zero()
+	result = ctx.G2(point.x, point.y)
+	if not result.is_on_curve():
+		raise ValueError("G2 point is not on curve")
+	return result
+
+
+def encode_g1(point: AbstractPoint, field_length: int) -> bytes:
+	if not point:
+		return bytes(field_length * 2)
+	return b''.join(int(_).to_bytes(field_length, 'big') for _ in point)
+
+
+def encode_g2(point: AbstractPoint, field_length: int, extension_degree: int) -> bytes:
+	if not point:
+		return bytes(field_length * extension_degree * 2)
+	return b''.join(int(c).to_bytes(field_length, 'big')
+					for coord in point for c in coord.coeffs)
+
+
+def _codec(ctx: CurveContext, op: AnyOp) -> Tuple[Callable, Callable]:
+	# Returns decode and encode functions for the group the op works on
+	prefix = op.prefix
+	if isinstance(op, (G1AddOp, G1MulOp, G1MultiExpOp)):
+		return decode_g1, lambda point: encode_g1(point, prefix.field_length)
+	return decode_g2, lambda point: encode_g2(point, prefix.field_length, prefix.extension_degree)
+
+
+@profiled('validate.subgroup')
+def check_subgroup(point: AbstractPoint):
+	if point and point * point.order():
+		raise ValueError("Point is not in the main subgroup")
+
+
+def point_add(ctx: CurveContext, op: AnyOp) -> bytes:
+	decode, encode = _codec(ctx, op)
+	a, b = decode(ctx, op.lhs), decode(ctx, op.rhs)
+	if not a:
+		return encode(b)
+	return encode(a.add(b))
+
+
+def point_mul(ctx: CurveContext, op: AnyOp) -> bytes:
+	decode, encode = _codec(ctx, op)
+	point = decode(ctx, op.lhs)
+	if not point or op.scalar == 0:
+		return encode(None)
+	return encode(point.mul(op.scalar))
+
+
+def point_multiexp(ctx: CurveContext, op: AnyOp) -> bytes:
+	decode, encode = _codec(ctx, op)
+	if op.num_pairs == 0:
+		raise ValueError("Multiexponentiation with zero pairs")
+	pairs = [(decode(ctx, point), scalar) for point, scalar in op.pairs]
+	point_class = ctx.G1 if isinstance(op, G1MultiExpOp) else ctx.G2
+	return encode(point_class.msm(pairs))
+
+
+def _pairing_pairs(ctx: CurveContext, op: AnyPairingOp, checked: Dict) -> list:
+	if op.num_pairs == 0:
+		raise ValueError("Pairing with zero pairs")
+	pairs = list()
+	for g1, g2 in op.pairs:
+		P, Q = decode_g1(ctx, g1), decode_g2(ctx, g2)
+		for key, point in [(('G1', g1), P), (('G2', tuple(g2.x), tuple(g2.y)), Q)]:
+			if key not in checked:
+				check_subgroup(point)
+				checked[key] = True
+		pairs.append((P, Q))
+	return pairs
+
+
+def pairing(ctx: CurveContext, op: AnyPairingOp, checked: Dict = None) -> bytes:
+	pairs = _pairing_pairs(ctx, op, {} if checked is None else checked)
+	return b'\x01' if ctx.group.pairing_check(pairs) else b'\x00'
+
+
+HANDLERS = {
+	Operation.G1_ADD: point_add,
+	Operation.G1_MUL: point_mul,
+	Operation.G1_MULTIEXP: point_multiexp,
+	Operation.G2_ADD: point_add,
+	Operation.G2_MUL: point_mul,
+	Operation.G2_MULTIEXP: point_multiexp,
+	Operation.PAIRING: pairing,
+}
+
+
+def curve_label(ctx: CurveContext) -> str:
+	field_modulus = ctx.Fq.field_modulus
+	return f'{field_modulus.bit_length()}-bit/{field_modulus:x}'[:24]
+
+
+def execute_op(op: AnyOp) -> bytes:
+	ctx = op_context(op)
+	op_code = OP_CODES[type(op)]
+	with label_ops(op_code.name, curve_label(ctx)), span('execute.' + op_code.name):
+		return HANDLERS[op_code](ctx, op)
+
+
+def execute(calldata: Input, cache: ResultCache = None) -> bytes:
+	if cache is None:
+		with StreamParser(calldata) as parser:
+			return execute_op(parser.parse())
+	result, = cache.execute_many([calldata], execute_many)
+	if isinstance(result, Exception):
+		raise result
+	return result
+
+
+BatchItems = List[Tuple[int, AnyOp]]
+
+
+def _batch_each(ctx: CurveContext, op_code: Operation, items: BatchItems, results: List[Result]):
+	handler = HANDLERS[op_code]
+	for i, op in items:
+		try:
+			results[i] = handler(ctx, op)
+		except CALL_ERRORS as ex:
+			results[i] = ex
+
+
+def _batch_add(ctx: CurveContext, op_code: Operation, items: BatchItems, results: List[Result]):
+	decoded = list()
+	for i, op in items:
+		decode, encode = _codec(ctx, op)
+		try:
+			decoded.append((i, encode, decode(ctx, op.lhs), decode(ctx, op.rhs)))
+		except CALL_ERRORS as ex:
+			results[i] = ex
+	point_class = ctx.G1 if op_code == Operation.G1_ADD else ctx.G2
+	sums = point_class.batch_add([(a, b) for _, _, a, b in decoded])
+	for (i, encode, _, _), point in zip(decoded, sums):
+		results[i] = encode(point)
+
+
+def _batch_pairing(ctx: CurveContext, op_code: Operation, items: BatchItems, results: List[Result]):
+	# Points repeated across calls (e.g. verification keys) are only checked once,
+	# and the checks of all calls share one final exponentiation
+	checked = dict()
+	indices, equations = list(), list()
+	for i, op in items:
+		try:
+			equations.append(_pairing_pairs(ctx, op, checked))
+			indices.append(i)
+		except CALL_ERRORS as ex:
+			results[i] = ex
+	try:
+		if len(equations) == 1:
+			valid = [ctx.group.pairing_check(equations[0])]
+		else:
+			valid = ctx.group.batch_pairing_check(equations)
+	except CALL_ERRORS as ex:
+		valid = [ex] * len(equations)
+	for i, ok in zip(indices, valid):
+		results[i] = ok if isinstance(ok, Exception) else (b'\x01' if ok else b'\x00')
+
+
+BATCH_HANDLERS = {
+	Operation.G1_ADD: _batch_add,
+	Operation.G2_ADD: _batch_add,
+	Operation.PAIRING: _batch_pairing,
+}
+
+
+def parse_many(calldatas: Iterable[Input]) -> List[Union[AnyOp, Exception]]:
+	parsed = list()
+	for calldata in calldatas:
+		try:
+			with StreamParser(calldata) as parser:
+				parsed.append(parser.parse())
+		except CALL_ERRORS as ex:
+			parsed.append(ex)
+	return parsed
+
+
+def execute_ops(ops: Iterable[Union[AnyOp, Exception]]) -> List[Result]:
+	"""
+	Executes a batch of parsed operations, returning the encoded output of
+	each in input order, or the exception raised for invalid operations.
+	Exceptions in the input, e.g. from parsing, are passed through.
+	"""
+	results = list()
+	groups = OrderedDict()
+	for i, op in enumerate(ops):
+		results.append(op)
+		if isinstance(op, Exception):
+			continue
+		try:
+			ctx = op_context(op)
+		except CALL_ERRORS as ex:
+			results[i] = ex
+			continue
+		op_code = OP_CODES[type(op)]
+		group = groups.setdefault((ctx.key, op_code), (ctx, list()))
+		group[1].append((i, op))
+	for (_, op_code), (ctx, items) in groups.items():
+		with label_ops(op_code.name, curve_label(ctx)), span('execute.' + op_code.name):
+			BATCH_HANDLERS.get(op_code, _batch_each)(ctx, op_code, items, results)
+	return results
+
+
+def execute_many(calldatas: Iterable[Input], cache: ResultCache = None) -> List[Result]:
+	"""
+	Executes a batch of calls, returning the encoded output of each call in
+	input order, or the exception raised for calls which are invalid. With
+	a `cache`, repeated calls are only executed once.
+	"""
+	if cache is not None:
+		return cache.execute_many(calldatas, execute_many)
+	return execute_ops(parse_many(calldatas))
@@ -5,7 +5,11 @@ from math import gcd, log2, ceil
 from py_ecc import fields
 from py_ecc.fields.field_elements import IntOrFQ
 
+from .chains import sliding_window_chain
+from .codegen import fqk_functions
 from .redc import mont_findR, mont_convert, mont_redux
+from .counters import register_field
+from .profiling import profiled
 
 
 def frobenius_coeffs_powers(modulus: int, degree: int, num: int=None, divisor: int=None) -> Generator[int,None,None]:
@@ -58,29 +62,143 @@ def from_limbs(limbs, limb_bits: int = 64) -> int:
     return x
 
 
+def batch_inverse(elements: Sequence) -> List:
+    """
+    Montgomery's trick, inverts all elements using a single field inversion
+    and 3*(n-1) multiplications. None of the elements may be zero.
+    """
+    if not elements:
+        return []
+    prefix = [elements[0]]
+    for e in elements[1:]:
+        prefix.append(prefix[-1] * e)
+    acc = type(prefix[-1]).one() / prefix[-1]
+    result = [None] * len(elements)
+    for i in range(len(elements) - 1, 0, -1):
+        result[i] = acc * prefix[i-1]
+        acc = acc * elements[i]
+    result[0] = acc
+    return result
+
+
+def jacobi(a: int, n: int) -> int:
+    """
+    Jacobi symbol (a/n) for odd positive n, by the binary algorithm: factors
+    of two are stripped with (2/n) = (-1)^((n^2-1)/8), and quadratic
+    reciprocity swaps the arguments, without any exponentiation.
+    """
+    if n <= 0 or n % 2 == 0:
+        raise ValueError("Jacobi symbol is only defined for odd positive n")
+    a %= n
+    result = 1
+    while a:
+        zeros = (a & -a).bit_length() - 1
+        a >>= zeros
+        if zeros & 1 and n & 7 in (3, 5):
+            result = -result
+        if a & n & 3 == 3:
+            result = -result
+        a, n = n % a, a
+    return result if n == 1 else 0
+
+
+def is_nth_power(a: int, n: int, q: int) -> bool:
+    """Whether a is an n-th power modulo the prime q, zero is one"""
+    a %= q
+    if a == 0:
+        return True
+    d = gcd(n, q - 1)
+    if d == 1:
+        return True
+    if d == 2:
+        return jacobi(a, q) == 1
+    return pow(a, (q - 1) // d, q) == 1
+
+
+def resultant(f: Sequence[int], g: Sequence[int], q: int) -> int:
+    """
+    Product of g(r) over the roots r of the monic polynomial f, modulo q,
+    with coefficients least significant first. Computed by the Euclidean
+    algorithm: g is reduced modulo f, then the roles are swapped using
+    Res(f, g) = (-1)^(deg f * deg g) * lc(g)^(deg f) * Res(g / lc(g), f).
+    """
+    f = [int(_) % q for _ in f]
+    g = [int(_) % q for _ in g]
+    result = 1
+    while True:
+        m = len(f) - 1
+        g = _poly_mod(g, f, q)
+        if not g:
+            return 0
+        dg = len(g) - 1
+        lc = g[-1]
+        result = (result * pow(lc, m, q)) % q
+        if dg == 0:
+            return result
+        if (m * dg) & 1:
+            result = q - result
+        lc_inv = pow(lc, q - 2, q)
+        f, g = [(_ * lc_inv) % q for _ in g], f
+
+
+def _poly_mod(g: List[int], f: List[int], q: int) -> List[int]:
+    # Remainder of g by the monic f, with trailing zeros removed
+    g = list(g)
+    m = len(f) - 1
+    for i in range(len(g) - 1, m - 1, -1):
+        c = g[i]
+        if c:
+            for j in range(m):
+                g[i - m + j] = (g[i - m + j] - c * f[j]) % q
+        g[i] = 0
+    while g and not g[-1]:
+        g.pop()
+    return g
+
+
 class CommonFieldStuff:
     def norm(self):
         raise NotImplementedError
 
     def legendre(self):
-        euler = (self.field_modulus-1)//2
-        s = self.norm() ** euler
-        if s == 0:
-            return 0
-        elif s == 1:
-            return 1
-        return -1
+        """Quadratic character, from the Jacobi symbol of the norm"""
+        return jacobi(int(self.norm()), self.field_modulus)
 
     def is_quadratic_residue(self):
         return self.legendre() != -1
 
+    def is_nth_power(self, n: int) -> bool:
+        """
+        Whether the element is an n-th power. When gcd(n, q^k - 1) divides
+        q - 1 this holds exactly when its norm is an n-th power in Fq.
+        """
+        q = self.field_modulus
+        order = q ** getattr(self, 'degree', 1) - 1
+        d = gcd(n, order)
+        if (q - 1) % d == 0:
+            return is_nth_power(int(self.norm()), d, q)
+        return self ** (order // d) == type(self).one()
+
 
 class AbstractField(fields.FQ, CommonFieldStuff):
     def norm(self):
         return self
 
+    def __pow__(self, other: int):
+        # The builtin modular exponentiation beats any window method written in Python
+        return type(self)(pow(self.n, int(other), self.field_modulus))
+
 
 class AbstractExtensionField(fields.FQP, CommonFieldStuff):
+    def __pow__(self, other: int):
+        """Sliding-window exponentiation, about 20% fewer multiplications than square-and-multiply"""
+        other = int(other)
+        if other < 0:
+            raise ValueError("Exponent must not be negative")
+        if other < 16:
+            return super().__pow__(other)
+        return sliding_window_chain(other).execute(self)
+
     def norm(self):
         """
         From: https://eprint.iacr.org/2010/429.pdf '2 Preliminaries':
@@ -96,15 +214,23 @@ class AbstractExtensionField(fields.FQP, CommonFieldStuff):
          - https://eprint.iacr.org/2019/015.pdf
          - https://file.scirp.org/pdf/JIS_2019070114405856.pdf
 
-        For FP2:
-            (c0^2 - beta) * c1^2
+        For FP2 = FP[u] / (u^2 - beta):
+            N(c0 + c1*u) = c0^2 - beta * c1^2
 
         The trace function maps an element of the extension field `F_{p^m}` to
         an element of the prime field `F_p.`
+
+        The conjugates are the values of the element, as a polynomial in w,
+        at the roots of the field modulus, so the norm is the resultant of
+        the two polynomials. It costs one Euclidean algorithm on polynomials
+        over Fq and no Frobenius maps.
         """
-        pass
+        f = [int(_) for _ in self.modulus_coeffs] + [1]
+        n = resultant(f, [int(_) for _ in self.coeffs], self.field_modulus)
+        return self.FQP_corresponding_FQ_class(n)
 
 
+@profiled('field.make_Fq')
 def make_Fq(q: int):
     R = mont_findR(q)
     q_bits = ceil(log2(q))
@@ -135,13 +261,17 @@ def make_Fq(q: int):
         def to_mont_limbs(self, limb_bits: int = 64) -> List[int]:
             return to_limbs(mont_convert(self.n, q, R), q_bits)
 
-    return Fq
+    return register_field(Fq)
 
 
+@profiled('field.make_Fqk')
 def make_Fqk(field_modulus: int, modulus_coeffs: Sequence[IntOrFQ]):
     R = mont_findR(field_modulus)
     q_bits = ceil(log2(field_modulus))
     q = field_modulus
+    _mul, _square = fqk_functions(q, modulus_coeffs)
+    Coeff = type('FQP_corresponding_FQ_class', (fields.FQ,), {'field_modulus': q})
+    modulus_tuple = tuple(modulus_coeffs)
 
     class Fqk(AbstractExtensionField):
         """Extension field of F_q^k"""
@@ -162,6 +292,24 @@ def make_Fqk(field_modulus: int, modulus_coeffs: Sequence[IntOrFQ]):
                 return self.coeffs[idx]
             raise KeyError()
 
+        @classmethod
+        def _from_ints(cls, values: Sequence[int]) -> 'Fqk':
+            # Reduced coefficients, skips the checks and per-instance coefficient class of FQP
+            x = cls.__new__(cls)
+            x.coeffs = tuple(Coeff(_) for _ in values)
+            x.modulus_coeffs = modulus_tuple
+            x.degree = len(modulus_tuple)
+            x.FQP_corresponding_FQ_class = Coeff
+            return x
+
+        def __mul__(self, other):
+            # Generated, unrolled formulas when multiplying two elements
+            if isinstance(other, Fqk):
+                if other is self:
+                    return Fqk._from_ints(_square([c.n for c in self.coeffs]))
+                return Fqk._from_ints(_mul([c.n for c in self.coeffs], [c.n for c in other.coeffs]))
+            return super().__mul__(other)
+
         @classmethod
         def from_limbs(cls, limbs: Sequence[Sequence[int]], limb_bits: int = 64) -> 'Fqk':
             return cls([from_limbs(_, limb_bits) for _ in limbs])
@@ -178,7 +326,8 @@ def make_Fqk(field_modulus: int, modulus_coeffs: Sequence[IntOrFQ]):
             x = [mont_convert(_, field_modulus, R) for _ in self.coeffs]
             return [to_limbs(_, q_bits) for _ in x]
 
-    return Fqk
+    Fqk.modulus_coeffs = tuple(modulus_coeffs)
+    return register_field(Fqk)
 
 
 def test_bls12_377():
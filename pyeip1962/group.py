@@ -1,3 +1,64 @@
+import secrets
+import weakref
+from functools import lru_cache
+from itertools import islice
+from math import isqrt
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+from .profiling import profiled, span
+from .cyclotomic import make_cyclotomic, wnaf
+
+
+# Point class -> multiples of its generator by powers of two
+_GENERATOR_TABLES = weakref.WeakKeyDictionary()
+
+
+def doubling_table(point: 'AbstractPoint', n: int) -> List['AbstractPoint']:
+	"""Returns [P, 2P, 4P, ... 2^(n-1) P]"""
+	table = [point]
+	for _ in range(n - 1):
+		table.append(table[-1].double())
+	return table
+
+
+@lru_cache(maxsize=None)
+def glv_basis(order: int, lam: int) -> Tuple[Tuple[int, int], Tuple[int, int]]:
+	"""
+	Short basis of the lattice {(x, y) : x + y*lambda = 0 mod order}, from
+	the remainders of the extended Euclidean algorithm around sqrt(order)
+	"""
+	bound = isqrt(order)
+	r0, r1 = order, lam % order
+	t0, t1 = 0, 1
+	while r1 >= bound:
+		q = r0 // r1
+		r0, r1 = r1, r0 - q * r1
+		t0, t1 = t1, t0 - q * t1
+	q = r0 // r1
+	r2, t2 = r0 - q * r1, t0 - q * t1
+	v1 = (r1, -t1)
+	v2 = (r0, -t0) if r0*r0 + t0*t0 <= r2*r2 + t2*t2 else (r2, -t2)
+	return v1, v2
+
+
+def glv_decompose(scalar: int, lam: int, order: int) -> Tuple[int, int]:
+	"""Splits a scalar into k1 + k2*lambda, where k1 and k2 have about half of its bits and may be negative"""
+	(a1, b1), (a2, b2) = glv_basis(order, lam)
+	det = a1 * b2 - a2 * b1
+	# Rounded coordinates of (scalar, 0) in the basis
+	c1 = (2 * b2 * scalar + det) // (2 * det)
+	c2 = (-2 * b1 * scalar + det) // (2 * det)
+	return scalar - c1 * a1 - c2 * a2, -c1 * b1 - c2 * b2
+
+
+def _odd_multiples(point: 'AbstractPoint', width: int) -> List['AbstractPoint']:
+	# P, 3P, 5P ... for the positive digits of a width-w NAF
+	table = [point]
+	double = point.double()
+	for _ in range((1 << (width - 2)) - 1):
+		table.append(table[-1].add(double))
+	return table
+
 
 class AbstractPoint(object):
 	__slots__ = ('x', 'y')
@@ -24,6 +85,10 @@ class AbstractPoint(object):
 	def __eq__(self, other: 'AbstractPoint'):
 		return other is not None and self.x == other.x and self.y == other.y
 
+	def __hash__(self):
+		# Canonical, so equal points built from different representations hash alike
+		return hash((type(self).__name__, _point_key(self)))
+
 	def __bool__(self):
 		return self != self.zero()
 
@@ -61,6 +126,56 @@ class AbstractPoint(object):
 	def double(self, other: 'AbstractPoint'):
 		raise NotImplementedError
 
+	@classmethod
+	def glv_endomorphism(cls) -> Optional[Tuple[object, int]]:
+		"""
+		(beta, lambda) where the map (x, y) -> (beta*x, y) is an endomorphism
+		acting on the prime order subgroup as multiplication by lambda, for
+		curves which have one, such as those with a4 = 0.
+		"""
+		return None
+
+	@classmethod
+	def multi_mul(cls, terms: Sequence[Tuple['AbstractPoint', int]], subgroup: bool = False) -> 'AbstractPoint':
+		"""
+		Sum of p_i * s_i using Straus' method, the wNAF digits of all the
+		scalars are interleaved so they share one chain of doublings. When the
+		caller knows the points are in the prime order subgroup, and the curve
+		has a GLV endomorphism, each scalar is reduced modulo the group order
+		and split in two, halving the length of the chain.
+		"""
+		glv = cls.glv_endomorphism() if subgroup else None
+		expansions = list()
+		for p, s in terms:
+			s = int(s)
+			if not p or not s:
+				continue
+			if glv is not None:
+				beta, lam = glv
+				s, s2 = glv_decompose(s % cls.order(), lam, cls.order())
+				split = [(p, s), (type(p)(p.x * beta, p.y), s2)]
+			else:
+				split = [(p, s)]
+			for p, s in split:
+				if s < 0:
+					p, s = p.neg(), -s
+				if s:
+					width = 4 if s.bit_length() <= 256 else 5
+					expansions.append((_odd_multiples(p, width), wnaf(s, width)))
+		result = cls.zero()
+		for i in reversed(range(max((len(digits) for _, digits in expansions), default=0))):
+			if result:
+				result = result.double()
+			for table, digits in expansions:
+				d = digits[i] if i < len(digits) else 0
+				if d:
+					result = _add(result, table[d // 2] if d > 0 else table[-d // 2].neg())
+		return result
+
+	def mul2(self, a, Q: 'AbstractPoint', b, subgroup: bool = False) -> 'AbstractPoint':
+		"""a*self + b*Q, with one doubling chain shared by both scalars, see `multi_mul` for `subgroup`"""
+		return self.multi_mul([(self, a), (Q, b)], subgroup)
+
 	def mul(self, scalar):
 		scalar = int(scalar)
 		if scalar == 1:
@@ -74,6 +189,149 @@ class AbstractPoint(object):
 			scalar = scalar // 2
 		return a
 
+	@classmethod
+	def generator_table(cls) -> List['AbstractPoint']:
+		"""Multiples 2^i * G of the generator, for each bit of the group order"""
+		table = _GENERATOR_TABLES.get(cls)
+		if table is None:
+			table = _GENERATOR_TABLES[cls] = doubling_table(cls.generator(), cls.order().bit_length())
+		return table
+
+	@classmethod
+	def mul_base(cls, scalar):
+		"""Multiplies the generator using its precomputed table, with additions only"""
+		scalar = int(scalar) % cls.order()
+		result = cls.zero()
+		for i, p in enumerate(cls.generator_table()):
+			if (scalar >> i) & 1:
+				result = _add(result, p)
+		return result
+
+	@classmethod
+	def msm_accumulator(cls, chunk_size: int = 1024, window: int = None) -> 'MSMAccumulator':
+		"""Streaming multi-scalar multiplication, for more pairs than fit in memory"""
+		return MSMAccumulator(cls, chunk_size, window)
+
+	@classmethod
+	@profiled('group.msm')
+	def msm(cls, pairs: Sequence[Tuple['AbstractPoint', int]]):
+		"""
+		Multi-scalar multiplication, sum of p_i * s_i
+
+		Uses Pippenger's bucket method, each window of `c` bits costs one
+		addition per term plus 2^(c+1) additions to combine the buckets.
+		Repeated points are merged first by adding their scalars.
+		"""
+		merged = dict()
+		for p, s in pairs:
+			if p:
+				merged[p] = merged.get(p, 0) + int(s)
+		# Buckets only take non-negative digits
+		pairs = [(p, s) if s > 0 else (p.neg(), -s) for p, s in merged.items() if s]
+		if len(pairs) < 4:
+			return cls.multi_mul(pairs)
+		max_bits = max(s.bit_length() for _, s in pairs)
+		c = max(2, len(pairs).bit_length() - 2)
+		mask = (1 << c) - 1
+		result = cls.zero()
+		for offset in reversed(range(0, max_bits, c)):
+			for _ in range(c):
+				if result:
+					result = result.double()
+			buckets = [None] * mask
+			for p, s in pairs:
+				idx = (s >> offset) & mask
+				if idx:
+					buckets[idx-1] = _add(buckets[idx-1], p)
+			running = window = None
+			for bucket in reversed(buckets):
+				running = _add(running, bucket)
+				window = _add(window, running)
+			result = _add(result, window)
+		return result
+
+
+def _point_key(point: AbstractPoint) -> tuple:
+	# Coordinates as integers, for grouping equal points
+	return tuple(tuple(int(_) for _ in coord.coeffs) if hasattr(coord, 'coeffs') else int(coord)
+				 for coord in point)
+
+
+def _add(a: AbstractPoint, b: AbstractPoint) -> AbstractPoint:
+	# Addition where either side may be the point at infinity
+	if not a:
+		return b
+	return a.add(b)
+
+
+class MSMAccumulator(object):
+	"""
+	Sum of p_i * s_i over an iterable of pairs, consumed `chunk_size` pairs
+	at a time
+
+	Uses the bucket method of `AbstractPoint.msm` with the buckets of every
+	window kept between chunks, so they are only combined once, by
+	`finalize`. Memory is bounded by the chunk and the buckets, 2^c - 1 per
+	window of `c` bits, whatever the number of pairs.
+
+		acc = G1.msm_accumulator()
+		acc.update(pairs_from_file())
+		commitment = acc.finalize()
+	"""
+
+	def __init__(self, point_class, chunk_size: int = 1024, window: int = None):
+		if chunk_size < 1:
+			raise ValueError("Chunk size must be positive")
+		self.point_class = point_class
+		self.chunk_size = chunk_size
+		self.window = window or max(2, chunk_size.bit_length() - 2)
+		self.count = 0
+		# Buckets of each window, least significant first, added as longer scalars arrive
+		self._buckets = list()
+
+	def update(self, pairs: Iterable[Tuple[AbstractPoint, int]]) -> 'MSMAccumulator':
+		pairs = iter(pairs)
+		while True:
+			chunk = list(islice(pairs, self.chunk_size))
+			if not chunk:
+				return self
+			self._accumulate(chunk)
+
+	def _accumulate(self, chunk: List[Tuple[AbstractPoint, int]]):
+		c = self.window
+		mask = (1 << c) - 1
+		buckets = self._buckets
+		for p, s in chunk:
+			s = int(s)
+			if not p or not s:
+				continue
+			if s < 0:
+				p, s = p.neg(), -s
+			self.count += 1
+			i = 0
+			while s:
+				idx = s & mask
+				if idx:
+					while i >= len(buckets):
+						buckets.append([None] * mask)
+					buckets[i][idx-1] = _add(buckets[i][idx-1], p)
+				s >>= c
+				i += 1
+
+	def finalize(self) -> AbstractPoint:
+		"""The sum so far, more pairs may still be added afterwards"""
+		result = self.point_class.zero()
+		for buckets in reversed(self._buckets):
+			for _ in range(self.window):
+				if result:
+					result = result.double()
+			running = window = None
+			for bucket in reversed(buckets):
+				running = _add(running, bucket)
+				window = _add(window, running)
+			result = _add(result, window)
+		return result
+
 
 class AbstractPointG1(AbstractPoint):
 	def pairing(self, other: 'AbstractPointG2'):
@@ -106,7 +364,93 @@ class AbstractGroup(object):
 		raise NotImplementedError
 
 	@classmethod
-	def pairing(cls, a: AbstractPointG1, b: AbstractPointG2):
-		assert isinstance(a, self.G1())
-		assert isinstance(b, self.G2())
+	def cyclotomic(cls):
+		"""Returns class for pairing results, the cyclotomic subgroup of GT().field()"""
+		return make_cyclotomic(cls.GT().field(), cls.order())
+
+	@classmethod
+	def miller_loop(cls, a: AbstractPointG1, b: AbstractPointG2):
+		"""Miller loop without the final exponentiation, result is in GT().field()"""
 		raise NotImplementedError
+
+	@classmethod
+	def final_exponentiation(cls, f):
+		raise NotImplementedError
+
+	@classmethod
+	def pairing(cls, a: AbstractPointG1, b: AbstractPointG2):
+		assert isinstance(a, cls.G1())
+		assert isinstance(b, cls.G2())
+		return cls.final_exponentiation(cls.miller_loop(a, b))
+
+	@classmethod
+	def pairing_check(cls, pairs: Sequence[Tuple[AbstractPointG1, AbstractPointG2]], pool=None) -> bool:
+		"""
+		Verifies that the product of e(a_i, b_i) is one, sharing a single
+		final exponentiation between all pairs. Pairs containing the point
+		at infinity contribute nothing to the product and are skipped.
+
+		When a `pool.ParallelExecutor` is given the Miller loops are split
+		across its worker processes.
+		"""
+		if pool is not None:
+			return pool.pairing_check(cls, pairs)
+		with span('group.pairing_check'):
+			one = cls.GT().field().one()
+			f = one
+			for a, b in pairs:
+				if not a or not b:
+					continue
+				f = f * cls.miller_loop(a, b)
+			return cls.final_exponentiation(f) == one
+
+	@classmethod
+	def _combined_check(cls, equations: Sequence[Sequence[Tuple[AbstractPointG1, AbstractPointG2]]],
+						bits: int, pool=None) -> bool:
+		# Checks prod_i (prod_j e(a_ij, b_ij))^r_i == 1 for random r_i, the first r_i is 1
+		terms = dict()
+		for i, pairs in enumerate(equations):
+			r = 1 if i == 0 else secrets.randbits(bits) | 1
+			for a, b in pairs:
+				if a and b:
+					terms.setdefault(_point_key(b), (b, list()))[1].append((a, r))
+		# Terms sharing a G2 point are merged with one small-scalar MSM on G1
+		pairs = [(cls.G1().msm(g1_terms), b) for b, g1_terms in terms.values()]
+		return cls.pairing_check(pairs, pool=pool)
+
+	@classmethod
+	def batch_pairing_check(cls, equations: Sequence[Sequence[Tuple[AbstractPointG1, AbstractPointG2]]],
+							bits: int = 64, pool=None) -> List[bool]:
+		"""
+		Verifies many pairing-product equations, each a list of pairs whose
+		pairings should multiply to one, returning whether each one holds.
+
+		The equations are combined with random `bits`-bit exponents into a
+		single multi-pairing check, so all of them share one final
+		exponentiation, and pairings with the same G2 point share one Miller
+		loop. An invalid equation is missed with probability about 2^-bits.
+		If the combined check fails the invalid equations are found by
+		bisection. All points must be in the prime order subgroups.
+		"""
+		results = [True] * len(equations)
+
+		def bisect(indices: List[int], known_invalid: bool):
+			if len(indices) == 1 and known_invalid:
+				results[indices[0]] = False
+				return
+			if not known_invalid and cls._combined_check([equations[i] for i in indices], bits, pool):
+				return
+			if len(indices) == 1:
+				results[indices[0]] = False
+				return
+			half = len(indices) // 2
+			left, right = indices[:half], indices[half:]
+			left_valid = cls._combined_check([equations[i] for i in left], bits, pool)
+			if not left_valid:
+				bisect(left, True)
+			# When the left half is valid the failure must be in the right half
+			bisect(right, left_valid)
+
+		if equations:
+			bisect(list(range(len(equations))), False)
+		return results
@@ -0,0 +1,205 @@
+"""
+Ate pairing of MNT-style curves with embedding degree k = 4 or 6
+
+This covers MNT4, MNT6 and curves built the same way, such as SW6. G2 is
+the quadratic twist y^2 = x^3 + a*u^2*x + b*u^3 over Fq^(k/2) = Fq[u]/(u^(k/2) - n),
+for a non-residue n. It maps into E(Fq^k), with Fq^k = Fq[w]/(w^k - n)
+and u = w^2, by (x, y) -> (x / w^2, y / w^3).
+
+The Miller loop keeps its point on the twist, and its accumulator as even
+and odd parts over Fq^(k/2), f = F0 + w*F1. The line with slope lambda
+through R is evaluated at P and scaled by u^2, which the final
+exponentiation removes. The result is
+
+	yP*u^2 + w*((lambda*xR - yR) - xP*(lambda*u))
+
+Only yP and xP come from the G1 point, so the lines of a G2 point are
+prepared once and reused for each G1 point it is paired with. In pool
+workers prepared lines are also published to the `shared.SharedStore`, so
+other workers map them rather than preparing them again.
+
+The final exponent (q^k - 1)/r splits into two parts:
+
+ - the easy part is q^2 - 1 for MNT4 and (q^3 - 1)(q + 1) for MNT6; it
+   costs one inversion in Fq^(k/2) and a Frobenius map
+ - the hard part is Phi_k(q)/r = w1*q + w0; it is one cyclotomic
+   multi-exponentiation of f^q and f by w1 and w0
+"""
+
+import threading
+from collections import OrderedDict
+from typing import List, Tuple
+
+from .constants import params_digest, point_to_ints
+from .cyclotomic import make_cyclotomic
+from .group import _point_key
+from .profiling import profiled
+from .shared import shared_store
+
+
+# Precomputed line: whether the step doubles first, lambda*xR - yR and lambda*u
+Line = Tuple[bool, object, object]
+
+
+def cyclotomic_polynomial(k: int, q: int) -> int:
+	"""Phi_k(q) for the embedding degrees of MNT curves"""
+	if k == 4:
+		return q*q + 1
+	elif k == 6:
+		return q*q - q + 1
+	raise ValueError(f"Embedding degree {k} is not supported")
+
+
+class MNTPairing(object):
+	"""
+	Ate pairing f_{T,Q}(P)^((q^k - 1)/r), with T = t - 1 the ate loop count.
+	`w0` may be negative, when omitted w1 and w0 are the digits of the hard
+	part in base q.
+	"""
+
+	def __init__(self, Fqh, Fqk, non_residue: int, order: int, ate_loop_count: int,
+				 ate_is_negative: bool = False, w0: int = None, w1: int = None, cache_size: int = 64):
+		q = Fqk.field_modulus
+		k = Fqk.degree
+		if Fqh.degree * 2 != k:
+			raise ValueError("Twist must be defined over half of the embedding degree")
+		if (q - 1) % k != 0:
+			raise ValueError(f"Field modulus must be 1 modulo {k}")
+		if ate_loop_count < 2:
+			raise ValueError("Loop parameter is too small")
+		phi = cyclotomic_polynomial(k, q)
+		if phi % order != 0:
+			raise ValueError(f"Group order does not divide Phi_{k}(q), embedding degree is not {k}")
+		hard = phi // order
+		if w0 is None or w1 is None:
+			w1, w0 = divmod(hard, q)
+		exponent = (w1 * q) + w0
+		if exponent % hard != 0 or (exponent // hard) % order == 0:
+			raise ValueError("Final exponent parameters do not match the curve")
+		self.Fqh = Fqh
+		self.Fqk = Fqk
+		self.k = k
+		self.non_residue = non_residue
+		self.order = order
+		self.ate_loop_count = ate_loop_count
+		self.ate_is_negative = ate_is_negative
+		self.w0 = w0
+		self.w1 = w1
+		self.Cyclotomic = make_cyclotomic(Fqk, order)
+		# w^(q-1) = n^((q-1)/k), so the Frobenius map scales the coefficient of w^i
+		self.frobenius_coeffs = [pow(non_residue, (i * (q - 1)) // k, q) for i in range(k)]
+		self.cache_size = cache_size
+		self._digest = params_digest([q, [int(_) for _ in Fqh.modulus_coeffs], non_residue, ate_loop_count], 64)
+		self._prepared = OrderedDict()
+		self._lock = threading.Lock()
+
+	def _mul_by_u(self, x):
+		# Shift, with u^(k/2) = n
+		coeffs = x.coeffs
+		return self.Fqh([coeffs[-1] * self.non_residue] + list(coeffs[:-1]))
+
+	def _lines(self, Q) -> List[Line]:
+		lines = list()
+		R = Q
+		T = self.ate_loop_count
+		for i in range(T.bit_length() - 2, -1, -1):
+			lam, R2 = _step(R, R)
+			lines.append((True, lam * R.x - R.y, self._mul_by_u(lam)))
+			R = R2
+			if (T >> i) & 1:
+				lam, R2 = _step(R, Q)
+				lines.append((False, lam * R.x - R.y, self._mul_by_u(lam)))
+				R = R2
+		return lines
+
+	def _load_lines(self, store, key: str, Q) -> List[Line]:
+		tables = store.get(key)
+		# The point is compared too, the lines must never be those of another point
+		if tables is None or 'point' not in tables or tables.get('point') != point_to_ints(Q):
+			return None
+		h = self.Fqh.degree
+		c, lam_u = tables.get('c'), tables.get('lam_u')
+		return [(bool(doubling), self.Fqh._from_ints(c[i:i+h]), self.Fqh._from_ints(lam_u[i:i+h]))
+				for doubling, i in zip(tables.get('doubling'), range(0, len(c), h))]
+
+	def _store_lines(self, store, key: str, Q, lines: List[Line]):
+		store.put(key, dict(
+			point=point_to_ints(Q),
+			doubling=[int(doubling) for doubling, _, _ in lines],
+			c=[int(x) for _, c, _ in lines for x in c.coeffs],
+			lam_u=[int(x) for _, _, lam_u in lines for x in lam_u.coeffs]))
+
+	def prepare(self, Q) -> List[Line]:
+		"""Lines of the Miller loop for a G2 point, recently used points are cached"""
+		key = _point_key(Q)
+		with self._lock:
+			lines = self._prepared.get(key)
+			if lines is not None:
+				self._prepared.move_to_end(key)
+				return lines
+		store = shared_store()
+		if store is None:
+			lines = self._lines(Q)
+		else:
+			shared_key = f'mnt-lines-{self._digest}-{params_digest(key, 64)}'
+			lines = self._load_lines(store, shared_key, Q)
+			if lines is None:
+				lines = self._lines(Q)
+				self._store_lines(store, shared_key, Q, lines)
+		with self._lock:
+			self._prepared[key] = lines
+			while len(self._prepared) > self.cache_size:
+				self._prepared.popitem(last=False)
+		return lines
+
+	@profiled('pairing.miller_loop')
+	def miller_loop(self, P, Q):
+		if not P or not Q:
+			return self.Fqk.one()
+		mul_by_u = self._mul_by_u
+		xP, yP = int(P.x), int(P.y)
+		f0, f1 = self.Fqh.one(), self.Fqh.zero()
+		for doubling, c, lam_u in self.prepare(Q):
+			if doubling:
+				f0, f1 = f0 * f0 + mul_by_u(f1 * f1), (f0 * f1) * 2
+			e = c - lam_u * xP
+			# (F0 + w*F1) * (yP*u^2 + w*e)
+			f0, f1 = mul_by_u(mul_by_u(f0)) * yP + mul_by_u(f1 * e), f0 * e + mul_by_u(mul_by_u(f1)) * yP
+		if self.ate_is_negative:
+			# f_{-T} is 1/f_T up to a vertical line, the conjugate is the inverse after the final exponentiation
+			f1 = -f1
+		return self.Fqk([c for pair in zip(f0.coeffs, f1.coeffs) for c in pair])
+
+	def frobenius(self, x):
+		"""x^q of a cyclotomic element"""
+		gamma = self.frobenius_coeffs
+		Fsub = self.Cyclotomic.Fsub
+		return self.Cyclotomic._from_parts(Fsub([c * g for c, g in zip(x.a.coeffs, gamma[0::2])]),
+										   Fsub([c * g for c, g in zip(x.b.coeffs, gamma[1::2])]))
+
+	@profiled('pairing.final_exponentiation')
+	def final_exponentiation(self, f):
+		"""Returns the result as an element of the cyclotomic subgroup"""
+		Cyclotomic = self.Cyclotomic
+		Fsub = Cyclotomic.Fsub
+		coeffs = [int(_) for _ in f.coeffs]
+		a, b = Fsub(coeffs[0::2]), Fsub(coeffs[1::2])
+		# f^(q^(k/2) - 1) = conj(f) / f = conj(f)^2 / N(f), with N(f) = a^2 - u*b^2
+		aa, ubb = a * a, Cyclotomic._mul_by_s(b * b)
+		norm_inv = (aa - ubb).inv()
+		g = Cyclotomic._from_parts((aa + ubb) * norm_inv, (a * b) * -2 * norm_inv)
+		if self.k == 6:
+			g = self.frobenius(g) * g
+		return Cyclotomic.multi_pow([(self.frobenius(g), self.w1), (g, self.w0)])
+
+
+def _step(R, S):
+	# Slope of the line through R and S, or of the tangent at R, and R + S
+	if R.x != S.x:
+		lam = (S.y - R.y) / (S.x - R.x)
+	elif R.y == S.y:
+		lam = (3 * R.x**2 + R.PARAM_A) / (2 * R.y)
+	else:
+		raise ValueError("Miller loop reached the point at infinity, G2 point is not in the subgroup")
+	x3 = lam**2 - R.x - S.x
+	return lam, type(R)(x3, lam * (R.x - x3) - R.y)
@@ -1,4 +1,7 @@
 from .group import AbstractPointG2, AbstractPointG1, AbstractGroup
+from .profiling import profiled
+from .chains import chain_pow
+from .cyclotomic import has_conjugation, make_cyclotomic
 from math import log2, floor
 
 
@@ -17,8 +20,8 @@ def linefunc(P1, P2, T):
         m = (y2 - y1) / (x2 - x1)
         return m * (xt - x1) - (yt - y1)
     elif y1 == y2:
-        # Doubling
-        m = 3 * x1**2 / (2 * y1)
+        # Doubling, the tangent of y^2 = x^3 + a4*x + a6
+        m = (3 * x1**2 + P1.PARAM_A) / (2 * y1)
         return m * (xt - x1) - (yt - y1)
     # P2 == -P1 or visa versa
     return xt - x1
@@ -37,6 +40,7 @@ Compute the function f_{s,P} for s > 0
 """
 
 
+@profiled('pairing.miller_loop')
 def ate_miller_loop(Q, P, ate_loop_count, field_class):
     """
     Ate pairing
@@ -60,14 +64,24 @@ def ate_miller_loop(Q, P, ate_loop_count, field_class):
     return f
 
 
-def ate_pairing(Q: AbstractPointG2, P: AbstractPointG1, group: AbstractGroup, ate_loop_count: int):
+@profiled('pairing.final_exponentiation')
+def final_exponentiation(f, group: AbstractGroup):
     field_class = group.GT().field()
     field_modulus = field_class.field_modulus
     curve_order = group.order()
     degree = field_class.degree
-    assert degree % 2 == 0  # degree must be even
-    pkm1 = (field_modulus**degree) - 1
-    assert (pkm1 % curve_order) == 0
+    if degree % 2 != 0:
+        raise ValueError("Embedding degree must be even")
+    exponent, remainder = divmod((field_modulus**degree) - 1, curve_order)
+    if remainder:
+        raise ValueError("Group order does not divide q^k - 1")
+    if has_conjugation(field_class):
+        return make_cyclotomic(field_class, curve_order).final_exponentiation(f).value
+    return chain_pow(f, exponent)
+
+
+def ate_pairing(Q: AbstractPointG2, P: AbstractPointG1, group: AbstractGroup, ate_loop_count: int):
+    field_class = group.GT().field()
 
     # Final exponentiation after miller loop
-    return ate_miller_loop(Q, P, ate_loop_count, field_class)**(pkm1//curve_order)
+    return final_exponentiation(ate_miller_loop(Q, P, ate_loop_count, field_class), group)
@@ -1,13 +1,18 @@
-from typing import Union, Callable, Any
+import io
+import mmap
+from typing import Union, Callable, Any, List, Optional, Tuple, BinaryIO
 
-from .ops import AnyOp, Operation, G1Prefix, G2Prefix, G1AddOp, G1MulOp, G1MultiExpOp, G1Op
-from .ops import G2AddOp, G2MulOp, G2MultiExpOp, G2Op
-from .ops import G1Point, G2Point, TwistType, CurveFamily
-from .structs import 
-from .fields import Fq, Fqk
+from .structs import AnyOp, Operation, G1Prefix, G2Prefix, G1AddOp, G1MulOp, G1MultiExpOp, G1Op
+from .structs import G2AddOp, G2MulOp, G2MultiExpOp, G2Op, PairingOp, MNTPairingOp, AnyPairingOp
+from .structs import G1Point, G2Point, TwistType, CurveFamily
+from .field import is_nth_power
+from .profiling import profiled
 
 
-def _make_int(data: bytes) -> int:
+Input = Union[bytes, bytearray, memoryview, mmap.mmap, BinaryIO]
+
+
+def _make_int(data: memoryview) -> int:
 	return int.from_bytes(data, 'big')
 
 
@@ -18,44 +23,115 @@ EXTENSION_DEGREE_ENCODING_LENGTH = 1
 BYTES_FOR_LENGTH_ENCODING = 1
 
 
-def is_non_nth_root(divisor, modulus):
+def is_non_nth_root(x: int, modulus: int, n: int) -> bool:
+	x = x % modulus
 	if x == 0:
 		return False
-	quotient, remainder = divmod(modulus-1, divisor)
-	if remainder == 0:
+	if (modulus - 1) % n != 0:
 		return False
-	l = pow(divisor, quotient, modulus)
-	return l != 1
+	return not is_nth_power(x, n, modulus)
+
+
+def _as_view(data: Input) -> Tuple[memoryview, int, Optional[mmap.mmap], int]:
+	"""
+	Returns a byte-oriented view of the input, the offset to start reading
+	from, the mapping to close when done, if any, and the position of the
+	start of the view in a seekable stream, or -1
+
+	Buffers are wrapped without copying. Streams backed by a regular file are
+	memory-mapped from their current position, other streams are read fully.
+	"""
+	if isinstance(data, (bytes, bytearray, memoryview, mmap.mmap)):
+		return memoryview(data).cast('B'), 0, None, -1
+	if not hasattr(data, 'read'):
+		raise TypeError(f'Cannot parse from {type(data).__name__}')
+	try:
+		start = data.tell()
+	except (AttributeError, OSError, ValueError, io.UnsupportedOperation):
+		start = -1
+	if start >= 0:
+		try:
+			mapped = mmap.mmap(data.fileno(), 0, access=mmap.ACCESS_READ)
+		except (AttributeError, OSError, ValueError, io.UnsupportedOperation):
+			pass
+		else:
+			return memoryview(mapped), start, mapped, 0
+	return memoryview(data.read()).cast('B'), 0, None, start
+
+
+def read_input(data: Input) -> bytes:
+	"""The bytes of the input from its current position, a stream is consumed to its end"""
+	if isinstance(data, bytes):
+		return data
+	with StreamParser(data) as parser:
+		result = bytes(parser.data[parser.offset:])
+		parser.offset = len(parser.data)
+	return result
 
 
 class StreamParser(object):
-	def __init__(self, data: bytes):
-		self.data = data
+	"""
+	Parser of EIP-1962 calldata from a buffer or a binary stream
+
+	When parsing from a stream, use the parser as a context manager: on exit
+	the stream is positioned after the bytes consumed and a memory-mapped
+	file is closed.
+	"""
+	__slots__ = ('data', 'offset', '_stream', '_mapped', '_base')
+
+	def __init__(self, data: Input):
+		self.data, self.offset, self._mapped, self._base = _as_view(data)
+		self._stream = data if self._base >= 0 else None
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, *exc):
+		self.release()
+
+	def release(self):
+		"""Release the underlying buffer, closing a mapping and seeking the stream past the consumed bytes"""
+		self.data.release()
+		if self._mapped is not None:
+			self._mapped.close()
+			self._mapped = None
+		if self._stream is not None:
+			self._stream.seek(self._base + self.offset)
+			self._stream = None
+
+	@property
+	def remaining(self) -> int:
+		return len(self.data) - self.offset
 
 	def _consume(self, n: int, parsefn: Callable) -> Any:
-		if len(calldata) < n:
-			raise RuntimeError(f'Could not read {n} bytes, only {len(calldata)} remaining')
-		obj = callfn(calldata[:n])
-		self.data = calldata[n:]
+		start = self.offset
+		end = start + n
+		if end > len(self.data):
+			raise RuntimeError(f'Could not read {n} bytes, only {len(self.data) - start} remaining')
+		obj = parsefn(self.data[start:end])
+		self.offset = end
 		return obj
 
 	def _consume_int(self, n_bytes: int) -> int:
-		return self._consume(n_bytes, _make_int)
+		start = self.offset
+		end = start + n_bytes
+		if end > len(self.data):
+			raise RuntimeError(f'Could not read {n_bytes} bytes, only {len(self.data) - start} remaining')
+		self.offset = end
+		return int.from_bytes(self.data[start:end], 'big')
 
 	def _consume_many_int(self, n_bytes: int, count: int) -> List[int]:
-		return [self._consume_int(n_bytes) for _ in range(count)]
-
-	def _consume_Fq(self, n_bytes: int, field_modulus: int) -> Fq:
-		return Fq(self._consume_int(n_bytes), field_modulus)
-
-	def _consume_Fqk(self, n_bytes: int, extension_degree: int, field_modulus: int, modulus_coeffs) -> Fqk:
-		coeffs = [self._consume_int(n_bytes) for _ in range(extension_degree)]
-		return Fqk(coeffs, modulus_coeffs, field_modulus)
+		start = self.offset
+		end = start + (n_bytes * count)
+		if end > len(self.data):
+			raise RuntimeError(f'Could not read {n_bytes * count} bytes, only {len(self.data) - start} remaining')
+		data = self.data
+		self.offset = end
+		return [int.from_bytes(data[i:i+n_bytes], 'big')
+				for i in range(start, end, n_bytes)]
 
 	def g1_point(self, prefix: G1Prefix) -> G1Point:
-		x = self._consume_Fq(prefix.field_length, prefix.field_modulus)
-		y = self._consume_Fq(prefix.field_length, prefix.field_modulus)
-		return G1Point(x, y)
+		return G1Point(*self._consume_many_int(prefix.field_length, 2))
 
 	def g1_prefix(self) -> G1Prefix:
 		field_length = self._consume_int(BYTES_FOR_LENGTH_ENCODING)
@@ -65,11 +141,11 @@ class StreamParser(object):
 		return G1Prefix(field_length, field_modulus, A, B, order_length, order)
 
 	def g1_add_op(self, prefix: G1Prefix) -> G1AddOp:
-		return G1AddOp(self.g1_point(prefix), self.g1_point(prefix))
+		return G1AddOp(prefix, self.g1_point(prefix), self.g1_point(prefix))
 
 	def g1_point_and_scalar(self, prefix: G1Prefix) -> Tuple[G1Point, int]:
 		point = self.g1_point(prefix)
-		scalar = self._consume_Fq(prefix.order_length, prefix.field_modulus)
+		scalar = self._consume_int(prefix.order_length)
 		return (point, scalar)
 
 	def g1_mul_op(self, prefix: G1Prefix) -> G1MulOp:
@@ -94,17 +170,19 @@ class StreamParser(object):
 		field_length = self._consume_int(BYTES_FOR_LENGTH_ENCODING)
 		field_modulus = self._consume_int(field_length)
 		extension_degree = self._consume_int(EXTENSION_DEGREE_ENCODING_LENGTH)
-		non_residue, A, B = self._consume_many_int(field_length, 3)
+		non_residue = self._consume_int(field_length)
+		A = self._consume_many_int(field_length, extension_degree)
+		B = self._consume_many_int(field_length, extension_degree)
 		order_length = self._consume_int(BYTES_FOR_LENGTH_ENCODING)
 		order = self._consume_int(order_length)
-		return G2Prefix(field_length, field_modulus, non_residue, A, B, order_length, order)
+		return G2Prefix(field_length, field_modulus, extension_degree, non_residue, A, B, order_length, order)
 
 	def g2_point(self, prefix: G2Prefix) -> G2Point:
 		x_coeffs = self._consume_many_int(prefix.field_length, prefix.extension_degree)
 		y_coeffs = self._consume_many_int(prefix.field_length, prefix.extension_degree)
 		return G2Point(x_coeffs, y_coeffs)
 
-	def g2_add_op(self, prefix: G2Prefix):
+	def g2_add_op(self, prefix: G2Prefix) -> G2AddOp:
 		return G2AddOp(prefix, self.g2_point(prefix), self.g2_point(prefix))
 
 	def g2_point_and_scalar(self, prefix: G2Prefix) -> Tuple[G2Point, int]:
@@ -113,7 +191,7 @@ class StreamParser(object):
 		return (point, scalar)
 
 	def g2_mul_op(self, prefix: G2Prefix) -> G2MulOp:
-		return G2MulOp(*self.g2_point_and_scalar(prefix))
+		return G2MulOp(prefix, *self.g2_point_and_scalar(prefix))
 
 	def g2_multiexp_op(self, prefix: G2Prefix) -> G2MultiExpOp:
 		num_pairs = self._consume_int(1)
@@ -129,55 +207,100 @@ class StreamParser(object):
 		elif op == Operation.G2_MULTIEXP:
 			return self.g2_multiexp_op(prefix)
 
-	def g1_g2_pair(self, g1_prefix: G1Prefix, g2_prefix: G2Prefix):
-		pass
+	def g1_g2_pair(self, field_length: int, extension_degree: int) -> Tuple[G1Point, G2Point]:
+		g1 = G1Point(*self._consume_many_int(field_length, 2))
+		g2 = G2Point(self._consume_many_int(field_length, extension_degree),
+					 self._consume_many_int(field_length, extension_degree))
+		return (g1, g2)
 
-	def pairing_bls12(self, field_length: int, field_modulus: int):
+	def pairing_bls12(self, curve_type: CurveFamily, field_length: int, field_modulus: int) -> PairingOp:
 		A, B = self._consume_many_int(field_length, 2)
 		if A != 0:
-			raise ValueError("A parameter must be zero for BLS12 curve")
+			raise ValueError(f"A parameter must be zero for {curve_type.name} curve")
 		order_length = self._consume_int(BYTES_FOR_LENGTH_ENCODING)
 		order = self._consume_int(order_length)
 		if order == 0:
 			raise ValueError("Group order is zero")
 
-		fp_non_residue = self._consume_int(field_length)
-		is_not_a_square = is_non_nth_root(fp_non_residue, field_modulus)
-		if not is_not_a_square:
+		fp2_non_residue = self._consume_int(field_length)
+		if not is_non_nth_root(fp2_non_residue, field_modulus, 2):
 			raise ValueError("Non-residue for Fp2 is actually a residue")
 
+		fp6_non_residue = self._consume_many_int(field_length, 2)
+		twist_type = TwistType(self._consume_int(TWIST_TYPE_LENGTH))
+		x_length = self._consume_int(BYTES_FOR_LENGTH_ENCODING)
+		x = self._consume_int(x_length)
+		sign = self._consume_sign()
+		num_pairs = self._consume_int(1)
+		pairs = [self.g1_g2_pair(field_length, 2) for _ in range(num_pairs)]
+		return PairingOp(curve_type, field_length, field_modulus, A, B, order_length, order,
+						 fp2_non_residue, fp6_non_residue, twist_type, x_length, x, sign, num_pairs, pairs)
+
+	def pairing_bn(self, curve_type: CurveFamily, field_length: int, field_modulus: int) -> PairingOp:
+		# BN curves share the BLS12 encoding, with `u` in place of `x`
+		return self.pairing_bls12(curve_type, field_length, field_modulus)
+
+	def _consume_sign(self) -> int:
+		sign = self._consume_int(1)
+		if sign not in (0, 1):
+			raise ValueError(f"Unknown sign encoding {sign}")
+		return sign
+
+	def pairing_mnt(self, curve_type: CurveFamily, field_length: int, field_modulus: int,
+					extension_degree: int) -> MNTPairingOp:
+		A, B = self._consume_many_int(field_length, 2)
+		order_length = self._consume_int(BYTES_FOR_LENGTH_ENCODING)
+		order = self._consume_int(order_length)
+		if order == 0:
+			raise ValueError("Group order is zero")
+
+		non_residue = self._consume_int(field_length)
+		if not is_non_nth_root(non_residue, field_modulus, extension_degree):
+			raise ValueError(f"Non-residue for Fp{extension_degree} is actually a residue")
+
+		x_length = self._consume_int(BYTES_FOR_LENGTH_ENCODING)
+		x = self._consume_int(x_length)
+		sign = self._consume_sign()
+		exp_w0_length = self._consume_int(BYTES_FOR_LENGTH_ENCODING)
+		exp_w0 = self._consume_int(exp_w0_length)
+		exp_w1_length = self._consume_int(BYTES_FOR_LENGTH_ENCODING)
+		exp_w1 = self._consume_int(exp_w1_length)
+		exp_w0_sign = self._consume_sign()
+		num_pairs = self._consume_int(1)
+		pairs = [self.g1_g2_pair(field_length, extension_degree) for _ in range(num_pairs)]
+		return MNTPairingOp(curve_type, field_length, field_modulus, A, B, order_length, order, non_residue,
+							x_length, x, sign, exp_w0_length, exp_w0, exp_w1_length, exp_w1, exp_w0_sign,
+							num_pairs, pairs)
+
+	def pairing_mnt4(self, curve_type: CurveFamily, field_length: int, field_modulus: int) -> MNTPairingOp:
+		# G2 is defined over Fp2, with a non-residue for Fp2
+		return self.pairing_mnt(curve_type, field_length, field_modulus, 2)
+
+	def pairing_mnt6(self, curve_type: CurveFamily, field_length: int, field_modulus: int) -> MNTPairingOp:
+		# G2 is defined over Fp3, with a non-residue for Fp3
+		return self.pairing_mnt(curve_type, field_length, field_modulus, 3)
 
-	def pairing_op(self, op: Operation) -> PairingOp:
+	def pairing_op(self, op: Operation) -> AnyPairingOp:
 		curve_type = CurveFamily(self._consume_int(CURVE_TYPE_LENGTH))
 		field_length = self._consume_int(BYTES_FOR_LENGTH_ENCODING)
 		field_modulus = self._consume_int(field_length)
 
 		if curve_type == CurveFamily.BLS12:
-			return self.pairing_bls12(field_length, field_modulus)
+			return self.pairing_bls12(curve_type, field_length, field_modulus)
 		elif curve_type == CurveFamily.BN:
-			return self.pairing_bn(field_length, field_modulus)
+			return self.pairing_bn(curve_type, field_length, field_modulus)
 		elif curve_type == CurveFamily.MNT4:
-			return self.pairing_mnt4(field_length, field_modulus)
+			return self.pairing_mnt4(curve_type, field_length, field_modulus)
 		elif curve_type == CurveFamily.MNT6:
-			return self.pairing_mnt6(field_length, field_modulus)
-
-		A, B = self._consume_many_int(field_length, 2)
-		order_length = self._consume_int(BYTES_FOR_LENGTH_ENCODING)
-		order = self._consume_int(order_length)
-		fp2_non_residue = self._consume_int(field_length)
-		fp6_non_residue = self._consume_many_int(field_length, 2)
-		twist_type = TwistType(self._consume_int(TWIST_TYPE_LENGTH))
-		x_length = self._consume_int(1)
-		x = self._consume_int(x_length)
-		sign, num_pairs = self._consume_many_int(1, 2)
-		pairs = 
+			return self.pairing_mnt6(curve_type, field_length, field_modulus)
+		raise ValueError(f'Unsupported curve family {curve_type.name}')
 
+	@profiled('parse')
 	def parse(self) -> AnyOp:
 		op_code = self._consume(OPERATION_ENCODING_LENGTH, lambda data: Operation(_make_int(data)))
 		if op_code.is_g1:
 			return self.g1_op(op_code)
-		elif op_code.is_g1:
+		elif op_code.is_g2:
 			return self.g2_op(op_code)
 		elif op_code.is_pairing:
 			return self.pairing_op(op_code)
-
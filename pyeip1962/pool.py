@@ -0,0 +1,221 @@
+"""
+Process pool backend for executing batches of independent operations
+
+Work is sent to workers as parsed EIP-1962 structures, which only contain
+integers and enums so pickle cheaply. Field and curve classes are rebuilt
+in each worker from those parameters, through the worker's own context
+cache, rather than pickled. Scalar multiplications and pairings are
+submitted as `G1MulOp`/`G2MulOp` and `PairingOp` structures.
+
+Precomputed tables are not rebuilt by every worker. Curve constants are
+loaded by the parent before the workers start, and tables computed by a
+worker, such as prepared G2 lines, are published to a `shared.SharedStore`
+which the other workers map.
+"""
+
+import os
+import importlib
+from concurrent.futures import ProcessPoolExecutor
+from math import ceil
+from typing import Iterable, List, Sequence, Tuple, Union
+
+from . import constants, shared
+from .context import op_key, pairing_context
+from .executor import execute_ops, parse_many, decode_g1, decode_g2, check_subgroup, Result
+from .group import AbstractGroup, AbstractPoint
+from .parser import Input
+from .structs import AnyOp, AnyPairingOp, PAIRING_OPS, G1Prefix, G1AddOp, G2AddOp, G1MulOp, G2MulOp
+
+
+# Approximate cost of a point addition and a Fq12 multiplication, in base field multiplications
+ADD_COST = 60
+FQ12_MUL_COST = 144
+
+
+def estimate_cost(op: Union[AnyOp, Exception]) -> int:
+	"""
+	Rough cost of an operation, in base field multiplications weighted by
+	the square of the number of 64-bit limbs in the field.
+	"""
+	if isinstance(op, Exception):
+		return 0
+	limbs = ceil(op.field_length / 8) if isinstance(op, PAIRING_OPS) else ceil(op.prefix.field_length / 8)
+	if isinstance(op, PAIRING_OPS):
+		order_bits = op.order.bit_length()
+		subgroup_checks = order_bits * 3 * ADD_COST * (1 + 4)
+		miller_loop = op.x.bit_length() * 4 * FQ12_MUL_COST
+		final_exp = op.field_modulus.bit_length() * 12 * 2 * FQ12_MUL_COST
+		cost = (op.num_pairs * (subgroup_checks + miller_loop)) + final_exp
+	else:
+		k = 1 if isinstance(op.prefix, G1Prefix) else op.prefix.extension_degree
+		order_bits = op.prefix.order.bit_length()
+		if isinstance(op, (G1AddOp, G2AddOp)):
+			cost = ADD_COST
+		elif isinstance(op, (G1MulOp, G2MulOp)):
+			cost = order_bits * 2 * ADD_COST
+		else:
+			c = max(2, op.num_pairs.bit_length() - 2)
+			cost = (op.num_pairs + (2 << c)) * ceil(order_bits / c) * ADD_COST
+		cost *= k * k
+	return cost * limbs * limbs
+
+
+def chunk_by_cost(indices: Sequence[int], costs: Sequence[int], n_chunks: int) -> List[List[int]]:
+	"""Splits indices into consecutive chunks of roughly equal total cost"""
+	target = sum(costs[i] for i in indices) / max(1, n_chunks)
+	chunks = list()
+	current = list()
+	acc = 0
+	for i in indices:
+		current.append(i)
+		acc += costs[i]
+		if acc >= target:
+			chunks.append(current)
+			current = list()
+			acc = 0
+	if current:
+		chunks.append(current)
+	return chunks
+
+
+def _execute_chunk(ops: List[AnyOp]) -> List[Result]:
+	return execute_ops(ops)
+
+
+def _partition(items: Sequence, n_parts: int) -> List[Sequence]:
+	n_parts = max(1, min(n_parts, len(items)))
+	size, extra = divmod(len(items), n_parts)
+	parts = list()
+	start = 0
+	for i in range(n_parts):
+		end = start + size + (1 if i < extra else 0)
+		parts.append(items[start:end])
+		start = end
+	return parts
+
+
+def group_ref(group: AbstractGroup) -> Tuple[str, str]:
+	"""Picklable reference to a group class defined at module level"""
+	module = importlib.import_module(group.__module__)
+	if getattr(module, group.__qualname__, None) is not group:
+		raise TypeError(f'{group.__qualname__} is not importable from {group.__module__}')
+	return (group.__module__, group.__qualname__)
+
+
+def _resolve_group(ref: Tuple[str, str]) -> AbstractGroup:
+	module, name = ref
+	return getattr(importlib.import_module(module), name)
+
+
+def _point_coords(point: AbstractPoint) -> tuple:
+	return tuple([int(_) for _ in coord.coeffs] if hasattr(coord, 'coeffs') else int(coord)
+				 for coord in point)
+
+
+def _coeffs(f) -> List[int]:
+	return [int(_) for _ in f.coeffs]
+
+
+def _miller_product(ref: Tuple[str, str], pairs: Sequence[Tuple[tuple, tuple]]) -> List[int]:
+	group = _resolve_group(ref)
+	f = group.GT().field().one()
+	for a, b in pairs:
+		f = f * group.miller_loop(group.G1()(*a), group.G2()(*b))
+	return _coeffs(f)
+
+
+def _op_miller_product(op: AnyPairingOp) -> List[int]:
+	ctx = pairing_context(op)
+	f = ctx.GT.field().one()
+	for g1, g2 in op.pairs:
+		P, Q = decode_g1(ctx, g1), decode_g2(ctx, g2)
+		check_subgroup(P)
+		check_subgroup(Q)
+		if P and Q:
+			f = f * ctx.group.miller_loop(P, Q)
+	return _coeffs(f)
+
+
+class ParallelExecutor(object):
+	"""
+	Fans batches of operations out over a pool of worker processes
+
+	Operations on the same curve and of the same type are kept together so
+	each chunk still benefits from the batching done by `execute_ops`, and
+	the chunks are sized by estimated cost rather than count. Results are
+	returned in input order.
+	"""
+
+	def __init__(self, max_workers: int = None, chunks_per_worker: int = 4, share_tables: bool = True):
+		self.max_workers = max_workers or os.cpu_count() or 1
+		self.chunks_per_worker = chunks_per_worker
+		self.shared = shared.SharedStore.create() if share_tables else None
+		constants.load_all()
+		self._pool = ProcessPoolExecutor(self.max_workers, initializer=shared.attach,
+										 initargs=(self.shared and self.shared.directory,
+												   self.shared and self.shared.max_bytes))
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, *exc):
+		self.shutdown()
+
+	def shutdown(self, wait: bool = True):
+		self._pool.shutdown(wait=wait)
+		if self.shared is not None:
+			self.shared.close()
+
+	def submit(self, fn, *args):
+		return self._pool.submit(fn, *args)
+
+	def execute_ops(self, ops: Iterable[Union[AnyOp, Exception]]) -> List[Result]:
+		ops = list(ops)
+		results = list(ops)
+		groups = dict()
+		for i, op in enumerate(ops):
+			if not isinstance(op, Exception):
+				groups.setdefault((type(op), op_key(op)), list()).append(i)
+		indices = [i for group in groups.values() for i in group]
+		costs = [estimate_cost(op) for op in ops]
+		chunks = chunk_by_cost(indices, costs, self.max_workers * self.chunks_per_worker)
+		futures = [(chunk, self._pool.submit(_execute_chunk, [ops[i] for i in chunk]))
+				   for chunk in chunks]
+		for chunk, future in futures:
+			for i, result in zip(chunk, future.result()):
+				results[i] = result
+		return results
+
+	def execute_many(self, calldatas: Iterable[Input]) -> List[Result]:
+		return self.execute_ops(parse_many(calldatas))
+
+	def pairing_check(self, group: AbstractGroup, pairs: Sequence[Tuple[AbstractPoint, AbstractPoint]]) -> bool:
+		"""
+		Multi-pairing check with the Miller loops split across workers
+
+		Each worker computes the product of the Miller loops for its share
+		of the pairs, the parent multiplies the partial products and does a
+		single final exponentiation.
+		"""
+		ref = group_ref(group)
+		pairs = [(_point_coords(a), _point_coords(b)) for a, b in pairs if a and b]
+		futures = [self._pool.submit(_miller_product, ref, part)
+				   for part in _partition(pairs, self.max_workers)]
+		field_class = group.GT().field()
+		f = field_class.one()
+		for future in futures:
+			f = f * field_class(future.result())
+		return group.final_exponentiation(f) == field_class.one()
+
+	def execute_pairing(self, op: AnyPairingOp) -> bytes:
+		"""Executes a single EIP-1962 pairing operation, split across workers"""
+		if op.num_pairs == 0:
+			raise ValueError("Pairing with zero pairs")
+		ctx = pairing_context(op)
+		futures = [self._pool.submit(_op_miller_product, op._replace(pairs=part, num_pairs=len(part)))
+				   for part in _partition(op.pairs, self.max_workers)]
+		field_class = ctx.GT.field()
+		f = field_class.one()
+		for future in futures:
+			f = f * field_class(future.result())
+		return b'\x01' if ctx.group.final_exponentiation(f) == field_class.one() else b'\x00'
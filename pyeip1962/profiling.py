@@ -0,0 +1,190 @@
+"""
+Named profiling spans for the operation pipeline
+
+    configure(sample_rate=0.01, trace_allocations=False)
+    with span('parse'):
+        ...
+    PROFILER.to_prometheus()
+
+Spans record wall time, and optionally the change in memory traced by
+`tracemalloc`, into a latency histogram per span name. Sampling is decided
+once at the outermost span, nested spans follow that decision, so a
+sampled request is profiled completely and an unsampled one costs only a
+random number. When the sample rate is zero, the default, `span` returns a
+shared no-op context manager.
+"""
+
+import contextvars
+import functools
+import json
+import random
+import threading
+import time
+import tracemalloc
+from typing import Dict
+
+
+# Upper bounds of the latency histogram buckets, in seconds
+BUCKETS = (1e-5, 5e-5, 1e-4, 5e-4, 1e-3, 5e-3, 1e-2, 5e-2, 0.1, 0.5, 1.0, 5.0, 10.0, 60.0)
+
+# None outside of any span, otherwise whether the outermost span was sampled
+_sampled = contextvars.ContextVar('pyeip1962_span_sampled', default=None)
+
+
+class Histogram(object):
+    __slots__ = ('counts', 'count', 'total', 'alloc_bytes')
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.alloc_bytes = 0
+
+    def record(self, seconds: float, alloc_bytes: int = 0):
+        i = 0
+        while i < len(BUCKETS) and seconds > BUCKETS[i]:
+            i += 1
+        self.counts[i] += 1
+        self.count += 1
+        self.total += seconds
+        self.alloc_bytes += alloc_bytes
+
+    def as_dict(self) -> dict:
+        buckets = dict()
+        cumulative = 0
+        for bound, n in zip(list(BUCKETS) + ['+Inf'], self.counts):
+            cumulative += n
+            buckets[str(bound)] = cumulative
+        return dict(count=self.count, sum=self.total, alloc_bytes=self.alloc_bytes, buckets=buckets)
+
+
+class Profiler(object):
+    def __init__(self, sample_rate: float = 0.0, trace_allocations: bool = False):
+        self.sample_rate = sample_rate
+        self.trace_allocations = trace_allocations
+        self.histograms = dict()
+        self._lock = threading.Lock()
+
+    def record(self, name: str, seconds: float, alloc_bytes: int = 0):
+        with self._lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = Histogram()
+            histogram.record(seconds, alloc_bytes)
+
+    def reset(self):
+        with self._lock:
+            self.histograms.clear()
+
+    def as_dict(self) -> Dict[str, dict]:
+        with self._lock:
+            return {name: h.as_dict() for name, h in sorted(self.histograms.items())}
+
+    def to_json(self, **kwa) -> str:
+        return json.dumps(self.as_dict(), **kwa)
+
+    def to_prometheus(self, prefix: str = 'pyeip1962_span') -> str:
+        lines = [f'# HELP {prefix}_seconds Wall time spent in each profiling span',
+                 f'# TYPE {prefix}_seconds histogram']
+        spans = self.as_dict()
+        for name, h in spans.items():
+            for bound, n in h['buckets'].items():
+                lines.append(f'{prefix}_seconds_bucket{{span="{name}",le="{bound}"}} {n}')
+            lines.append(f'{prefix}_seconds_sum{{span="{name}"}} {h["sum"]}')
+            lines.append(f'{prefix}_seconds_count{{span="{name}"}} {h["count"]}')
+        if self.trace_allocations:
+            lines += [f'# HELP {prefix}_alloc_bytes Net memory allocated within each profiling span',
+                      f'# TYPE {prefix}_alloc_bytes counter']
+            for name, h in spans.items():
+                lines.append(f'{prefix}_alloc_bytes{{span="{name}"}} {h["alloc_bytes"]}')
+        return '\n'.join(lines) + '\n'
+
+
+PROFILER = Profiler()
+# Whether `configure` started tracemalloc, so it stops it again
+_started_tracing = False
+
+
+def configure(sample_rate: float = None, trace_allocations: bool = None) -> Profiler:
+    if sample_rate is not None:
+        PROFILER.sample_rate = sample_rate
+    global _started_tracing
+    if trace_allocations is not None:
+        PROFILER.trace_allocations = trace_allocations
+        if trace_allocations and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            _started_tracing = True
+        elif not trace_allocations and _started_tracing:
+            # Only a session started here, one started by the application is left running
+            tracemalloc.stop()
+            _started_tracing = False
+    return PROFILER
+
+
+class _NoopSpan(object):
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+class _UnsampledSpan(object):
+    # Outermost span which was not sampled, nested spans become no-ops
+    __slots__ = ('token',)
+
+    def __enter__(self):
+        self.token = _sampled.set(False)
+        return self
+
+    def __exit__(self, *exc):
+        _sampled.reset(self.token)
+        return False
+
+
+class _Span(object):
+    __slots__ = ('name', 'token', 'start', 'alloc')
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self):
+        self.token = _sampled.set(True)
+        self.alloc = tracemalloc.get_traced_memory()[0] if PROFILER.trace_allocations else 0
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self.start
+        alloc = (tracemalloc.get_traced_memory()[0] - self.alloc) if PROFILER.trace_allocations else 0
+        _sampled.reset(self.token)
+        PROFILER.record(self.name, elapsed, alloc)
+        return False
+
+
+_NOOP = _NoopSpan()
+
+
+def span(name: str):
+    if not PROFILER.sample_rate:
+        return _NOOP
+    sampled = _sampled.get()
+    if sampled is None:
+        if random.random() >= PROFILER.sample_rate:
+            return _UnsampledSpan()
+    elif not sampled:
+        return _NOOP
+    return _Span(name)
+
+
+def profiled(name: str):
+    """Decorator which records each call to the function as a span"""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwa):
+            with span(name):
+                return fn(*args, **kwa)
+        return wrapper
+    return decorator
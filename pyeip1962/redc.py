@@ -1,3 +1,6 @@
+from .profiling import profiled
+
+
 # Computes the GCD of a and b.
 def gcd(a, b):
 	while b:
@@ -16,6 +19,7 @@ def xgcd(a, b):
 	return a, prev_x, prev_y
 
 # Finds an R such that R = 2^k, R > N, for the smallest k.
+@profiled('field.mont_findR')
 def mont_findR(N, limb_size=64):
 	g = 0
 	b = 2 ** limb_size
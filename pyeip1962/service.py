@@ -0,0 +1,301 @@
+"""
+asyncio precompile service, with concurrent requests coalesced into batches
+
+Requests arriving within a short window, or until the batch is full, are
+decoded and executed together by `execute_many`, so calls on the same curve
+share batched inversions and subgroup checks, and their pairing checks are
+combined into one multi-pairing. Other calls, multi-scalar multiplications
+included, are still executed one by one, as each has its own result.
+Execution happens in an executor so the event loop stays responsive.
+
+Framing, all lengths are 4 byte big-endian:
+
+	request:  type (1 byte) | length | payload
+	response: status (1 byte) | length | payload
+
+Request type 0 executes the payload as EIP-1962 calldata, type 1 returns the
+service statistics as JSON. A response status of 0 means success, otherwise
+the payload is the error message.
+
+Results can be kept in a `cache.ResultCache`, so repeated calls are answered
+without being executed.
+"""
+
+import argparse
+import asyncio
+import json
+import struct
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import Callable, List, Optional, Sequence
+
+from .cache import ResultCache
+from .executor import execute_many, Result
+
+
+REQUEST_EXECUTE = 0
+REQUEST_STATS = 1
+
+STATUS_OK = 0
+STATUS_ERROR = 1
+
+_HEADER = struct.Struct('>BI')
+
+MAX_FRAME_LENGTH = 1 << 24
+
+
+class ServiceError(Exception):
+	pass
+
+
+class BatchStats(object):
+	def __init__(self):
+		self.requests = 0
+		self.errors = 0
+		self.batches = 0
+		self.max_batch_size = 0
+		# Histogram of batch sizes, bucketed by powers of two
+		self.batch_sizes = dict()
+
+	def record(self, results: Sequence[Result]):
+		size = len(results)
+		self.requests += size
+		self.errors += sum(1 for _ in results if isinstance(_, Exception))
+		self.batches += 1
+		self.max_batch_size = max(self.max_batch_size, size)
+		bucket = 1 << (size - 1).bit_length()
+		self.batch_sizes[bucket] = self.batch_sizes.get(bucket, 0) + 1
+
+	def as_dict(self) -> dict:
+		return dict(
+			requests=self.requests,
+			errors=self.errors,
+			batches=self.batches,
+			mean_batch_size=(self.requests / self.batches) if self.batches else 0,
+			max_batch_size=self.max_batch_size,
+			batch_sizes={str(k): v for k, v in sorted(self.batch_sizes.items())})
+
+
+class Coalescer(object):
+	"""
+	Collects concurrently submitted calls and executes them as one batch,
+	once `window` seconds have passed since the first call of the batch or
+	once `max_batch` calls are waiting.
+	"""
+
+	def __init__(self, execute_batch: Callable[[List[bytes]], List[Result]] = execute_many,
+				 window: float = 0.002, max_batch: int = 256, executor: Executor = None):
+		self.execute_batch = execute_batch
+		self.window = window
+		self.max_batch = max_batch
+		self.executor = executor or ThreadPoolExecutor(1)
+		self.stats = BatchStats()
+		self.in_flight = 0
+		self._pending = list()
+		self._timer = None
+
+	@property
+	def queue_depth(self) -> int:
+		return len(self._pending) + self.in_flight
+
+	async def submit(self, calldata: bytes) -> bytes:
+		future = asyncio.get_running_loop().create_future()
+		self._pending.append((calldata, future))
+		if len(self._pending) >= self.max_batch:
+			self.flush()
+		elif self._timer is None:
+			self._timer = asyncio.get_running_loop().call_later(self.window, self.flush)
+		return await future
+
+	def flush(self):
+		if self._timer is not None:
+			self._timer.cancel()
+			self._timer = None
+		if self._pending:
+			batch, self._pending = self._pending, list()
+			asyncio.ensure_future(self._run(batch))
+
+	async def _run(self, batch):
+		self.in_flight += len(batch)
+		try:
+			loop = asyncio.get_running_loop()
+			calldatas = [calldata for calldata, _ in batch]
+			try:
+				results = await loop.run_in_executor(self.executor, self.execute_batch, calldatas)
+			except Exception as ex:
+				results = [ex] * len(batch)
+			self.stats.record(results)
+			for (_, future), result in zip(batch, results):
+				if future.done():
+					continue
+				if isinstance(result, Exception):
+					future.set_exception(result)
+				else:
+					future.set_result(result)
+		finally:
+			self.in_flight -= len(batch)
+
+
+async def _read_frame(reader: asyncio.StreamReader):
+	kind, length = _HEADER.unpack(await reader.readexactly(_HEADER.size))
+	if length > MAX_FRAME_LENGTH:
+		raise ServiceError(f'Frame of {length} bytes is too large')
+	return kind, await reader.readexactly(length)
+
+
+def _frame(kind: int, payload: bytes) -> bytes:
+	return _HEADER.pack(kind, len(payload)) + payload
+
+
+class PrecompileServer(object):
+	def __init__(self, coalescer: Coalescer = None, cache: ResultCache = None):
+		self.coalescer = coalescer or Coalescer()
+		self.cache = cache
+		self.connections = 0
+		self._server = None
+
+	def stats(self) -> dict:
+		result = self.coalescer.stats.as_dict()
+		result.update(queue_depth=self.coalescer.queue_depth, connections=self.connections)
+		if self.cache is not None:
+			result.update(cache=self.cache.stats())
+		return result
+
+	async def _respond(self, kind: int, payload: bytes) -> bytes:
+		if kind == REQUEST_STATS:
+			return _frame(STATUS_OK, json.dumps(self.stats()).encode())
+		elif kind != REQUEST_EXECUTE:
+			return _frame(STATUS_ERROR, f'Unknown request type {kind}'.encode())
+		try:
+			return _frame(STATUS_OK, await self.coalescer.submit(payload))
+		except Exception as ex:
+			return _frame(STATUS_ERROR, str(ex).encode())
+
+	async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+		# Requests on one connection may be pipelined, responses are written in order
+		self.connections += 1
+		responses = asyncio.Queue()
+
+		async def write_responses():
+			while True:
+				task = await responses.get()
+				if task is None:
+					break
+				writer.write(await task)
+				await writer.drain()
+
+		writer_task = asyncio.ensure_future(write_responses())
+		try:
+			while True:
+				try:
+					kind, payload = await _read_frame(reader)
+				except (asyncio.IncompleteReadError, ServiceError):
+					break
+				await responses.put(asyncio.ensure_future(self._respond(kind, payload)))
+		finally:
+			await responses.put(None)
+			try:
+				await writer_task
+			except ConnectionError:
+				pass
+			writer.close()
+			self.connections -= 1
+
+	async def start(self, path: str = None, host: str = '127.0.0.1', port: int = 0):
+		if path is not None:
+			self._server = await asyncio.start_unix_server(self._handle, path=path)
+		else:
+			self._server = await asyncio.start_server(self._handle, host=host, port=port)
+		return self._server
+
+	@property
+	def sockets(self):
+		return self._server.sockets
+
+	def close(self):
+		self._server.close()
+
+	async def wait_closed(self):
+		await self._server.wait_closed()
+
+
+class PrecompileClient(object):
+	def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+		self._reader = reader
+		self._writer = writer
+		self._lock = asyncio.Lock()
+
+	@classmethod
+	async def connect(cls, path: str = None, host: str = '127.0.0.1', port: int = None) -> 'PrecompileClient':
+		if path is not None:
+			return cls(*await asyncio.open_unix_connection(path))
+		return cls(*await asyncio.open_connection(host, port))
+
+	async def _request(self, kind: int, payload: bytes) -> bytes:
+		async with self._lock:
+			self._writer.write(_frame(kind, payload))
+			await self._writer.drain()
+			status, response = await _read_frame(self._reader)
+		if status != STATUS_OK:
+			raise ServiceError(response.decode())
+		return response
+
+	async def execute(self, calldata: bytes) -> bytes:
+		return await self._request(REQUEST_EXECUTE, calldata)
+
+	async def stats(self) -> dict:
+		return json.loads(await self._request(REQUEST_STATS, b''))
+
+	async def close(self):
+		self._writer.close()
+		await self._writer.wait_closed()
+
+
+async def serve(path: str = None, host: str = '127.0.0.1', port: int = 0, window: float = 0.002,
+				max_batch: int = 256, workers: Optional[int] = None, cache_size: int = 0,
+				cache_path: str = None):
+	pool = None
+	execute_batch = execute_many
+	if workers:
+		from .pool import ParallelExecutor
+		pool = ParallelExecutor(max_workers=workers)
+		execute_batch = pool.execute_many
+	cache = None
+	if cache_size or cache_path:
+		cache = ResultCache(cache_size or 4096, cache_path)
+		execute_uncached = execute_batch
+
+		def execute_batch(calldatas: List[bytes]) -> List[Result]:
+			return cache.execute_many(calldatas, execute_uncached)
+	# With a pool, batches are dispatched to it from several threads at once
+	executor = ThreadPoolExecutor(workers or 1)
+	try:
+		coalescer = Coalescer(execute_batch, window=window, max_batch=max_batch, executor=executor)
+		server = PrecompileServer(coalescer, cache)
+		await server.start(path, host, port)
+		async with server._server:
+			await server._server.serve_forever()
+	finally:
+		executor.shutdown(wait=False, cancel_futures=True)
+		if pool is not None:
+			pool.shutdown()
+		if cache is not None:
+			cache.close()
+
+
+def main(args: Sequence[str] = None):
+	parser = argparse.ArgumentParser(description='EIP-1962 precompile service')
+	parser.add_argument('--unix', metavar='PATH', help='Listen on a unix socket')
+	parser.add_argument('--host', default='127.0.0.1')
+	parser.add_argument('--port', type=int, default=1962)
+	parser.add_argument('--window', type=float, default=0.002, help='Coalescing window, in seconds')
+	parser.add_argument('--max-batch', type=int, default=256)
+	parser.add_argument('--workers', type=int, default=None, help='Execute batches on a process pool')
+	parser.add_argument('--cache-size', type=int, default=0, help='Results kept in memory, zero disables the cache')
+	parser.add_argument('--cache-path', metavar='PATH', help='Keep results in a sqlite file across restarts')
+	opts = parser.parse_args(args)
+	asyncio.run(serve(opts.unix, opts.host, opts.port, opts.window, opts.max_batch, opts.workers,
+					  opts.cache_size, opts.cache_path))
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,129 @@
+"""
+Precomputed tables shared between processes through memory-mapped files
+
+Tables are written once, by whichever process computes them first, in the
+format of `constants.encode_constants` to a directory which all processes
+of a pool know, preferably on a memory-backed filesystem such as /dev/shm.
+Other processes map the file and read integers from it in place, so the
+bytes exist once however many workers use them, and nothing is rebuilt.
+
+	store = SharedStore.create()
+	store.put('lines-...', dict(c=[...], lam_u=[...]))
+	store.get('lines-...').get('c')
+
+Workers of a `pool.ParallelExecutor` attach to the store of their parent,
+which `shared_store()` returns, or None outside of such a pool.
+
+Entries may be derived from calldata, e.g. the lines of any G2 point, so the
+store is bounded: once its files exceed `max_bytes` the least recently used
+are removed, and each process keeps at most `max_attached` of them mapped.
+Processes which already mapped a removed file keep a valid copy.
+"""
+
+import os
+import re
+import shutil
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Sequence
+
+from .constants import ConstantStore, encode_constants, _write_atomic
+
+
+_KEY = re.compile(r'^[A-Za-z0-9_.-]+$')
+
+DEFAULT_MAX_BYTES = 64 << 20
+DEFAULT_MAX_ATTACHED = 32
+
+_active = None
+
+
+class SharedStore(object):
+	def __init__(self, directory: str, owner: bool = False, max_bytes: int = DEFAULT_MAX_BYTES,
+				 max_attached: int = DEFAULT_MAX_ATTACHED):
+		self.directory = directory
+		self.owner = owner
+		self.max_bytes = max_bytes
+		self.max_attached = max_attached
+		self._attached: Dict[str, ConstantStore] = OrderedDict()
+		self._lock = threading.Lock()
+
+	@classmethod
+	def create(cls, parent: str = None, max_bytes: int = DEFAULT_MAX_BYTES) -> 'SharedStore':
+		"""New store in a temporary directory, removed by `close`"""
+		if parent is None and os.path.isdir('/dev/shm'):
+			parent = '/dev/shm'
+		return cls(tempfile.mkdtemp(prefix='pyeip1962-', dir=parent), owner=True, max_bytes=max_bytes)
+
+	def _path(self, key: str) -> str:
+		if not _KEY.match(key):
+			raise ValueError(f"Invalid key {key!r}")
+		return os.path.join(self.directory, key + '.bin')
+
+	def get(self, key: str) -> Optional[ConstantStore]:
+		"""Maps the tables published under `key`, or returns None if there are none yet"""
+		path = self._path(key)
+		with self._lock:
+			store = self._attached.get(key)
+			if store is not None:
+				self._attached.move_to_end(key)
+			else:
+				try:
+					store = self._attached[key] = ConstantStore.open(path)
+				except (OSError, ValueError):
+					return None
+				while len(self._attached) > self.max_attached:
+					self._attached.popitem(last=False)
+		try:
+			# Marks the file as recently used, for eviction by any process
+			os.utime(path)
+		except OSError:
+			pass
+		return store
+
+	def put(self, key: str, entries: Dict[str, Sequence[int]]):
+		"""Publishes tables, replacing any under the same key atomically"""
+		try:
+			_write_atomic(self._path(key), encode_constants(entries))
+			self._evict()
+		except OSError:
+			# Sharing is an optimisation, the caller still has its own copy
+			pass
+
+	def _evict(self):
+		# Least recently used files first, until the store fits in `max_bytes`
+		files = list()
+		with os.scandir(self.directory) as entries:
+			for entry in entries:
+				try:
+					stat = entry.stat()
+				except OSError:
+					continue
+				files.append((stat.st_mtime_ns, stat.st_size, entry.path))
+		total = sum(size for _, size, _ in files)
+		for _, size, path in sorted(files):
+			if total <= self.max_bytes:
+				break
+			try:
+				os.unlink(path)
+			except OSError:
+				# Removed by another process already
+				pass
+			total -= size
+
+	def close(self):
+		with self._lock:
+			self._attached.clear()
+		if self.owner:
+			shutil.rmtree(self.directory, ignore_errors=True)
+
+
+def shared_store() -> Optional[SharedStore]:
+	return _active
+
+
+def attach(directory: Optional[str], max_bytes: int = DEFAULT_MAX_BYTES):
+	"""Makes the store in `directory` the one used by this process, used as a pool initializer"""
+	global _active
+	_active = SharedStore(directory, max_bytes=max_bytes) if directory else None
@@ -1,6 +1,5 @@
-from typing import NamedTuple, Tuple, List
+from typing import NamedTuple, Tuple, List, Union
 import enum
-from .fields import Fq, Fqk
 
 
 @enum.unique
@@ -41,18 +40,17 @@ class TwistType(enum.IntEnum):
 	D = 2
 
 
-class PointG1(NamedTuple):
-	x: Fq
-	y: Fq
-
+class G1Point(NamedTuple):
+	x: int
+	y: int
 
-class PointG2(NamedTuple):
-	x: Fqk
-	y: Fqk
 
+class G2Point(NamedTuple):
+	x: List[int]
+	y: List[int]
 
-Point = Union[PointG1,PointG2]
 
+Point = Union[G1Point,G2Point]
 
 
 class G1Prefix(NamedTuple):
@@ -73,13 +71,13 @@ class G1AddOp(NamedTuple):
 class G1MulOp(NamedTuple):
 	prefix: G1Prefix
 	lhs: G1Point
-	rhs: int
+	scalar: int
+
 
 class G1MultiExpOp(NamedTuple):
 	prefix: G1Prefix
 	num_pairs: int
-	points: List[Tuple[int,Point]]
-	scalar: int
+	pairs: List[Tuple[G1Point,int]]
 
 
 G1Op = Union[G1AddOp, G1MulOp, G1MultiExpOp]
@@ -90,8 +88,8 @@ class G2Prefix(NamedTuple):
 	field_modulus: int
 	extension_degree: int
 	fp_non_residue: int
-	A: int
-	B: int
+	A: List[int]
+	B: List[int]
 	order_length: int
 	order: int
 
@@ -108,14 +106,13 @@ class G2MulOp(NamedTuple):
 	scalar: int
 
 
-class G2MultiExp(NamedTuple):
+class G2MultiExpOp(NamedTuple):
 	prefix: G2Prefix
 	num_pairs: int
-	point: G2Point
-	scalar: List[int]
+	pairs: List[Tuple[G2Point,int]]
 
 
-G2Op = Union[G2AddOp, G2MulOp, G2MultiExp]
+G2Op = Union[G2AddOp, G2MulOp, G2MultiExpOp]
 
 
 class PairingOp(NamedTuple):
@@ -127,7 +124,7 @@ class PairingOp(NamedTuple):
 	order_length: int
 	order: int
 	fp2_non_residue: int
-	fp6_non_residue: int
+	fp6_non_residue: List[int]
 	twist_type: TwistType
 	x_length: int
 	x: int
@@ -136,5 +133,47 @@ class PairingOp(NamedTuple):
 	pairs: List[Tuple[G1Point,G2Point]]
 
 
-AnyOp = Union[G1Op, G2Op, PairingOp]
+class MNTPairingOp(NamedTuple):
+	curve_type: CurveFamily
+	field_length: int
+	field_modulus: int
+	A: int
+	B: int
+	order_length: int
+	order: int
+	non_residue: int
+	x_length: int
+	x: int
+	sign: int
+	exp_w0_length: int
+	exp_w0: int
+	exp_w1_length: int
+	exp_w1: int
+	exp_w0_sign: int
+	num_pairs: int
+	pairs: List[Tuple[G1Point,G2Point]]
+
+	@property
+	def extension_degree(self) -> int:
+		# Of the field G2 is defined over, Fp2 for MNT4 and Fp3 for MNT6
+		return 2 if self.curve_type == CurveFamily.MNT4 else 3
+
+
+AnyPairingOp = Union[PairingOp, MNTPairingOp]
+
+PAIRING_OPS = (PairingOp, MNTPairingOp)
+
+
+AnyOp = Union[G1Op, G2Op, PairingOp, MNTPairingOp]
+
 
+OP_CODES = {
+	G1AddOp: Operation.G1_ADD,
+	G1MulOp: Operation.G1_MUL,
+	G1MultiExpOp: Operation.G1_MULTIEXP,
+	G2AddOp: Operation.G2_ADD,
+	G2MulOp: Operation.G2_MUL,
+	G2MultiExpOp: Operation.G2_MULTIEXP,
+	PairingOp: Operation.PAIRING,
+	MNTPairingOp: Operation.PAIRING,
+}
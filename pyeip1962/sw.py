@@ -1,6 +1,11 @@
+from typing import Sequence, Tuple, List
+
 from .group import AbstractPoint
+from .field import batch_inverse
+from .counters import register_points
 
 
+@register_points
 class ShortWeierstrassPoint(AbstractPoint):
 	"""
 	y^2 = x^3 + a4*x + a6
@@ -37,3 +42,31 @@ class ShortWeierstrassPoint(AbstractPoint):
 		# y^2=x^3+a*x+b
 		ysq = (self.x**3) + (self.PARAM_A*self.x) + self.PARAM_B
 		return (self.y**2) == ysq
+
+	@classmethod
+	def batch_add(cls, pairs: Sequence[Tuple['ShortWeierstrassPoint', 'ShortWeierstrassPoint']]) -> List['ShortWeierstrassPoint']:
+		"""
+		Adds many pairs of points, sharing a single field inversion between
+		all of the additions and doublings in the batch.
+		"""
+		results = [None] * len(pairs)
+		pending = list()
+		for i, (a, b) in enumerate(pairs):
+			if not a:
+				results[i] = b
+			elif not b:
+				results[i] = a
+			elif a.x != b.x:
+				pending.append((i, a, b, b.y - a.y, b.x - a.x))
+			elif a.y == b.y and a.y != a.field().zero():
+				pending.append((i, a, b, 3*(a.x**2) + a.PARAM_A, 2*a.y))
+			else:
+				# Add self, to its negative, equals zero
+				results[i] = cls.zero()
+		inverses = batch_inverse([_[4] for _ in pending])
+		for (i, a, b, numerator, _), inverse in zip(pending, inverses):
+			lam = numerator * inverse
+			x3 = lam**2 - a.x - b.x
+			y3 = (lam*(a.x - x3)) - a.y
+			results[i] = type(a)(x3, y3)
+		return results
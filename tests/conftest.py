@@ -0,0 +1,10 @@
+import atexit
+import os
+import shutil
+import tempfile
+
+
+# Curve constants are cached in a directory of their own rather than the user's cache
+if not os.environ.get('PYEIP1962_CACHE_DIR'):
+	os.environ['PYEIP1962_CACHE_DIR'] = tempfile.mkdtemp(prefix='pyeip1962-tests-')
+	atexit.register(shutil.rmtree, os.environ['PYEIP1962_CACHE_DIR'], True)
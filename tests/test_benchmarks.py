@@ -0,0 +1,33 @@
+import unittest
+
+from benchmarks import curve_cases, measure, compare
+
+
+def _results(**means):
+	return dict(results={name: dict(mean=mean, stdev=mean * 0.01) for name, mean in means.items()})
+
+
+class BenchmarkTests(unittest.TestCase):
+	def test_measure(self):
+		m = measure('noop', lambda: None, min_time=0.001, repeat=3)
+		self.assertEqual(len(m.samples), 3)
+		self.assertGreater(m.mean, 0)
+		self.assertEqual(set(m.as_dict()), {'number', 'mean', 'stdev', 'rsd', 'min', 'max', 'samples'})
+
+	def test_cases(self):
+		names = [name for name, _ in curve_cases('ALTBN_254', msm_sizes=(4,))]
+		self.assertIn('ALTBN_254/Fq12.inv', names)
+		self.assertIn('ALTBN_254/G1.msm[4]', names)
+		# No Miller loop is implemented for this curve
+		self.assertNotIn('ALTBN_254/pairing', names)
+
+	def test_compare(self):
+		baseline = _results(a=100.0, b=100.0, c=100.0, gone=1.0)
+		current = _results(a=80.0, b=95.0, c=150.0, added=1.0)
+		status = {row['name']: row['status'] for row in compare(baseline, current, threshold=0.1)}
+		self.assertEqual(status, dict(a='regression', b='unchanged', c='improvement',
+									  added='new', gone='missing'))
+
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,83 @@
+import io
+import os
+import tempfile
+import unittest
+
+from pyeip1962.cache import ResultCache, calldata_key
+from pyeip1962.encoder import encode_op
+from pyeip1962.executor import execute, execute_many, encode_g1
+from pyeip1962.structs import G1AddOp, G1MulOp
+from pyeip1962.curves.bls12_381 import BLS12_381
+
+from test_executor import G1_PREFIX, g1_point
+
+
+class CacheTests(unittest.TestCase):
+	def test_lru(self):
+		cache = ResultCache(maxsize=2)
+		for i in range(3):
+			cache.put(calldata_key(bytes([i])), bytes([i]))
+		self.assertIsNone(cache.get(calldata_key(b'\x00')))
+		self.assertEqual(cache.get(calldata_key(b'\x01')), b'\x01')
+		cache.put(calldata_key(b'\x03'), b'\x03')
+		# 1 was used more recently than 2
+		self.assertIsNone(cache.get(calldata_key(b'\x02')))
+		self.assertEqual(cache.stats(), dict(size=2, maxsize=2, hits=1, store_hits=0, misses=2, evictions=2))
+
+	def test_execute_many(self):
+		g = BLS12_381.G1().generator()
+		add = encode_op(G1AddOp(G1_PREFIX, g1_point(g), g1_point(g)))
+		mul = encode_op(G1MulOp(G1_PREFIX, g1_point(g), 3))
+		batches = list()
+
+		def execute_batch(calldatas):
+			batches.append(calldatas)
+			return execute_many(calldatas)
+
+		cache = ResultCache()
+		results = cache.execute_many([add, mul, add, b'\x01', b'\x01'], execute_batch)
+		self.assertEqual(results[:3], [encode_g1(g * 2, 48), encode_g1(g * 3, 48), encode_g1(g * 2, 48)])
+		self.assertIsInstance(results[3], Exception)
+		self.assertEqual(batches, [[add, mul, b'\x01']])
+		# Failed calls are executed again
+		self.assertEqual(cache.execute_many([mul, b'\x01'], execute_batch)[0], encode_g1(g * 3, 48))
+		self.assertEqual(batches[1:], [[b'\x01']])
+		self.assertEqual(execute(add, cache=cache), encode_g1(g * 2, 48))
+		self.assertEqual(execute_many([mul, add], cache=cache), [encode_g1(g * 3, 48), encode_g1(g * 2, 48)])
+		self.assertEqual(len(batches), 2)
+		with self.assertRaises(Exception):
+			execute(b'\x01', cache=cache)
+		# Streams are read like the parser reads them
+		self.assertEqual(execute(io.BytesIO(mul), cache=cache), encode_g1(g * 3, 48))
+		with tempfile.TemporaryFile() as handle:
+			handle.write(b'junk' + add)
+			handle.seek(4)
+			self.assertEqual(execute(handle, cache=cache), encode_g1(g * 2, 48))
+			self.assertEqual(handle.tell(), 4 + len(add))
+		self.assertEqual(len(batches), 2)
+
+	def test_store(self):
+		with tempfile.TemporaryDirectory() as tmp:
+			path = os.path.join(tmp, 'results.sqlite')
+			cache = ResultCache(maxsize=1, path=path)
+			cache.execute_many([b'a', b'b'], lambda calldatas: [_.upper() for _ in calldatas])
+			cache.close()
+			cache = ResultCache(maxsize=1, path=path)
+			self.assertEqual(cache.execute_many([b'a', b'b'], None), [b'A', b'B'])
+			self.assertEqual(cache.stats()['store_hits'], 2)
+			self.assertEqual(len(cache.store), 2)
+			cache.clear()
+			self.assertEqual(len(cache.store), 0)
+			cache.close()
+
+	def test_point_hash(self):
+		G1 = BLS12_381.G1()
+		g = G1.generator()
+		self.assertEqual(hash(g * 2), hash(g + g))
+		self.assertEqual(len({g * 2, g + g, g}), 2)
+		# Repeated points are merged before the bucket method
+		self.assertEqual(G1.msm([(g, 3), (g * 2, 1), (g, 5), (g * 2, 2), (g * 3, 0)]), g * 14)
+
+
+if __name__ == "__main__":
+	unittest.main()
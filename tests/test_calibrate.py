@@ -0,0 +1,40 @@
+import random
+import unittest
+
+from benchmarks.calibrate import Sample, random_prime, random_g1_curve, random_g2_curve
+from benchmarks.calibrate import sweep, fit_power_law, fit_models
+from pyeip1962.context import g1_context, g2_context
+
+
+class CalibrateTests(unittest.TestCase):
+	def test_random_curves(self):
+		rng = random.Random(1)
+		p = random_prime(16, rng)
+		self.assertEqual(p.bit_length(), 128)
+		self.assertEqual(p % 6, 1)
+		prefix, (x, y) = random_g1_curve(16, rng)
+		self.assertTrue(g1_context(prefix).G1(x, y).is_on_curve())
+		prefix, (x, y) = random_g2_curve(16, 3, rng)
+		self.assertTrue(g2_context(prefix).G2(x, y).is_on_curve())
+
+	def test_fit(self):
+		samples = [Sample('G1_MUL', '', L, k, 1, 2e-6 * L**2 * k**1.5, {'Fq.mul': 10})
+				   for L in (16, 32, 64) for k in (2, 3)]
+		model = fit_power_law(samples, ['field_length', 'extension_degree', 'n'])
+		self.assertAlmostEqual(model['coefficient'], 2e-6)
+		self.assertAlmostEqual(model['exponents']['field_length'], 2.0)
+		self.assertAlmostEqual(model['exponents']['extension_degree'], 1.5)
+		self.assertNotIn('n', model['exponents'])
+
+	def test_sweep(self):
+		samples = sweep(field_lengths=(8, 16), extension_degrees=(2,), multiexp_sizes=(2, 4),
+						pairing_curves=(), repeat=1)
+		self.assertEqual({s.operation for s in samples},
+						 {'G1_ADD', 'G1_MUL', 'G1_MULTIEXP', 'G2_ADD', 'G2_MUL', 'G2_MULTIEXP'})
+		self.assertTrue(all(s.seconds > 0 and s.field_ops > 0 for s in samples))
+		models = fit_models(samples)
+		self.assertIn('n', models['G1_MULTIEXP']['time']['exponents'])
+
+
+if __name__ == "__main__":
+	unittest.main()
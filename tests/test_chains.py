@@ -0,0 +1,46 @@
+import random
+import unittest
+
+from py_ecc.fields.field_elements import FQ, FQP
+
+from pyeip1962.chains import addition_chain, chain_pow, sliding_window_chain, window_width
+from pyeip1962.curves.bls12_381 import Fq, Fq2, Fq12, modulus
+
+
+class ChainTests(unittest.TestCase):
+	def test_powers(self):
+		rng = random.Random(1962)
+		exponents = [0, 1, 2, 3, 7, 8, 255, 256, modulus - 2, (modulus - 1) // 2]
+		exponents += [rng.getrandbits(rng.randrange(1, 400)) for _ in range(50)]
+		x = Fq(rng.randrange(2, modulus))
+		for e in exponents:
+			self.assertEqual(chain_pow(x, e), x ** e)
+		y = Fq2([rng.randrange(modulus), rng.randrange(modulus)])
+		e = (modulus**2 - 1) // 3
+		self.assertEqual(chain_pow(y, e), y ** e)
+
+	def test_length(self):
+		e = modulus - 2
+		chain = addition_chain(e)
+		self.assertIs(addition_chain(e), chain)
+		# Shorter than square-and-multiply
+		self.assertLess(len(chain), e.bit_length() - 1 + bin(e).count('1') - 1)
+		self.assertEqual(len(addition_chain(2**64)), 64)
+		with self.assertRaises(ValueError):
+			addition_chain(-1)
+
+	def test_field_pow(self):
+		rng = random.Random(1963)
+		self.assertEqual([window_width(_) for _ in (8, 256, 4314)], [2, 5, 7])
+		x = Fq(rng.randrange(2, modulus))
+		y = Fq12([rng.randrange(modulus) for _ in range(12)])
+		for e in [0, 1, 15, 16, 17, 2**64 + 5, rng.getrandbits(381)]:
+			self.assertEqual(x ** e, FQ.__pow__(x, e))
+			self.assertEqual(y ** e, FQP.__pow__(y, e))
+			self.assertEqual(sliding_window_chain(e, 3).execute(y), y ** e)
+		with self.assertRaises(ValueError):
+			y ** -1
+
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,71 @@
+import gc
+import linecache
+import random
+import unittest
+
+from py_ecc.fields.field_elements import FQP
+
+from pyeip1962 import codegen
+from pyeip1962.codegen import compile_module, fqk_functions, fqk_source, point_source
+from pyeip1962.context import make_sw_point
+from pyeip1962.field import make_Fq, make_Fqk
+from pyeip1962.sw import ShortWeierstrassPoint
+from pyeip1962.curves.bls12_381 import BLS12_381, modulus
+
+
+class CodegenTests(unittest.TestCase):
+	def test_fqk(self):
+		rng = random.Random(1962)
+		# Sparse, dense where folding w^k lands above w^k again, and binomial of every degree up
+		# to 13, so Karatsuba splits odd lengths too
+		moduli = [[2, 0, 0, 0, 0, 0, -2, 0, 0, 0, 0, 0], [rng.randrange(modulus) for _ in range(5)]]
+		moduli += [[rng.randrange(modulus)] + [0] * (k - 1) for k in range(2, 14)]
+		for modulus_coeffs in moduli:
+			F = make_Fqk(modulus, modulus_coeffs)
+			for _ in range(2):
+				x = F([rng.randrange(modulus) for _ in modulus_coeffs])
+				y = F([rng.randrange(modulus) for _ in modulus_coeffs])
+				self.assertEqual(x * y, FQP.__mul__(x, y))
+				self.assertEqual(x * x, FQP.__mul__(x, x))
+				self.assertEqual((x * y).coeffs, (FQP.__mul__(x, y)).coeffs)
+				self.assertEqual(x * 3, x + x + x)
+		self.assertIs(fqk_functions(modulus, [1, 0])[0], fqk_functions(modulus, [1, 0])[0])
+		module = compile_module('fq2', fqk_source(modulus, [1, 0]))
+		self.assertIn('def square(a):', module.__source__)
+
+	def test_unused_modules(self):
+		source = point_source(modulus, 7)
+		module = compile_module('point', source)
+		add = module.add
+		filename = add.__code__.co_filename
+		del module
+		gc.collect()
+		# Kept while its functions are, e.g. by the point class of a cached context
+		self.assertIs(compile_module('point', source).add, add)
+		self.assertIn(filename, linecache.cache)
+		del add
+		gc.collect()
+		self.assertNotIn(filename, linecache.cache)
+		self.assertNotIn(filename[1:-1], [_.__name__ for _ in codegen._modules.values()])
+
+	def test_points(self):
+		G1 = BLS12_381.G1()
+		self.assertIsNot(G1.add, ShortWeierstrassPoint.add)
+		g = G1.generator()
+		p, q = g * 1234, g * 5678
+		self.assertEqual(p + q, ShortWeierstrassPoint.add(p, q))
+		self.assertEqual(p.double(), ShortWeierstrassPoint.double(p))
+		self.assertIsNone(p + (-p))
+		# Every pair of points on y^2 = x^3 + 3x + 1 over F_7, (4, 0) has order two
+		Fq = make_Fq(7)
+		E = make_sw_point(Fq, 3, 1, lambda: None)
+		points = [E(x, y) for x in range(7) for y in range(7) if E(x, y).is_on_curve()]
+		for a in points:
+			for b in points:
+				# The generic doubling divides by zero at (4, 0)
+				expected = ShortWeierstrassPoint.add(a, b) if a.y != Fq.zero() or a != b else None
+				self.assertEqual(a.add(b), expected)
+
+
+if __name__ == "__main__":
+	unittest.main()
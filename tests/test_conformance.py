@@ -0,0 +1,76 @@
+import json
+import os
+import tempfile
+import unittest
+
+from pyeip1962.conformance import run_corpus, read_corpus, encode_binary, main
+from pyeip1962.encoder import encode_op
+from pyeip1962.executor import encode_g1
+from pyeip1962.structs import G1AddOp, G1MulOp
+from pyeip1962.curves.bls12_381 import BLS12_381
+
+from test_executor import G1_PREFIX, g1_point
+
+
+def vectors():
+	# (calldata, expected output), the last two are wrong
+	g = BLS12_381.G1().generator()
+	return [
+		(encode_op(G1AddOp(G1_PREFIX, g1_point(g), g1_point(g))), encode_g1(g * 2, 48)),
+		(encode_op(G1MulOp(G1_PREFIX, g1_point(g), 7)), encode_g1(g * 7, 48)),
+		(b'\x02', None),
+		(encode_op(G1MulOp(G1_PREFIX, g1_point(g), 5)), encode_g1(g * 6, 48)),
+		(b'\x09', encode_g1(g, 48)),
+	]
+
+
+class ConformanceTests(unittest.TestCase):
+	def setUp(self):
+		self.tmp = tempfile.TemporaryDirectory()
+		self.jsonl = os.path.join(self.tmp.name, 'vectors.jsonl')
+		with open(self.jsonl, 'w') as handle:
+			for i, (calldata, expected) in enumerate(vectors()):
+				record = dict(Name=f'case-{i}', Input=calldata.hex(), Expected=expected and expected.hex())
+				handle.write(json.dumps(record) + '\n\n')
+		self.binary = os.path.join(self.tmp.name, 'vectors.bin')
+		with open(self.binary, 'wb') as handle:
+			for calldata, expected in vectors():
+				handle.write(encode_binary(calldata, expected))
+
+	def tearDown(self):
+		self.tmp.cleanup()
+
+	def check_report(self, report):
+		self.assertEqual((report.total, report.passed, report.mismatch_count), (5, 3, 2))
+		self.assertEqual([_['index'] for _ in report.mismatches], [3, 4])
+		self.assertIsNone(report.mismatches[0]['error'])
+		self.assertEqual(report.mismatches[1]['operation'], 'INVALID')
+		self.assertEqual(report.as_dict()['timings']['G1_MUL']['count'], 3)
+
+	def test_formats(self):
+		self.assertEqual([_.calldata for _ in read_corpus(self.jsonl)],
+						 [_.calldata for _ in read_corpus(self.binary)])
+		self.assertEqual(next(read_corpus(self.jsonl)).name, 'case-0')
+		self.check_report(run_corpus([self.jsonl], chunk_size=2))
+		self.check_report(run_corpus([self.binary], chunk_size=2))
+		limited = run_corpus([self.binary], max_mismatches=1)
+		self.assertEqual((limited.mismatch_count, len(limited.mismatches)), (2, 1))
+
+	def test_workers(self):
+		self.check_report(run_corpus([self.binary], workers=2, chunk_size=1))
+
+	def test_truncated(self):
+		with open(self.binary, 'ab') as handle:
+			handle.write(b'\x00\x00\x01')
+		with self.assertRaises(ValueError):
+			list(read_corpus(self.binary))
+
+	def test_main(self):
+		path = os.path.join(self.tmp.name, 'report.json')
+		self.assertEqual(main([self.binary, '--report', path]), 1)
+		with open(path) as handle:
+			self.assertEqual(json.load(handle)['passed'], 3)
+
+
+if __name__ == "__main__":
+	unittest.main()
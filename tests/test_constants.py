@@ -0,0 +1,64 @@
+import os
+import tempfile
+import unittest
+
+from pyeip1962.constants import ConstantStore, ConstantCacheError, CurveConstants, encode_constants, load_all
+from pyeip1962.curves.bls12_381 import BLS12_381
+
+
+class ConstantTests(unittest.TestCase):
+	def setUp(self):
+		self.tmp = tempfile.TemporaryDirectory()
+		self.calls = 0
+
+	def tearDown(self):
+		self.tmp.cleanup()
+
+	def compute(self):
+		self.calls += 1
+		return dict(small=[0, 1, 2], big=[2**381 - 1, 5])
+
+	def test_encoding(self):
+		store = ConstantStore(encode_constants(self.compute()))
+		self.assertEqual(store.names(), ['big', 'small'])
+		self.assertEqual(store.get('big'), [2**381 - 1, 5])
+		self.assertEqual(store.get('small'), [0, 1, 2])
+		data = bytearray(encode_constants(self.compute()))
+		data[-1] ^= 1
+		with self.assertRaises(ConstantCacheError):
+			ConstantStore(data)
+
+	def test_file_cache(self):
+		constants = CurveConstants('test', [1, 2, 3], self.compute, cache_dir=self.tmp.name)
+		self.assertEqual(constants.get('small', sum), 3)
+		self.assertTrue(os.path.exists(constants.path))
+		# Loaded from the file by a new process, here a new instance
+		constants = CurveConstants('test', [1, 2, 3], self.compute, cache_dir=self.tmp.name)
+		self.assertEqual(constants.get('big'), [2**381 - 1, 5])
+		self.assertEqual(self.calls, 1)
+		# Corrupt files are regenerated
+		with open(constants.path, 'r+b') as handle:
+			handle.seek(-1, os.SEEK_END)
+			handle.write(b'\xff')
+		constants = CurveConstants('test', [1, 2, 3], self.compute, cache_dir=self.tmp.name)
+		self.assertEqual(constants.get('small'), [0, 1, 2])
+		self.assertEqual(self.calls, 2)
+		# Different parameters never share a file
+		self.assertNotEqual(constants.path, CurveConstants('test', [1, 2, 4], self.compute, cache_dir=self.tmp.name).path)
+
+	def test_load_all(self):
+		constants = CurveConstants('test', [1, 2, 3], self.compute, cache_dir=self.tmp.name)
+		load_all()
+		# Computed in memory for forked workers, not written
+		self.assertEqual(self.calls, 1)
+		self.assertFalse(os.path.exists(constants.path))
+		self.assertEqual(constants.get('small', sum), 3)
+
+	def test_mul_base(self):
+		for G in (BLS12_381.G1(), BLS12_381.G2()):
+			self.assertEqual(G.mul_base(123456789), G.generator() * 123456789)
+			self.assertEqual(G.mul_base(G.order()), G.zero())
+
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,64 @@
+import unittest
+
+from pyeip1962.context import ContextCache, g1_context, g2_context, pairing_context
+from pyeip1962.structs import G1Prefix, G2Prefix, PairingOp, CurveFamily, TwistType
+from pyeip1962.curves.bls12_381 import BLS12_381, modulus
+
+
+ORDER = BLS12_381.order()
+
+
+class ContextTests(unittest.TestCase):
+	def test_cache_counters(self):
+		cache = ContextCache(maxsize=2)
+		prefixes = [G1Prefix(48, modulus, 0, b, 32, ORDER) for b in (4, 5, 6)]
+		a = g1_context(prefixes[0], cache)
+		self.assertIs(g1_context(prefixes[0], cache), a)
+		g1_context(prefixes[1], cache)
+		g1_context(prefixes[2], cache)
+		self.assertEqual(cache.stats(), dict(size=2, maxsize=2, hits=1, misses=3, evictions=1))
+		self.assertIsNot(g1_context(prefixes[0], cache), a)
+
+	def test_g1_context(self):
+		ctx = g1_context(G1Prefix(48, modulus, 0, 4, 32, ORDER), ContextCache())
+		g = BLS12_381.G1().generator()
+		P = ctx.G1(g.x, g.y)
+		self.assertTrue(P.is_on_curve())
+		self.assertEqual((P * 3).x, (g * 3).x)
+		self.assertEqual(ctx.G1.order(), ORDER)
+
+	def test_g2_context(self):
+		prefix = G2Prefix(48, modulus, 2, modulus - 1, [0, 0], [4, 4], 32, ORDER)
+		ctx = g2_context(prefix, ContextCache())
+		g = BLS12_381.G2().generator()
+		self.assertTrue(ctx.G2(g.x.coeffs, g.y.coeffs).is_on_curve())
+
+	def test_invalid(self):
+		cache = ContextCache()
+		with self.assertRaises(ValueError):
+			g1_context(G1Prefix(48, modulus, 0, 0, 32, ORDER), cache)
+		with self.assertRaises(ValueError):
+			g2_context(G2Prefix(48, modulus, 2, 4, [0, 0], [4, 4], 32, ORDER), cache)
+		op = PairingOp(CurveFamily.BLS12, 48, modulus, 0, 4, 32, ORDER, modulus - 1, [1, 0],
+					   TwistType.M, 8, 0xd201000000010000, 1, 0, [])
+		with self.assertRaises(ValueError):
+			pairing_context(op, cache)
+		# (1 + u)^2 = 2u is not a cube but is a square, so w^6 - xi is reducible
+		with self.assertRaisesRegex(ValueError, 'Fp12'):
+			pairing_context(op._replace(fp6_non_residue=[0, 2]), cache)
+		self.assertEqual(len(cache), 0)
+
+	def test_pairing_context(self):
+		op = PairingOp(CurveFamily.BLS12, 48, modulus, 0, 4, 32, ORDER, modulus - 1, [1, 1],
+					   TwistType.M, 8, 0xd201000000010000, 1, 0, [])
+		ctx = pairing_context(op, ContextCache())
+		g = BLS12_381.G2().generator()
+		Q = ctx.G2(g.x.coeffs, g.y.coeffs)
+		self.assertTrue(Q.is_on_curve())
+		twisted = ctx.GT(ctx.tables['fq2_to_fq12'](Q.x) * ctx.tables['twist_x'],
+						 ctx.tables['fq2_to_fq12'](Q.y) * ctx.tables['twist_y'])
+		self.assertTrue(twisted.is_on_curve())
+
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,41 @@
+import json
+import unittest
+
+from pyeip1962.counters import count_ops, counting_enabled
+from pyeip1962.encoder import encode_op
+from pyeip1962.executor import execute
+from pyeip1962.structs import G1AddOp
+from pyeip1962.curves.bls12_381 import BLS12_381, Fq, Fq2
+
+from test_executor import G1_PREFIX, g1_point
+
+
+class CounterTests(unittest.TestCase):
+	def test_field_ops(self):
+		a, b = Fq(3), Fq(5)
+		x = Fq2([1, 2])
+		with count_ops() as c:
+			a * a
+			a * b
+			a + b
+			a / b
+			x * x
+			x.inv()
+		self.assertEqual(c.totals, {'Fq.add': 1, 'Fq.inv': 1, 'Fq.mul': 2, 'Fq.sqr': 1,
+									'Fq2.inv': 1, 'Fq2.sqr': 1})
+		self.assertFalse(counting_enabled())
+		self.assertNotIn('__mul__', Fq.__dict__)
+
+	def test_labels(self):
+		g = BLS12_381.G1().generator()
+		calldata = encode_op(G1AddOp(G1_PREFIX, g1_point(g), g1_point(g.double())))
+		with count_ops() as c:
+			execute(calldata)
+		exported = json.loads(c.to_json())
+		self.assertEqual(len(exported['by_label']), 1)
+		self.assertEqual(exported['by_label'][0]['operation'], 'G1_ADD')
+		self.assertEqual(exported['totals']['E(Fq).add'], 1)
+
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,47 @@
+import unittest
+
+from pyeip1962.curves.bls12_381 import BLS12_381, Fq12
+from pyeip1962.cyclotomic import has_conjugation, wnaf
+
+
+class CyclotomicTests(unittest.TestCase):
+	@classmethod
+	def setUpClass(cls):
+		cls.GT = BLS12_381.cyclotomic()
+		cls.e = BLS12_381.pairing(BLS12_381.G1().generator(), BLS12_381.G2().generator())
+
+	def test_wnaf(self):
+		for e in (1, 7, 0xd201000000010000, 12345678901234567890):
+			digits = wnaf(e, 4)
+			self.assertEqual(sum(d << i for i, d in enumerate(digits)), e)
+			self.assertTrue(all(d % 2 == 1 and abs(d) < 8 for d in digits if d))
+
+	def test_arithmetic(self):
+		self.assertTrue(has_conjugation(Fq12))
+		x = self.GT(self.e)
+		self.assertTrue(x.is_unitary())
+		self.assertEqual(x.square(), x * x)
+		self.assertTrue((x * x.inv()).is_one())
+		self.assertEqual((x ** 5).value, self.e ** 5)
+		self.assertEqual(x ** -3, (x ** 3).conjugate())
+		self.assertTrue((x ** BLS12_381.order()).is_one())
+		y = x ** 11
+		self.assertEqual(self.GT.multi_pow([(x, 5), (y, -3), (y, 0)]), x ** -28)
+		self.assertTrue(self.GT.multi_pow([]).is_one())
+
+	def test_final_exponentiation(self):
+		# The pairing is bilinear, with the faster final exponentiation
+		g1, g2 = BLS12_381.G1().generator(), BLS12_381.G2().generator()
+		self.assertEqual(BLS12_381.pairing(g1 * 3, g2), self.e ** 3)
+
+	def test_compression(self):
+		x = self.GT(self.e) ** 7
+		encoded = x.to_bytes(48)
+		self.assertEqual(len(encoded), 48 * 6)
+		self.assertEqual(self.GT.from_bytes(encoded), x)
+		self.assertTrue(self.GT.from_bytes(self.GT.one().to_bytes(48)).is_one())
+		self.assertTrue(self.GT.decompress([1, 2, 3, 4, 5, 6]).is_unitary())
+
+
+if __name__ == "__main__":
+	unittest.main()
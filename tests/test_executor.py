@@ -0,0 +1,89 @@
+import unittest
+
+from pyeip1962.encoder import encode_op
+from pyeip1962.executor import execute, execute_many, encode_g1, encode_g2
+from pyeip1962.structs import G1Prefix, G2Prefix, G1Point, G2Point, CurveFamily, TwistType
+from pyeip1962.structs import G1AddOp, G1MulOp, G1MultiExpOp, G2MulOp, PairingOp
+from pyeip1962.curves.bls12_381 import BLS12_381, modulus
+
+
+ORDER = BLS12_381.order()
+G1_PREFIX = G1Prefix(48, modulus, 0, 4, 32, ORDER)
+G2_PREFIX = G2Prefix(48, modulus, 2, modulus - 1, [0, 0], [4, 4], 32, ORDER)
+
+
+def g1_point(P):
+	return G1Point(int(P.x), int(P.y))
+
+
+def g2_point(P):
+	return G2Point([int(_) for _ in P.x.coeffs], [int(_) for _ in P.y.coeffs])
+
+
+def pairing_op(pairs):
+	return PairingOp(CurveFamily.BLS12, 48, modulus, 0, 4, 32, ORDER, modulus - 1, [1, 1],
+					 TwistType.M, 8, 0xd201000000010000, 1, len(pairs), pairs)
+
+
+class ExecutorTests(unittest.TestCase):
+	def setUp(self):
+		self.g = BLS12_381.G1().generator()
+		self.h = BLS12_381.G2().generator()
+
+	def test_g1_ops(self):
+		g = self.g
+		calldata = encode_op(G1AddOp(G1_PREFIX, g1_point(g), g1_point(g * 2)))
+		self.assertEqual(execute(calldata), encode_g1(g * 3, 48))
+		calldata = encode_op(G1MulOp(G1_PREFIX, g1_point(g), 1234))
+		self.assertEqual(execute(calldata), encode_g1(g * 1234, 48))
+		pairs = [(g1_point(g * i), i + 10) for i in range(1, 9)]
+		calldata = encode_op(G1MultiExpOp(G1_PREFIX, len(pairs), pairs))
+		expected = g * sum(i * (i + 10) for i in range(1, 9))
+		self.assertEqual(execute(calldata), encode_g1(expected, 48))
+
+	def test_g2_mul(self):
+		calldata = encode_op(G2MulOp(G2_PREFIX, g2_point(self.h), 5))
+		self.assertEqual(execute(calldata), encode_g2(self.h * 5, 48, 2))
+
+	def test_invalid(self):
+		with self.assertRaises(ValueError):
+			execute(encode_op(G1AddOp(G1_PREFIX, G1Point(1, 1), g1_point(self.g))))
+		with self.assertRaises(RuntimeError):
+			execute(b'\x01\x30')
+
+	def test_execute_many(self):
+		g = self.g
+		calldatas = [
+			encode_op(G1AddOp(G1_PREFIX, g1_point(g), g1_point(g))),
+			b'\x01\x30',
+			encode_op(G1AddOp(G1_PREFIX, g1_point(g), g1_point(-g))),
+			encode_op(G1MulOp(G1_PREFIX, g1_point(g), 3)),
+			encode_op(G1AddOp(G1_PREFIX, G1Point(0, 0), g1_point(g))),
+			encode_op(G1AddOp(G1_PREFIX, g1_point(g), g1_point(g * 4))),
+		]
+		results = execute_many(calldatas)
+		self.assertEqual(results[0], encode_g1(g * 2, 48))
+		self.assertIsInstance(results[1], RuntimeError)
+		self.assertEqual(results[2], bytes(96))
+		self.assertEqual(results[3], encode_g1(g * 3, 48))
+		self.assertEqual(results[4], encode_g1(g, 48))
+		self.assertEqual(results[5], encode_g1(g * 5, 48))
+
+	def test_pairing(self):
+		g, h = self.g, self.h
+		valid = pairing_op([(g1_point(g), g2_point(h * 3)), (g1_point(-g * 3), g2_point(h))])
+		invalid = pairing_op([(g1_point(g), g2_point(h))])
+		self.assertEqual(execute_many([encode_op(valid), encode_op(invalid)]), [b'\x01', b'\x00'])
+		# Only 0 and 1 encode the sign of x
+		bad_sign = encode_op(valid._replace(sign=2))
+		self.assertIsInstance(execute_many([bad_sign])[0], ValueError)
+		# An order not dividing p^6 + 1 fails its own call only
+		infinity = (G1Point(0, 0), G2Point([0, 0], [0, 0]))
+		bad_order = encode_op(pairing_op([infinity])._replace(order_length=16, order=2**127 - 1))
+		results = execute_many([bad_order, encode_op(valid)])
+		self.assertIsInstance(results[0], ValueError)
+		self.assertEqual(results[1], b'\x01')
+
+
+if __name__ == "__main__":
+	unittest.main()
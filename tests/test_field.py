@@ -0,0 +1,42 @@
+import random
+import unittest
+
+from pyeip1962.field import jacobi, is_nth_power
+from pyeip1962.curves.bls12_381 import Fq, Fq2, Fq12, modulus
+from pyeip1962.curves import sw6
+
+
+def legendre(a, p):
+	e = pow(a, (p - 1) // 2, p)
+	return -1 if e == p - 1 else e
+
+
+class FieldTests(unittest.TestCase):
+	def test_jacobi(self):
+		rng = random.Random(1962)
+		for a in [0, 1, 2, modulus - 1] + [rng.randrange(modulus) for _ in range(100)]:
+			self.assertEqual(jacobi(a, modulus), legendre(a, modulus))
+		for a in range(-20, 60):
+			self.assertEqual(jacobi(a, 45), legendre(a % 3, 3) ** 2 * legendre(a % 5, 5))
+		with self.assertRaises(ValueError):
+			jacobi(3, 8)
+		self.assertTrue(is_nth_power(8, 3, 7))
+		self.assertFalse(is_nth_power(3, 3, 7))
+
+	def test_norm(self):
+		rng = random.Random(1963)
+		for F in (Fq2, sw6.Fq3, Fq12):
+			p, k = F.field_modulus, F.degree
+			x = F([rng.randrange(p) for _ in range(k)])
+			# The product of the conjugates, x^(1 + q + ... + q^(k-1))
+			self.assertEqual(x ** ((p**k - 1) // (p - 1)), F([int(x.norm())] + [0] * (k - 1)))
+			self.assertEqual((x * x).legendre(), 1)
+			self.assertEqual(x.legendre() == 1, x ** ((p**k - 1) // 2) == F.one())
+			self.assertTrue((x * x * x).is_nth_power(3))
+			self.assertEqual(x.is_nth_power(3), x ** ((p**k - 1) // 3) == F.one())
+		self.assertEqual(Fq(modulus - 1).legendre(), -1)
+		self.assertEqual(Fq2.zero().legendre(), 0)
+
+
+if __name__ == "__main__":
+	unittest.main()
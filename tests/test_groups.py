@@ -18,6 +18,11 @@ def group_law_tests(group):
 	g4 = g + g + g + g
 	assert g4 == g.double().double()
 
+	# Simultaneous multiplication
+	assert g.mul2(5, g4, 7) == g * 33
+	assert g.mul2(group.order() - 1, g, 1) == group.zero()
+	assert g.mul2(3, g4, -1) == -g
+
 
 def pairing_tests(curve):
 	g1 = curve.G1().generator()
@@ -53,6 +58,95 @@ class GroupTests(unittest.TestCase):
 		group_law_tests(BLS12_377.G2())
 		pairing_tests(BLS12_377)
 
+	def test_msm_negative(self):
+		from pyeip1962.curves.bls12_377 import BLS12_377
+		G1 = BLS12_377.G1()
+		g = G1.generator()
+		order = G1.order()
+		self.assertEqual(G1.msm([(g, -3), (g * 2, 5)]), g * 7)
+		pairs = [(g * (i + 1), (-1) ** i * (i + 1)) for i in range(12)] + [(g * 5, order - 2)]
+		expected = sum((-1) ** i * (i + 1) ** 2 for i in range(12)) - 10
+		self.assertEqual(G1.msm(pairs), g * (expected % order))
+
+	def test_sw6(self):
+		from pyeip1962.curves import sw6
+		from pyeip1962.pairing import ate_miller_loop
+		group_law_tests(sw6.SW6.G1())
+		group_law_tests(sw6.SW6.G2())
+		pairing_tests(sw6.SW6)
+		# Sparse Miller loop and specialised final exponentiation agree with the generic ones
+		g1, g2 = sw6.SW6_G1.generator() * 3, sw6.SW6_G2.generator()
+		f = sw6.SW6.miller_loop(g1, g2)
+		e = sw6.SW6.final_exponentiation(f)
+		self.assertEqual(e, sw6.PAIRING.Cyclotomic.final_exponentiation(f).value)
+		generic = ate_miller_loop(g2.twist_to_GT(), g1.cast_point_to_fq6(), sw6.ATE_LOOP_COUNT, sw6.Fq6)
+		self.assertEqual(sw6.SW6.final_exponentiation(generic), e)
+		self.assertNotEqual(e, sw6.Fq6.one())
+
+	def test_glv(self):
+		import random
+		from pyeip1962.curves.altbn_254 import ALTBN_254
+		from pyeip1962.curves.bls12_381 import BLS12_381
+		from pyeip1962.group import glv_decompose
+		rng = random.Random(1962)
+		for group in (ALTBN_254.G1(), BLS12_381.G1()):
+			g = group.generator()
+			beta, lam = group.glv_endomorphism()
+			self.assertEqual(group(g.x * beta, g.y), g * lam)
+			order = group.order()
+			for k in [0, 1, order - 1] + [rng.randrange(order) for _ in range(20)]:
+				k1, k2 = glv_decompose(k, lam, order)
+				self.assertEqual((k1 + k2 * lam) % order, k)
+				self.assertLessEqual(max(abs(k1), abs(k2)).bit_length(), order.bit_length() // 2 + 2)
+			a, b = rng.randrange(order), rng.randrange(order)
+			P, Q = g * 11, g * 13
+			self.assertEqual(P.mul2(a, Q, b, subgroup=True), g * ((a * 11 + b * 13) % order))
+		# Points outside the subgroup are only multiplied correctly without the endomorphism
+		G1 = BLS12_381.G1()
+		q = G1.field().field_modulus
+		x = next(x for x in range(1, 100) if pow(x ** 3 + 4, (q - 1) // 2, q) == 1)
+		P = G1(x, pow(x ** 3 + 4, (q + 1) // 4, q))
+		order = G1.order()
+		self.assertIsNotNone(P * order)
+		for s in [rng.randrange(order), order, order + 1, 2 * order + 5]:
+			self.assertEqual(G1.msm([(P, s)]), P.mul(s))
+			self.assertEqual(P.mul2(s, P, 0), P.mul(s))
+			self.assertEqual(P.mul2(s, g, 3), P.mul(s) + g * 3)
+
+	def test_msm_accumulator(self):
+		import random
+		from pyeip1962.curves.bls12_377 import BLS12_377
+		rng = random.Random(50)
+		for group in (BLS12_377.G1(), BLS12_377.G2()):
+			g = group.generator()
+			order = group.order()
+			scalars = [rng.randrange(-order, order) for _ in range(20)] + [0, order, -1]
+			points = [g * (i + 1) for i in range(len(scalars) - 1)] + [group.zero()]
+			pairs = list(zip(points, scalars))
+			expected = g * (sum((i + 1) * s for i, s in enumerate(scalars[:-1])) % order)
+			acc = group.msm_accumulator(chunk_size=4, window=3)
+			acc.update(iter(pairs[:10])).update(_ for _ in pairs[10:])
+			self.assertEqual(acc.finalize(), expected)
+			self.assertEqual(acc.finalize(), group.msm(pairs))
+			self.assertEqual(acc.count, len(pairs) - 2)
+			self.assertEqual(group.msm_accumulator().finalize(), group.zero())
+			with self.assertRaises(ValueError):
+				group.msm_accumulator(chunk_size=0)
+
+	def test_batch_pairing_check(self):
+		from pyeip1962.curves.bls12_381 import BLS12_381
+		g1 = BLS12_381.G1().generator()
+		g2 = BLS12_381.G2().generator()
+		secret = 1234567
+		pk = g2 * secret
+		# BLS signatures, e(sig, g2) * e(-H(m), pk) == 1, with H(m) = g1 * m
+		messages = [g1 * m for m in (3, 5, 7, 11)]
+		signatures = [h * secret for h in messages]
+		signatures[3] = signatures[3].double()
+		equations = [[(sig, g2), (-h, pk)] for sig, h in zip(signatures, messages)]
+		self.assertEqual(BLS12_381.batch_pairing_check(equations), [True, True, True, False])
+		self.assertEqual(BLS12_381.batch_pairing_check([]), [])
+
 
 if __name__ == "__main__":
 	unittest.main()
@@ -0,0 +1,88 @@
+import unittest
+
+from pyeip1962.context import pairing_context
+from pyeip1962.encoder import encode_op
+from pyeip1962.executor import execute, execute_many
+from pyeip1962.parser import StreamParser
+from pyeip1962.structs import MNTPairingOp, CurveFamily, G1Point, G2Point
+
+from test_executor import g1_point, g2_point
+
+
+# MNT4-298 and MNT6-298, the cycle used by Coda, each field modulus is the order of the other curve
+MNT4_MODULUS = 475922286169261325753349249653048451545124879242694725395555128576210262817955800483758081
+MNT6_MODULUS = 475922286169261325753349249653048451545124878552823515553267735739164647307408490559963137
+ATE_LOOP_COUNT = 689871209842287392837045615510547309923794944
+
+MNT4 = dict(
+	curve_type=CurveFamily.MNT4, field_modulus=MNT4_MODULUS, order=MNT6_MODULUS, A=2,
+	B=423894536526684178289416011533888240029318103673896002803341544124054745019340795360841685,
+	non_residue=17, sign=0, exp_w0=689871209842287392837045615510547309923794945, exp_w0_sign=0,
+	g1=G1Point(1, 126837303573159550473641788178308739508206120658913474848519183630445773362938037534969984),
+	g2=G2Point(
+		[159165343223735804778152000581837277917076294019978263420969013004966471757202243205790104,
+		 138127030426373899236781614879574594517698225609277935449752136446378673046381058024709495],
+		[439755594060281699017030223650024869326546898718607497192273370972619584899861142712893206,
+		 419407105914125234053769431667206258367219129165671225996545918296308792091986307494370818]))
+
+MNT6 = dict(
+	curve_type=CurveFamily.MNT6, field_modulus=MNT6_MODULUS, order=MNT4_MODULUS, A=11,
+	B=106700080510851735677967319632585352256454251201367587890185989362936000262606668469523074,
+	non_residue=5, sign=1, exp_w0=689871209842287392837045615510547309923794944, exp_w0_sign=1,
+	g1=G1Point(1, 110674700770126778393882603869626951811567485977091639688687961877760528128651173052813182),
+	g2=G2Point(
+		[269380198466244504653637671305429599711677506192737303403689032810754511401275513287203376,
+		 101668066405106869700765831792135692146568104033605850354849271803375160227630857753107184,
+		 322805906666569678780811182513959427641955724117872066033998588833778507219046521572819897],
+		[298781792776807612414635913385952723873683971137885832800217307670785530956504067940062115,
+		 432107649205949723809861194853295070342529917367032614648816135789748307710008377741861884,
+		 447166962087622981976951858421607638526818647311577779995208265186755534855589229608258269]))
+
+
+def mnt_op(curve, pairs, **kwa):
+	params = dict(curve, **kwa)
+	return MNTPairingOp(params['curve_type'], 38, params['field_modulus'], params['A'], params['B'],
+						38, params['order'], params['non_residue'], 19, ATE_LOOP_COUNT, params['sign'],
+						19, params['exp_w0'], 1, 1, params['exp_w0_sign'], len(pairs), pairs)
+
+
+class MNTTests(unittest.TestCase):
+	def check_curve(self, curve):
+		op = mnt_op(curve, [(curve['g1'], curve['g2'])])
+		self.assertEqual(StreamParser(encode_op(op)).parse(), op)
+		ctx = pairing_context(op)
+		P = ctx.G1(*curve['g1'])
+		Q = ctx.G2(*curve['g2'])
+		e = ctx.group.pairing(P, Q)
+		self.assertNotEqual(e, ctx.GT.field().one())
+		self.assertEqual(ctx.group.pairing(P * 5, Q), ctx.group.pairing(P, Q * 5))
+		self.assertEqual(ctx.group.pairing(P * 5, Q), e ** 5)
+
+		# e(3P, Q) * e(-P, 3Q) == 1
+		valid = mnt_op(curve, [(g1_point(P * 3), g2_point(Q)), (g1_point(-P), g2_point(Q * 3))])
+		self.assertEqual(execute(encode_op(valid)), b'\x01')
+		invalid = mnt_op(curve, [(g1_point(P * 3), g2_point(Q)), (g1_point(-P), g2_point(Q * 2))])
+		self.assertEqual(execute(encode_op(invalid)), b'\x00')
+		# Combined into one multi-pairing when executed together
+		self.assertEqual(execute_many([encode_op(valid), encode_op(invalid), encode_op(valid)]),
+						 [b'\x01', b'\x00', b'\x01'])
+
+	def test_mnt4(self):
+		self.check_curve(MNT4)
+
+	def test_mnt6(self):
+		self.check_curve(MNT6)
+
+	def test_invalid_parameters(self):
+		# The final exponent must be a multiple of Phi_k(q)/r
+		op = mnt_op(MNT4, [(MNT4['g1'], MNT4['g2'])], exp_w0=MNT4['exp_w0'] + 1)
+		with self.assertRaises(ValueError):
+			pairing_context(op)
+		# 4 is a square, so cannot be the non-residue for Fp2
+		op = mnt_op(MNT4, [(MNT4['g1'], MNT4['g2'])], non_residue=4)
+		with self.assertRaises(ValueError):
+			StreamParser(encode_op(op)).parse()
+
+
+if __name__ == "__main__":
+	unittest.main()
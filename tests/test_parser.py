@@ -0,0 +1,101 @@
+import io
+import mmap
+import tempfile
+import unittest
+
+from pyeip1962.parser import StreamParser, is_non_nth_root
+from pyeip1962.structs import Operation, G1AddOp, G1MultiExpOp, G2MulOp, G1Point
+
+
+FIELD_MODULUS = 4002409555221667393417789825735904156556882819939007885332058136124031650490837864442687629129015664037894272559787
+ORDER = 52435875175126190479447740508185965837690552500527637822603658699938581184513
+FIELD_LENGTH = 48
+ORDER_LENGTH = 32
+
+
+def _enc(x, n):
+	return int(x).to_bytes(n, 'big')
+
+
+def g1_prefix():
+	return (_enc(FIELD_LENGTH, 1) + _enc(FIELD_MODULUS, FIELD_LENGTH)
+			+ _enc(0, FIELD_LENGTH) + _enc(4, FIELD_LENGTH)
+			+ _enc(ORDER_LENGTH, 1) + _enc(ORDER, ORDER_LENGTH))
+
+
+def g1_point(x, y):
+	return _enc(x, FIELD_LENGTH) + _enc(y, FIELD_LENGTH)
+
+
+class ParserTests(unittest.TestCase):
+	def test_g1_add(self):
+		data = _enc(Operation.G1_ADD, 1) + g1_prefix() + g1_point(1, 2) + g1_point(3, 4)
+		op = StreamParser(data).parse()
+		self.assertIsInstance(op, G1AddOp)
+		self.assertEqual(op.prefix.field_modulus, FIELD_MODULUS)
+		self.assertEqual(op.prefix.order, ORDER)
+		self.assertEqual(op.lhs, G1Point(1, 2))
+		self.assertEqual(op.rhs, G1Point(3, 4))
+
+	def test_g1_multiexp(self):
+		n = 20
+		data = _enc(Operation.G1_MULTIEXP, 1) + g1_prefix() + _enc(n, 1)
+		data += b''.join(g1_point(i, i + 1) + _enc(i * 7, ORDER_LENGTH) for i in range(n))
+		parser = StreamParser(bytearray(data))
+		op = parser.parse()
+		self.assertIsInstance(op, G1MultiExpOp)
+		self.assertEqual(op.num_pairs, n)
+		self.assertEqual(op.pairs[-1], (G1Point(n - 1, n), (n - 1) * 7))
+		self.assertEqual(parser.remaining, 0)
+
+	def test_g2_mul(self):
+		data = (_enc(Operation.G2_MUL, 1) + _enc(FIELD_LENGTH, 1) + _enc(FIELD_MODULUS, FIELD_LENGTH)
+				+ _enc(2, 1) + _enc(FIELD_MODULUS - 1, FIELD_LENGTH)
+				+ _enc(0, FIELD_LENGTH * 2) + _enc(4, FIELD_LENGTH) + _enc(4, FIELD_LENGTH)
+				+ _enc(ORDER_LENGTH, 1) + _enc(ORDER, ORDER_LENGTH)
+				+ b''.join(_enc(_, FIELD_LENGTH) for _ in [1, 2, 3, 4])
+				+ _enc(1234, ORDER_LENGTH))
+		op = StreamParser(memoryview(data)).parse()
+		self.assertIsInstance(op, G2MulOp)
+		self.assertEqual(op.prefix.B, [4, 4])
+		self.assertEqual(op.lhs.x, [1, 2])
+		self.assertEqual(op.lhs.y, [3, 4])
+		self.assertEqual(op.scalar, 1234)
+
+	def test_streams(self):
+		data = _enc(Operation.G1_ADD, 1) + g1_prefix() + g1_point(1, 2) + g1_point(3, 4)
+		expected = StreamParser(data).parse()
+		stream = io.BytesIO(data + b'tail')
+		with StreamParser(stream) as parser:
+			self.assertEqual(parser.parse(), expected)
+		self.assertEqual(stream.read(), b'tail')
+		with tempfile.TemporaryFile() as handle:
+			handle.write(b'junk' + data + b'tail')
+			handle.seek(4)
+			with StreamParser(handle) as parser:
+				self.assertEqual(parser.parse(), expected)
+				mapped = parser._mapped
+			self.assertTrue(mapped.closed)
+			self.assertEqual(handle.read(), b'tail')
+			with mmap.mmap(handle.fileno(), 0) as mapped:
+				with StreamParser(mapped) as parser:
+					parser.offset = 4
+					self.assertEqual(parser.parse(), expected)
+
+	def test_truncated(self):
+		data = _enc(Operation.G1_ADD, 1) + g1_prefix() + g1_point(1, 2)
+		with self.assertRaises(RuntimeError):
+			StreamParser(data).parse()
+
+	def test_non_nth_root(self):
+		self.assertTrue(is_non_nth_root(FIELD_MODULUS - 1, FIELD_MODULUS, 2))
+		self.assertFalse(is_non_nth_root(4, FIELD_MODULUS, 2))
+		self.assertFalse(is_non_nth_root(0, FIELD_MODULUS, 2))
+		# Cubes and non-cubes modulo 7
+		self.assertTrue(is_non_nth_root(3, 7, 3))
+		self.assertFalse(is_non_nth_root(6, 7, 3))
+		self.assertFalse(is_non_nth_root(3, 7, 4))
+
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,50 @@
+import unittest
+
+from pyeip1962.encoder import encode_op
+from pyeip1962.executor import execute_many
+from pyeip1962.pool import ParallelExecutor, chunk_by_cost, estimate_cost
+from pyeip1962.structs import G1AddOp, G1MulOp, G1MultiExpOp
+from pyeip1962.curves.bls12_381 import BLS12_381
+
+from test_executor import G1_PREFIX, g1_point, g2_point, pairing_op
+
+
+class PoolTests(unittest.TestCase):
+	def test_chunk_by_cost(self):
+		costs = [1, 1, 10, 1, 1, 1, 1, 10]
+		chunks = chunk_by_cost(range(len(costs)), costs, 3)
+		self.assertEqual(sum(chunks, []), list(range(len(costs))))
+		self.assertEqual(chunks[0], [0, 1, 2])
+
+	def test_estimate_cost(self):
+		g = g1_point(BLS12_381.G1().generator())
+		add = estimate_cost(G1AddOp(G1_PREFIX, g, g))
+		mul = estimate_cost(G1MulOp(G1_PREFIX, g, 5))
+		multiexp = estimate_cost(G1MultiExpOp(G1_PREFIX, 4, [(g, 5)] * 4))
+		self.assertLess(add, mul)
+		self.assertLess(mul, multiexp)
+
+	def test_matches_serial(self):
+		g = BLS12_381.G1().generator()
+		calldatas = [b'\x02']
+		for i in range(1, 6):
+			calldatas.append(encode_op(G1AddOp(G1_PREFIX, g1_point(g), g1_point(g * i))))
+			calldatas.append(encode_op(G1MulOp(G1_PREFIX, g1_point(g * i), i + 100)))
+		with ParallelExecutor(max_workers=2) as pool:
+			results = pool.execute_many(calldatas)
+		expected = execute_many(calldatas)
+		self.assertIsInstance(results[0], RuntimeError)
+		self.assertEqual(results[1:], expected[1:])
+
+	def test_pairing_check(self):
+		g = BLS12_381.G1().generator()
+		h = BLS12_381.G2().generator()
+		pairs = [(g * 2, h), (g, -(h * 2)), (None, h)]
+		with ParallelExecutor(max_workers=2) as pool:
+			self.assertTrue(BLS12_381.pairing_check(pairs, pool=pool))
+			op = pairing_op([(g1_point(g), g2_point(h))])
+			self.assertEqual(pool.execute_pairing(op), b'\x00')
+
+
+if __name__ == "__main__":
+	unittest.main()
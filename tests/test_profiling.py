@@ -0,0 +1,65 @@
+import tracemalloc
+import unittest
+
+from pyeip1962 import profiling
+from pyeip1962.profiling import PROFILER, configure, span
+from pyeip1962.encoder import encode_op
+from pyeip1962.executor import execute
+from pyeip1962.structs import G1AddOp
+from pyeip1962.curves.bls12_381 import BLS12_381
+
+from test_executor import G1_PREFIX, g1_point
+
+
+class ProfilingTests(unittest.TestCase):
+	def setUp(self):
+		PROFILER.reset()
+
+	def tearDown(self):
+		configure(sample_rate=0.0, trace_allocations=False)
+		PROFILER.reset()
+
+	def test_disabled(self):
+		self.assertIs(span('parse'), profiling._NOOP)
+		with span('parse'):
+			pass
+		self.assertEqual(PROFILER.as_dict(), {})
+
+	def test_pipeline_spans(self):
+		configure(sample_rate=1.0)
+		g = BLS12_381.G1().generator()
+		execute(encode_op(G1AddOp(G1_PREFIX, g1_point(g), g1_point(g.double()))))
+		spans = PROFILER.as_dict()
+		for name in ('parse', 'execute.G1_ADD', 'validate.g1'):
+			self.assertIn(name, spans)
+		self.assertEqual(spans['validate.g1']['count'], 2)
+		self.assertEqual(spans['parse']['buckets']['+Inf'], 1)
+
+	def test_unsampled_nested(self):
+		configure(sample_rate=1e-12)
+		with span('outer'):
+			self.assertIs(span('inner'), profiling._NOOP)
+		self.assertEqual(PROFILER.as_dict(), {})
+
+	def test_allocations_and_prometheus(self):
+		configure(sample_rate=1.0, trace_allocations=True)
+		self.assertTrue(tracemalloc.is_tracing())
+		with span('alloc'):
+			data = [bytes(1000) for _ in range(100)]
+		del data
+		self.assertGreater(PROFILER.as_dict()['alloc']['alloc_bytes'], 100000)
+		text = PROFILER.to_prometheus()
+		self.assertIn('pyeip1962_span_seconds_bucket{span="alloc",le="+Inf"} 1', text)
+		self.assertIn('pyeip1962_span_alloc_bytes{span="alloc"}', text)
+		configure(trace_allocations=False)
+		self.assertFalse(tracemalloc.is_tracing())
+		# A session started by the application is left running
+		tracemalloc.start()
+		configure(trace_allocations=True)
+		configure(trace_allocations=False)
+		self.assertTrue(tracemalloc.is_tracing())
+		tracemalloc.stop()
+
+
+if __name__ == "__main__":
+	unittest.main()
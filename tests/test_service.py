@@ -0,0 +1,62 @@
+import asyncio
+import os
+import tempfile
+import unittest
+
+from pyeip1962.encoder import encode_op
+from pyeip1962.executor import encode_g1
+from pyeip1962.service import PrecompileServer, PrecompileClient, Coalescer, ServiceError
+from pyeip1962.structs import G1AddOp
+from pyeip1962.curves.bls12_381 import BLS12_381
+
+from test_executor import G1_PREFIX, g1_point
+
+
+class ServiceTests(unittest.TestCase):
+	def test_coalescing(self):
+		g = BLS12_381.G1().generator()
+
+		async def run():
+			server = PrecompileServer(Coalescer(window=0.05, max_batch=64))
+			await server.start(port=0)
+			port = server.sockets[0].getsockname()[1]
+			clients = [await PrecompileClient.connect(port=port) for _ in range(4)]
+			calls = [clients[i % 4].execute(encode_op(G1AddOp(G1_PREFIX, g1_point(g), g1_point(g * i))))
+					 for i in range(1, 9)]
+			results = await asyncio.gather(*calls)
+			with self.assertRaises(ServiceError):
+				await clients[0].execute(b'\x01')
+			stats = await clients[0].stats()
+			for client in clients:
+				await client.close()
+			server.close()
+			await server.wait_closed()
+			return results, stats
+
+		results, stats = asyncio.run(run())
+		self.assertEqual(results, [encode_g1(g * (i + 1), 48) for i in range(1, 9)])
+		self.assertEqual(stats['requests'], 9)
+		self.assertEqual(stats['errors'], 1)
+		self.assertLess(stats['batches'], 9)
+		self.assertEqual(stats['queue_depth'], 0)
+
+	def test_unix_socket(self):
+		g = BLS12_381.G1().generator()
+
+		async def run(path):
+			server = PrecompileServer()
+			await server.start(path=path)
+			client = await PrecompileClient.connect(path=path)
+			result = await client.execute(encode_op(G1AddOp(G1_PREFIX, g1_point(g), g1_point(g))))
+			await client.close()
+			server.close()
+			await server.wait_closed()
+			return result
+
+		with tempfile.TemporaryDirectory() as tmp:
+			result = asyncio.run(run(os.path.join(tmp, 'service.sock')))
+		self.assertEqual(result, encode_g1(g * 2, 48))
+
+
+if __name__ == "__main__":
+	unittest.main()
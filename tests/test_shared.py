@@ -0,0 +1,85 @@
+import os
+import unittest
+
+from pyeip1962 import shared
+from pyeip1962.constants import params_digest
+from pyeip1962.context import pairing_context
+from pyeip1962.group import _point_key
+from pyeip1962.encoder import encode_op
+from pyeip1962.mnt import MNTPairing
+from pyeip1962.pool import ParallelExecutor
+from pyeip1962.shared import SharedStore
+from pyeip1962.curves import sw6
+
+from test_executor import g2_point
+from test_mnt import MNT4, mnt_op
+
+
+class SharedTests(unittest.TestCase):
+	def test_store(self):
+		store = SharedStore.create()
+		try:
+			self.assertIsNone(store.get('missing'))
+			store.put('tables', dict(a=[1, 2, 3], b=[2**300]))
+			other = SharedStore(store.directory)
+			self.assertEqual(other.get('tables').get('a'), [1, 2, 3])
+			self.assertEqual(other.get('tables').get('b'), [2**300])
+			with self.assertRaises(ValueError):
+				store.get('../tables')
+		finally:
+			store.close()
+		self.assertFalse(os.path.exists(store.directory))
+
+	def test_bounds(self):
+		# Entries of about 1KB, so three of them fit
+		store = SharedStore.create(max_bytes=3200)
+		store.max_attached = 2
+		try:
+			for i in range(3):
+				store.put(f'tables-{i}', dict(a=[i] * 1000))
+				os.utime(store._path(f'tables-{i}'), ns=(i + 1, i + 1))
+			# Used since it was published, so kept over the least recently used
+			self.assertEqual(store.get('tables-0').get('a'), [0] * 1000)
+			store.put('tables-3', dict(a=[3] * 1000))
+			self.assertEqual(sorted(os.listdir(store.directory)), ['tables-0.bin', 'tables-2.bin', 'tables-3.bin'])
+			self.assertIsNone(store.get('tables-1'))
+			store.get('tables-2')
+			store.get('tables-3')
+			self.assertEqual(list(store._attached), ['tables-2', 'tables-3'])
+		finally:
+			store.close()
+
+	def test_prepared_lines(self):
+		store = SharedStore.create()
+		shared.attach(store.directory)
+		try:
+			Q = sw6.SW6_G2.generator()
+			params = (sw6.Fq3, sw6.Fq6, sw6.NON_RESIDUE, sw6.SW6.order(), sw6.ATE_LOOP_COUNT)
+			lines = MNTPairing(*params).prepare(Q)
+			# A fresh engine, as in another worker, maps the published lines
+			engine = MNTPairing(*params)
+			engine._lines = None
+			self.assertEqual(engine.prepare(Q), lines)
+			# Lines published under the key of another point, as after a digest collision, are not used
+			R = Q.double()
+			key = f'mnt-lines-{engine._digest}-{params_digest(_point_key(R), 64)}'
+			os.replace(os.path.join(store.directory, os.listdir(store.directory)[0]), store._path(key))
+			engine = MNTPairing(*params)
+			self.assertEqual(engine.prepare(R), engine._lines(R))
+		finally:
+			shared.attach(None)
+			store.close()
+
+	def test_pool(self):
+		# A G2 point no earlier test prepared lines for, as forked workers inherit those
+		ctx = pairing_context(mnt_op(MNT4, []))
+		Q = g2_point(ctx.G2(*MNT4['g2']) * 7)
+		op = encode_op(mnt_op(MNT4, [(MNT4['g1'], Q)]))
+		with ParallelExecutor(max_workers=2, chunks_per_worker=1) as pool:
+			self.assertEqual(pool.execute_many([op, op]), [b'\x00', b'\x00'])
+			published = os.listdir(pool.shared.directory)
+		self.assertTrue(any(_.startswith('mnt-lines-') for _ in published))
+
+
+if __name__ == "__main__":
+	unittest.main()